@@ -0,0 +1,281 @@
+"""Benchmark jalur data Sistem Irigasi & Stock Agroindustri.
+
+Membuat produk.csv, pengguna.csv dan transaksi.csv sintetis di folder
+sementara (lewat SISTA_DATA_DIR), memanggil operasi program tanpa menu
+interaktif, lalu mencetak hasil JSON: ops/detik, persentil latensi, dan
+memori puncak. Bila file baseline ada, hasil yang lebih lambat dari
+baseline melebihi toleransi membuat program keluar dengan kode 1.
+
+Contoh:
+    python benchmark.py --ukuran 1k,100k
+    python benchmark.py --ukuran 1k --simpan-baseline
+    python benchmark.py --ukuran 10M --detik 5 --keluaran hasil.json
+
+Ukuran 10M butuh beberapa GB RAM dan beberapa menit hanya untuk membuat data.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKRIP = os.path.join(BASE_DIR, "projek Algo Kelompok 12.py")
+BASELINE_FILE = os.path.join(BASE_DIR, "benchmark_baseline.json")
+PASSWORD = "rahasia123"
+# p99 dari sedikit sampel hampir sama dengan maksimum dan acak antar run;
+# di bawah jumlah ini regresi latensi dicek dengan median (p50).
+MIN_SAMPEL_P99 = 30
+KATA = ['Padi', 'Jagung', 'Beras', 'Pupuk', 'Urea', 'Benih', 'Cabai', 'Kedelai', 'Tebu', 'Kopi']
+
+
+def parse_ukuran(teks):
+    teks = teks.strip().lower()
+    kali = {'k': 1_000, 'm': 1_000_000}.get(teks[-1:], 1)
+    return int(float(teks.rstrip('km')) * kali)
+
+
+def _tulis_bertahap(path, header, baris, ukuran_chunk=100_000):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(header + '\n')
+        chunk = []
+        for b in baris:
+            chunk.append(b)
+            if len(chunk) >= ukuran_chunk:
+                f.write('\n'.join(chunk) + '\n')
+                chunk = []
+        if chunk:
+            f.write('\n'.join(chunk) + '\n')
+
+
+def buat_data(folder, n, hash_password):
+    """Tulis n produk, n pengguna (semua dengan PASSWORD) dan n transaksi."""
+    rnd = random.Random(n)
+    os.makedirs(folder, exist_ok=True)
+    _tulis_bertahap(os.path.join(folder, 'produk.csv'), 'id,nama_produk,harga,stok',
+                    (f"P{i},{KATA[i % len(KATA)]} {i},{rnd.randint(100, 100_000)},{rnd.randint(10_000, 1_000_000)}"
+                     for i in range(n)))
+    hash_pw = hash_password(PASSWORD)
+    _tulis_bertahap(os.path.join(folder, 'pengguna.csv'), 'username,password,role',
+                    (f"user{i},{hash_pw},{'admin' if i == 0 else 'user'}" for i in range(n)))
+    n_user = max(1, min(n, 1000))
+    awal = datetime(2025, 1, 1)
+    langkah = max(1, 365 * 86400 // n)
+
+    def transaksi():
+        for i in range(n):
+            waktu = (awal + timedelta(seconds=i * langkah)).strftime("%Y-%m-%d %H:%M:%S")
+            pid = rnd.randrange(n)
+            jumlah = rnd.randint(1, 5)
+            harga = rnd.randint(100, 100_000)
+            yield f"{waktu},user{rnd.randrange(n_user)},P{pid},{KATA[pid % len(KATA)]} {pid},{jumlah},{harga},{jumlah * harga}"
+
+    _tulis_bertahap(os.path.join(folder, 'transaksi.csv'), 'waktu,username,id,nama,stok,harga,total', transaksi())
+
+
+def muat_modul(folder, nama):
+    """Impor skrip utama dengan SISTA_DATA_DIR menunjuk ke folder benchmark."""
+    os.environ['SISTA_DATA_DIR'] = folder
+    spec = importlib.util.spec_from_file_location(nama, SKRIP)
+    modul = importlib.util.module_from_spec(spec)
+    # Terdaftar di sys.modules agar fungsi pekerja bisa di-pickle (SISTA_PARALEL).
+    sys.modules[nama] = modul
+    spec.loader.exec_module(modul)
+    return modul
+
+
+def mulai_program(folder, ui_cepat=False):
+    """Jalankan program interaktif sampai bingkai pertama lalu keluar (pilih menu 3)."""
+    env = dict(os.environ, SISTA_DATA_DIR=folder, TERM='dumb', SISTA_UI_CEPAT='1' if ui_cepat else '')
+    subprocess.run([sys.executable, SKRIP], input=b'3\n', env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def _persentil(urut, p):
+    if not urut:
+        return 0.0
+    return urut[min(len(urut) - 1, int(round(p / 100 * (len(urut) - 1))))]
+
+
+def ukur(fungsi, detik=1.0, maks_ulang=10_000, min_ulang=1):
+    """Jalankan fungsi berulang sampai `detik` habis; lalu satu kali lagi dengan tracemalloc.
+
+    Panggilan pertama (muat cache, bangun indeks) dicatat terpisah sebagai
+    pertama_ms dan tidak ikut persentil.
+    """
+    t0 = time.perf_counter()
+    fungsi()
+    pertama = time.perf_counter() - t0
+    latensi = []
+    mulai = time.perf_counter()
+    while len(latensi) < maks_ulang:
+        t0 = time.perf_counter()
+        fungsi()
+        latensi.append(time.perf_counter() - t0)
+        if len(latensi) >= min_ulang and time.perf_counter() - mulai >= detik:
+            break
+    tracemalloc.start()
+    fungsi()
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = sum(latensi)
+    urut = sorted(latensi)
+    return {
+        'ulang': len(latensi),
+        'ops_per_detik': round(len(latensi) / total, 2) if total else None,
+        'p50_ms': round(_persentil(urut, 50) * 1000, 3),
+        'p90_ms': round(_persentil(urut, 90) * 1000, 3),
+        'p99_ms': round(_persentil(urut, 99) * 1000, 3),
+        'maks_ms': round(urut[-1] * 1000, 3),
+        'pertama_ms': round(pertama * 1000, 3),
+        'memori_puncak_kb': round(puncak / 1024, 1),
+    }
+
+
+def jalankan_ukuran(n, detik, simpan_data=False):
+    folder = tempfile.mkdtemp(prefix=f'sista_bench_{n}_')
+    try:
+        t0 = time.perf_counter()
+        # Hash dibuat dengan modul yang sama agar format tersimpan identik.
+        buat_data(folder, n, muat_modul(folder, f'sista_gen_{n}').hash_password)
+        waktu_data = time.perf_counter() - t0
+        m = muat_modul(folder, f'sista_bench_{n}')
+        m.pengguna_sekarang = 'user0'
+        rnd = random.Random(1)
+        n_user = max(1, min(n, 1000))
+        hasil = {'_data': {'baris': n, 'detik_generate': round(waktu_data, 2)}}
+        diam = io.StringIO()
+
+        def acak_produk():
+            return f"P{rnd.randrange(n)}"
+
+        def acak_user():
+            return f"user{rnd.randrange(1, n_user) if n_user > 1 else 0}"
+
+        hasil['load_products_dingin'] = ukur(lambda: m.KatalogProduk(m.produk_path).segarkan(), detik)
+        hasil['load_products_snapshot_dingin'] = ukur(lambda: m.KatalogSnapshot(m.produk_path).segarkan(), detik)
+        hasil['load_products'] = ukur(m.load_products, detik)
+        hasil['cari_produk'] = ukur(lambda: m.katalog.cari(acak_produk()), detik)
+        hasil['transaksi'] = ukur(lambda: m.beli(acak_user(), acak_produk(), 1), detik)
+        hasil['riwayat_transaksi'] = ukur(lambda: m.halaman_transaksi(1, 20, acak_user()), detik)
+        hasil['riwayat_semua_halaman_1'] = ukur(lambda: m.halaman_transaksi(1, 20), detik)
+        hasil['read_all_users_dingin'] = ukur(lambda: m.RepoPengguna(m.PENGGUNA_FILE).segarkan(), detik)
+        hasil['read_all_users_snapshot_dingin'] = ukur(lambda: m.RepoPenggunaSnapshot(m.PENGGUNA_FILE).segarkan(), detik)
+        hasil['read_all_users'] = ukur(m.read_all_users, detik)
+        hasil['login'] = ukur(lambda: m.cek_login(acak_user(), PASSWORD), detik)
+        terhapus = iter(range(n - 1, 0, -1))
+        hasil['delete_user_account'] = ukur(lambda: m.delete_user_account(f"user{next(terhapus)}"), detik,
+                                            maks_ulang=max(1, n // 2 - 2))
+
+        def irigasi():
+            with contextlib.redirect_stdout(diam):
+                m.tentukan_irigasi(rnd.randint(0, 100), rnd.random() < 0.3)
+            diam.seek(0)
+            diam.truncate()
+
+        hasil['tentukan_irigasi'] = ukur(irigasi, detik)
+        hasil['laporan_penjualan'] = ukur(m.laporan_penjualan, detik)
+
+        def bingkai():
+            with contextlib.redirect_stdout(diam):
+                m.tampilkan_bingkai('utama', m.bingkai_utama)
+            diam.seek(0)
+            diam.truncate()
+
+        m.MODE_UI_CEPAT = True
+        hasil['bingkai_utama'] = ukur(bingkai, detik)
+        hasil['mulai_program'] = ukur(lambda: mulai_program(folder), detik)
+        hasil['mulai_program_ui_cepat'] = ukur(lambda: mulai_program(folder, True), detik)
+        return hasil
+    finally:
+        if simpan_data:
+            print(f"Data benchmark disimpan di {folder}", file=sys.stderr)
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def bandingkan(hasil, baseline, toleransi, min_sampel=MIN_SAMPEL_P99):
+    """Daftar regresi: ops/detik turun atau latensi naik melebihi toleransi dibanding baseline.
+
+    Latensi dibandingkan pada p99 bila kedua run punya minimal min_sampel
+    ulangan, selain itu pada p50.
+    """
+    regresi = []
+    for ukuran, ops in hasil.items():
+        for nama, nilai in ops.items():
+            dasar = baseline.get(ukuran, {}).get(nama)
+            if not dasar or nama.startswith('_'):
+                continue
+            if dasar.get('ops_per_detik') and nilai['ops_per_detik'] < dasar['ops_per_detik'] * (1 - toleransi):
+                regresi.append({'ukuran': ukuran, 'operasi': nama, 'metrik': 'ops_per_detik',
+                                'baseline': dasar['ops_per_detik'], 'sekarang': nilai['ops_per_detik']})
+            cukup = min(nilai.get('ulang', 0), dasar.get('ulang', 0)) >= min_sampel
+            metrik = 'p99_ms' if cukup else 'p50_ms'
+            if dasar.get(metrik) and nilai[metrik] > dasar[metrik] * (1 + toleransi):
+                regresi.append({'ukuran': ukuran, 'operasi': nama, 'metrik': metrik,
+                                'baseline': dasar[metrik], 'sekarang': nilai[metrik]})
+    return regresi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark operasi data dengan data sintetis.")
+    parser.add_argument('--ukuran', default='1k,100k', help="Daftar ukuran data, mis. 1k,100k,10M")
+    parser.add_argument('--detik', type=float, default=1.0, help="Anggaran waktu per operasi")
+    parser.add_argument('--keluaran', help="Tulis hasil JSON ke file ini (default stdout)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="File baseline untuk cek regresi")
+    parser.add_argument('--toleransi', type=float, default=0.5,
+                        help="Penurunan relatif yang masih diterima (0.5 = 50%%)")
+    parser.add_argument('--min-sampel', type=int, default=MIN_SAMPEL_P99,
+                        help="Ulangan minimum sebelum p99 dipakai untuk cek regresi (selain itu p50)")
+    parser.add_argument('--simpan-baseline', action='store_true', help="Simpan hasil sebagai baseline baru")
+    parser.add_argument('--simpan-data', action='store_true', help="Jangan hapus folder data sintetis")
+    args = parser.parse_args(argv)
+
+    hasil = {}
+    for teks in args.ukuran.split(','):
+        n = parse_ukuran(teks)
+        print(f"Benchmark {n} baris...", file=sys.stderr)
+        hasil[teks.strip()] = jalankan_ukuran(n, args.detik, args.simpan_data)
+
+    laporan = {
+        'waktu': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': os.environ.get('SISTA_BACKEND', 'csv'),
+        'jurnal': os.environ.get('SISTA_JURNAL', '') == '1',
+        'hasil': hasil,
+        'regresi': [],
+    }
+    if args.simpan_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(hasil, f, indent=1)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            laporan['regresi'] = bandingkan(hasil, json.load(f), args.toleransi, args.min_sampel)
+
+    teks = json.dumps(laporan, indent=1)
+    if args.keluaran:
+        with open(args.keluaran, 'w', encoding='utf-8') as f:
+            f.write(teks + '\n')
+    else:
+        print(teks)
+    if laporan['regresi']:
+        for r in laporan['regresi']:
+            print(f"REGRESI {r['ukuran']} {r['operasi']} {r['metrik']}: "
+                  f"{r['baseline']} -> {r['sekarang']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
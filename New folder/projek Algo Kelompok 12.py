@@ -1,10 +1,67 @@
+import argparse
+import atexit
+import bisect
+import builtins
+import cProfile
 import csv
+import gzip
+import hashlib
+import heapq
+import hmac
+import importlib.util
+import io
+import itertools
+import json
+import mmap
 import os
-from datetime import datetime
+import queue
+import secrets
+import socket
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+class _ImporMalas:
+    """Modul yang baru diimpor saat atributnya pertama dipakai, lalu mengganti nama globalnya."""
+
+    def __init__(self, modul, nama):
+        self._modul = modul
+        self._nama = nama
+
+    def __getattr__(self, atribut):
+        modul = importlib.import_module(self._modul)
+        globals()[self._nama] = modul
+        return getattr(modul, atribut)
+
+# numpy dan asyncio mendominasi waktu mulai program padahal hanya dipakai
+# analitik dan server, jadi keduanya baru diimpor saat dibutuhkan.
+# numpy opsional; bila tidak terpasang np None dan analitik jatuh ke array stdlib.
+np = _ImporMalas('numpy', 'np') if importlib.util.find_spec('numpy') else None
+asyncio = _ImporMalas('asyncio', 'asyncio')
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_ADMIN_DIR = os.path.join(BASE_DIR, "data_admin")
-os.makedirs(DATA_ADMIN_DIR, exist_ok=True)
+DATA_ADMIN_DIR = os.environ.get('SISTA_DATA_DIR') or os.path.join(BASE_DIR, "data_admin")
+
+def pastikan_folder(path):
+    """Buat folder induk path bila belum ada (dipanggil saat file pertama kali dibuat)."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
 
 def admin_file(name):
 
@@ -24,70 +81,1320 @@ PENGGUNA_FILE = file_in_dirs('pengguna.csv')
 TRANSAKSI_FILE = file_in_dirs('transaksi.csv')
 produk_path = file_in_dirs('produk.csv')
 
+# Instrumentasi opsional. SISTA_METRIK=path mengaktifkan pencatatan waktu,
+# byte dan baris per operasi penyimpanan serta histogram latensi aksi menu
+# (waktu menunggu input() tidak dihitung); hasilnya ditulis ke path dalam
+# format teks Prometheus saat program selesai. SISTA_PROFIL=path menyimpan
+# tangkapan cProfile (pstats) satu sesi. Bila tidak diset, dekorator
+# terukur() mengembalikan fungsi aslinya sehingga tidak ada overhead.
+METRIK_FILE = os.environ.get('SISTA_METRIK', '')
+PROFIL_FILE = os.environ.get('SISTA_PROFIL', '')
+BATAS_HISTOGRAM = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Instrumen:
+    """Penampung metrik operasi dan histogram latensi, aman dipakai banyak thread."""
+
+    def __init__(self):
+        self.operasi = {}   # nama -> [jumlah, detik, byte, baris, maks]
+        self.latensi = {}   # (grup, aksi) -> [hitungan per bucket..., jumlah, detik]
+        self.tunggu_input = 0.0
+        self._aksi = {}
+        self._lokal = threading.local()
+        self._kunci = threading.Lock()
+
+    def _catat_operasi(self, nama, detik, byte, baris):
+        with self._kunci:
+            m = self.operasi.get(nama)
+            if m is None:
+                m = self.operasi[nama] = [0, 0.0, 0, 0, 0.0]
+            m[0] += 1
+            m[1] += detik
+            m[2] += byte
+            m[3] += baris
+            m[4] = max(m[4], detik)
+
+    def bungkus(self, nama, fungsi):
+        def terbungkus(*args, **kwargs):
+            tumpukan = getattr(self._lokal, 'tumpukan', None)
+            if tumpukan is None:
+                tumpukan = self._lokal.tumpukan = []
+            hitungan = [0, 0]
+            tumpukan.append(hitungan)
+            t0 = time.perf_counter()
+            try:
+                return fungsi(*args, **kwargs)
+            finally:
+                tumpukan.pop()
+                self._catat_operasi(nama, time.perf_counter() - t0, hitungan[0], hitungan[1])
+        terbungkus.__name__ = fungsi.__name__
+        terbungkus.__doc__ = fungsi.__doc__
+        terbungkus.__wrapped__ = fungsi
+        return terbungkus
+
+    def hitung(self, byte=0, baris=0):
+        tumpukan = getattr(self._lokal, 'tumpukan', None)
+        if tumpukan:
+            tumpukan[-1][0] += byte
+            tumpukan[-1][1] += baris
+
+    def catat_latensi(self, grup, aksi, detik):
+        with self._kunci:
+            h = self.latensi.get((grup, aksi))
+            if h is None:
+                h = self.latensi[(grup, aksi)] = [0] * (len(BATAS_HISTOGRAM) + 2) + [0.0]
+            for i, batas in enumerate(BATAS_HISTOGRAM):
+                if detik <= batas:
+                    h[i] += 1
+                    break
+            else:
+                h[len(BATAS_HISTOGRAM)] += 1
+            h[-2] += 1
+            h[-1] += detik
+
+    def catat_menu(self, menu, aksi):
+        """Tutup aksi sebelumnya di menu yang sama lalu mulai aksi baru."""
+        sekarang = time.perf_counter()
+        lama = self._aksi.pop(menu, None)
+        if lama is not None:
+            self.catat_latensi(menu, lama[0], max(0.0, sekarang - lama[1] - (self.tunggu_input - lama[2])))
+        if aksi is not None:
+            self._aksi[menu] = (aksi, time.perf_counter(), self.tunggu_input)
+
+    def input(self, prompt=''):
+        t0 = time.perf_counter()
+        try:
+            return builtins.input(prompt)
+        finally:
+            self.tunggu_input += time.perf_counter() - t0
+
+    def teks_prometheus(self):
+        with self._kunci:
+            operasi = {k: list(v) for k, v in self.operasi.items()}
+            latensi = {k: list(v) for k, v in self.latensi.items()}
+        baris = ["# TYPE sista_operasi_total counter"]
+        for nama, (jumlah, detik, byte, n, maks) in sorted(operasi.items()):
+            label = f'operasi="{nama}"'
+            baris += [f"sista_operasi_total{{{label}}} {jumlah}",
+                      f"sista_operasi_detik_total{{{label}}} {detik:.6f}",
+                      f"sista_operasi_detik_maks{{{label}}} {maks:.6f}",
+                      f"sista_operasi_byte_total{{{label}}} {byte}",
+                      f"sista_operasi_baris_total{{{label}}} {n}"]
+        baris.append("# TYPE sista_aksi_detik histogram")
+        for (grup, aksi), h in sorted(latensi.items()):
+            label = f'grup="{grup}",aksi="{aksi}"'
+            kumulatif = 0
+            for batas, n in zip(BATAS_HISTOGRAM + ('+Inf',), h):
+                kumulatif += n
+                baris.append(f'sista_aksi_detik_bucket{{{label},le="{batas}"}} {kumulatif}')
+            baris += [f"sista_aksi_detik_count{{{label}}} {h[-2]}",
+                      f"sista_aksi_detik_sum{{{label}}} {h[-1]:.6f}"]
+        return '\n'.join(baris) + '\n'
+
+    def tulis(self, path=None):
+        for menu in list(self._aksi):
+            self.catat_menu(menu, None)
+        path = path or METRIK_FILE
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.teks_prometheus())
+        os.replace(tmp, path)
+
+
+instrumen = Instrumen() if METRIK_FILE else None
+
+def terukur(nama):
+    """Dekorator: catat waktu (dan byte/baris lewat hitung()) tiap panggilan bila SISTA_METRIK aktif."""
+    def dekor(fungsi):
+        return fungsi if instrumen is None else instrumen.bungkus(nama, fungsi)
+    return dekor
+
+def hitung(byte=0, baris=0):
+    if instrumen is not None:
+        instrumen.hitung(byte, baris)
+
+def hitung_tulis(f, awal, baris=0):
+    """hitung() untuk byte yang ditulis ke file f sejak posisi awal (f.tell() sebelum menulis)."""
+    if instrumen is not None:
+        instrumen.hitung(f.tell() - awal, baris)
+
+def catat_menu(menu, aksi):
+    if instrumen is not None:
+        instrumen.catat_menu(menu, aksi)
+
+if instrumen is not None:
+    input = instrumen.input
+    atexit.register(instrumen.tulis)
+
+
 def ensure_user_file(path=PENGGUNA_FILE):  
     if not os.path.exists(path):
+        pastikan_folder(path)
         with open(path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['username', 'password', 'role'])
  
-def read_all_users(path=PENGGUNA_FILE):
-    ensure_user_file(path)
-    users = {}
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            if not r.get('username'):
+# Password disimpan sebagai hash PBKDF2 bergaram. Verifikasi yang berhasil
+# disimpan di cache LRU terbatas agar login beruntun tidak menghitung ulang.
+HASH_ITERASI = 120_000
+UKURAN_CACHE_LOGIN = 1024
+_cache_login = OrderedDict()
+_cache_login_kunci = threading.Lock()
+_cache_login_rahasia = secrets.token_bytes(32)
+
+def hash_password(password, salt=None, iterasi=HASH_ITERASI):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('ascii'), iterasi)
+    return f"pbkdf2_sha256${iterasi}${salt}${digest.hex()}"
+
+def password_ter_hash(tersimpan):
+    return tersimpan.startswith('pbkdf2_sha256$')
+
+def verifikasi_password(password, tersimpan):
+    """Cocokkan password dengan nilai tersimpan (hash, atau teks biasa lama)."""
+    if not password_ter_hash(tersimpan):
+        return hmac.compare_digest(password.encode('utf-8'), tersimpan.encode('utf-8'))
+    # Kunci cache memakai HMAC dengan rahasia per proses, bukan password mentah.
+    kunci = hmac.new(_cache_login_rahasia, (tersimpan + '\0' + password).encode('utf-8'), 'sha256').digest()
+    with _cache_login_kunci:
+        if kunci in _cache_login:
+            _cache_login.move_to_end(kunci)
+            return True
+    try:
+        _, iterasi, salt, _ = tersimpan.split('$')
+        cocok = hmac.compare_digest(hash_password(password, salt, int(iterasi)), tersimpan)
+    except ValueError:
+        return False
+    if cocok:
+        with _cache_login_kunci:
+            _cache_login[kunci] = True
+            if len(_cache_login) > UKURAN_CACHE_LOGIN:
+                _cache_login.popitem(last=False)
+    return cocok
+
+
+# Snapshot biner opsional (SISTA_SNAPSHOT=1) untuk produk.csv dan
+# pengguna.csv. CSV tetap format utama; di sebelahnya disimpan file .snap
+# berisi kolom-kolom berlebar tetap (int64 dan tabel string dengan offset)
+# yang dibuka lewat mmap tanpa parsing. Snapshot dibuat ulang dari CSV bila
+# ukuran atau mtime CSV berbeda dari yang tercatat di kepalanya.
+MODE_SNAPSHOT = os.environ.get('SISTA_SNAPSHOT', '') == '1'
+KEPALA_SNAPSHOT = struct.Struct('<8s8sqqqq')  # magic, jenis kolom, ukuran csv, mtime csv, baris, info
+
+
+class KolomTeks:
+    """Kolom string di snapshot: offset int64 (n+1) dan blob UTF-8."""
+    __slots__ = ('_off', '_blob')
+
+    def __init__(self, off, blob):
+        self._off = off
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._off) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[self._off[i]:self._off[i + 1]], 'utf-8')
+
+
+class _KunciUrut:
+    """Urutan kunci[perm[j]] untuk bisect tanpa membangun list kunci."""
+    __slots__ = ('_perm', '_kunci')
+
+    def __init__(self, perm, kunci):
+        self._perm = perm
+        self._kunci = kunci
+
+    def __len__(self):
+        return len(self._perm)
+
+    def __getitem__(self, j):
+        return self._kunci(self._perm[j])
+
+
+def _tanda_snapshot(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def tulis_snapshot(path, jenis, sumber, kolom, info=0):
+    """Tulis kolom ('q' = int, 's' = str, sesuai huruf di jenis) ke path secara atomik.
+
+    sumber adalah (ukuran, mtime_ns) CSV asal, dipakai buka_snapshot()
+    untuk mengenali snapshot yang basi.
+    """
+    n = len(kolom[0]) if kolom else 0
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(KEPALA_SNAPSHOT.pack(b'SISTASN1', jenis.encode(), sumber[0], sumber[1], n, info))
+        for tipe, isi in zip(jenis, kolom):
+            if tipe == 'q':
+                f.write(array('q', isi).tobytes())
+                continue
+            data = [s.encode('utf-8') for s in isi]
+            f.write(array('q', itertools.accumulate(map(len, data), initial=0)).tobytes())
+            blob = b''.join(data)
+            f.write(blob + b'\0' * (-len(blob) % 8))
+    os.replace(tmp, path)
+
+def buka_snapshot(path, jenis, sumber):
+    """Petakan snapshot ke memori. Mengembalikan (kolom, info) atau None bila tidak ada/basi/rusak.
+
+    Dipetakan dengan ACCESS_COPY: kolom int bisa diubah di memori tanpa
+    menyentuh file.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    if len(mm) < KEPALA_SNAPSHOT.size:
+        return None
+    magic, jenis_file, ukuran, mtime, n, info = KEPALA_SNAPSHOT.unpack_from(mm)
+    if magic != b'SISTASN1' or jenis_file.rstrip(b'\0') != jenis.encode() or (ukuran, mtime) != tuple(sumber):
+        return None
+    mv = memoryview(mm)
+    pos = KEPALA_SNAPSHOT.size
+    kolom = []
+    try:
+        for tipe in jenis:
+            lebar = 8 * n if tipe == 'q' else 8 * (n + 1)
+            if pos + lebar > len(mm):
+                return None
+            isi = mv[pos:pos + lebar].cast('q')
+            pos += lebar
+            if tipe == 'q':
+                kolom.append(isi)
                 continue
-            users[r['username']] = {'password': r.get('password',''), 'role': r.get('role','user')}
-    return users
+            panjang = isi[n]
+            if pos + panjang > len(mm):
+                return None
+            kolom.append(KolomTeks(isi, mv[pos:pos + panjang]))
+            pos += panjang + (-panjang % 8)
+    except (TypeError, ValueError):
+        return None
+    hitung(len(mm), n)
+    return kolom, info
+
+
+PERAN_DIHAPUS = '__dihapus__'
+BATAS_KOMPAKSI_PENGGUNA = 100
+
+
+class RepoPengguna:
+    """Cache pengguna.csv di memori, dimuat ulang bila file berubah.
+
+    Pendaftaran dan penghapusan hanya menambah satu baris (penghapusan
+    berupa baris tombstone dengan role __dihapus__; baris terakhir per
+    username yang berlaku). Bila baris mati terlalu banyak, file dipadatkan
+    di thread latar belakang.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.users = {}
+        self._tanda = None
+        self._mati = 0
+        self._kompaksi_jalan = False
+
+    def _tanda_file(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _baca_csv(self):
+        """Parse pengguna.csv. Mengembalikan (users, jumlah baris)."""
+        users = {}
+        baris = 0
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for r in csv.DictReader(f):
+                if not r.get('username'):
+                    continue
+                baris += 1
+                if r.get('role') == PERAN_DIHAPUS:
+                    users.pop(r['username'], None)
+                else:
+                    users[r['username']] = {'password': r.get('password',''), 'role': r.get('role','user')}
+        return users, baris
+
+    @terukur('pengguna.baca')
+    def segarkan(self):
+        ensure_user_file(self.path)
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
+            return self.users
+        users, baris = self._baca_csv()
+        self.users = users
+        self._mati = baris - len(users)
+        self._tanda = tanda
+        hitung(tanda[2] if tanda else 0, baris)
+        return users
+
+    def cari(self, username):
+        return self.segarkan().get(username)
+
+    @terukur('pengguna.tambah_baris')
+    def _tambah_baris(self, row):
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            awal = f.tell()
+            csv.writer(f).writerow(row)
+            hitung_tulis(f, awal, 1)
+        self._tanda = self._tanda_file()
+
+    def tambah(self, username, password, role):
+        with kunci_data():
+            self.segarkan()
+            self._tambah_baris([username, password, role])
+            if username in self.users:
+                self._mati += 1
+            self.users[username] = {'password': password, 'role': role}
+        self._cek_kompaksi()
+
+    def hapus(self, username):
+        with kunci_data():
+            if username not in self.segarkan():
+                return False
+            self._tambah_baris([username, '', PERAN_DIHAPUS])
+            del self.users[username]
+            self._mati += 2
+        self._cek_kompaksi()
+        return True
+
+    def _cek_kompaksi(self):
+        if self._mati > max(BATAS_KOMPAKSI_PENGGUNA, len(self.users)) and not self._kompaksi_jalan:
+            self._kompaksi_jalan = True
+            threading.Thread(target=self.kompaksi, daemon=True).start()
+
+    def kompaksi(self):
+        """Tulis ulang pengguna.csv hanya dengan baris yang masih hidup."""
+        try:
+            with kunci_data():
+                write_all_users(self.segarkan(), self.path)
+                self.segarkan()
+        finally:
+            self._kompaksi_jalan = False
+
+
+class TabelPengguna(MutableMapping):
+    """Pengguna dari snapshot: username -> {'password', 'role'} tanpa dict per baris.
+
+    Nilai dibuat saat diakses. Perubahan setelah dimuat disimpan di overlay
+    kecil (_nilai untuk username lama, _baru untuk username baru, _hapus
+    untuk yang dihapus) dengan urutan iterasi sama seperti dict biasa.
+    """
+
+    def __init__(self, username, password, role, urut, _overlay=None):
+        self._username = username
+        self._password = password
+        self._role = role
+        self._urut = urut
+        self._nilai, self._baru, self._hapus = _overlay or ({}, {}, set())
+
+    def _indeks(self, username):
+        j = bisect.bisect_left(_KunciUrut(self._urut, self._username.__getitem__), username)
+        if j < len(self._urut):
+            i = self._urut[j]
+            if self._username[i] == username:
+                return i
+        return None
+
+    def _ada_di_dasar(self, username):
+        return username not in self._hapus and self._indeks(username) is not None
+
+    def __getitem__(self, username):
+        if username in self._baru:
+            return self._baru[username]
+        if username in self._hapus:
+            raise KeyError(username)
+        if username in self._nilai:
+            return self._nilai[username]
+        i = self._indeks(username)
+        if i is None:
+            raise KeyError(username)
+        return {'password': self._password[i], 'role': self._role[i]}
+
+    def __setitem__(self, username, nilai):
+        if username not in self._baru and self._ada_di_dasar(username):
+            self._nilai[username] = nilai
+        else:
+            self._baru[username] = nilai
+
+    def __delitem__(self, username):
+        if username in self._baru:
+            del self._baru[username]
+        elif self._ada_di_dasar(username):
+            self._hapus.add(username)
+            self._nilai.pop(username, None)
+        else:
+            raise KeyError(username)
+
+    def __iter__(self):
+        hapus = self._hapus
+        for i in range(len(self._username)):
+            u = self._username[i]
+            if u not in hapus:
+                yield u
+        yield from self._baru
+
+    def __len__(self):
+        return len(self._username) - len(self._hapus) + len(self._baru)
+
+    def copy(self):
+        return TabelPengguna(self._username, self._password, self._role, self._urut,
+                             (dict(self._nilai), dict(self._baru), set(self._hapus)))
+
+
+class RepoPenggunaSnapshot(RepoPengguna):
+    """RepoPengguna yang memuat dari snapshot biner pengguna.csv.snap bila masih cocok."""
+
+    JENIS = 'sssq'  # username, password, role, urutan username
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.snap_path = path + '.snap'
+
+    @terukur('pengguna.baca')
+    def segarkan(self):
+        ensure_user_file(self.path)
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
+            return self.users
+        sumber = tanda[2], tanda[1]
+        snap = buka_snapshot(self.snap_path, self.JENIS, sumber)
+        if snap is None:
+            users, baris = self._baca_csv()
+            nama = list(users)
+            try:
+                tulis_snapshot(self.snap_path, self.JENIS, sumber,
+                               [nama, [v['password'] for v in users.values()], [v['role'] for v in users.values()],
+                                sorted(range(len(nama)), key=nama.__getitem__)], baris - len(users))
+            except OSError:
+                pass
+            else:
+                snap = buka_snapshot(self.snap_path, self.JENIS, sumber)
+            if snap is None:
+                self.users, self._mati, self._tanda = users, baris - len(users), tanda
+                return users
+        kolom, self._mati = snap
+        self.users = TabelPengguna(*kolom)
+        self._tanda = tanda
+        return self.users
+
+
+KelasRepoPengguna = RepoPenggunaSnapshot if MODE_SNAPSHOT else RepoPengguna
+repo_pengguna = KelasRepoPengguna(PENGGUNA_FILE)
+
+def repo_pengguna_untuk(path):
+    if path == repo_pengguna.path:
+        return repo_pengguna
+    return KelasRepoPengguna(path)
+
+def read_all_users(path=PENGGUNA_FILE):
+    if BACKEND == 'sqlite':
+        return db().baca_pengguna()
+    return repo_pengguna_untuk(path).segarkan().copy()
 
 def append_user(username, password, role, path=PENGGUNA_FILE):
-    ensure_user_file(path)
-    with open(path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([username, password, role])
+    if BACKEND == 'sqlite':
+        db().tambah_pengguna(username, password, role)
+        return
+    repo_pengguna_untuk(path).tambah(username, password, role)
 
+@terukur('pengguna.tulis_ulang')
 def write_all_users(users, path=PENGGUNA_FILE):
+    if BACKEND == 'sqlite':
+        db().tulis_pengguna(users)
+        return
     ensure_user_file(path)
-    with open(path, 'w', newline='', encoding='utf-8') as f:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['username','password','role'])
         for usn, meta in users.items():
             writer.writerow([usn, meta.get('password',''), meta.get('role','user')])
+        hitung_tulis(f, 0, len(users))
+    os.replace(tmp, path)
 
-def delete_user_account(username, path=PENGGUNA_FILE):
-    users = read_all_users(path)
-    if username not in users:
+def hapus_pengguna(username, oleh=None, konfirmasi_admin=False, path=PENGGUNA_FILE):
+    """Hapus user tanpa prompt; akun admin butuh konfirmasi_admin=True."""
+    user = cari_pengguna(username, path)
+    if user is None:
         return False, "User tidak ditemukan."
-    if username == pengguna_sekarang:
+    if username == oleh:
         return False, "Tidak boleh menghapus account yang sedang login."
-    role = users[username].get('role','user')
-    if role == 'admin':
-        confirm = input(f"'{username}' berperan ADMIN. Ketik 'DELETE-ADMIN' untuk konfirmasi penghapusan: ").strip()
-        if confirm != 'DELETE-ADMIN':
-            return False, "Konfirmasi penghapusan admin dibatalkan."
-    del users[username]
-    write_all_users(users, path)
+    role = user.get('role','user')
+    if role == 'admin' and not konfirmasi_admin:
+        return False, "Konfirmasi penghapusan admin dibatalkan."
+    if BACKEND == 'sqlite':
+        db().hapus_pengguna(username)
+    else:
+        repo_pengguna_untuk(path).hapus(username)
     return True, f"User '{username}' berhasil dihapus."
 
+def delete_user_account(username, path=PENGGUNA_FILE):
+    user = cari_pengguna(username, path)
+    konfirmasi = False
+    if user is not None and username != pengguna_sekarang and user.get('role','user') == 'admin':
+        confirm = input(f"'{username}' berperan ADMIN. Ketik 'DELETE-ADMIN' untuk konfirmasi penghapusan: ").strip()
+        konfirmasi = confirm == 'DELETE-ADMIN'
+    return hapus_pengguna(username, pengguna_sekarang, konfirmasi, path)
+
 
 
 pengguna_sekarang = None
 peran_sekarang = None
 
+class Sesi:
+    """Sesi login eksplisit, pengganti global pengguna_sekarang/peran_sekarang."""
+
+    def __init__(self, username, peran='user'):
+        self.username = username
+        self.peran = peran
+
+    @property
+    def admin(self):
+        return self.peran == 'admin'
+
+    def __repr__(self):
+        return f"Sesi({self.username!r}, {self.peran!r})"
+
+
+# SISTA_UI_CEPAT=1: bersihkan layar dengan escape ANSI alih-alih menjalankan
+# cls/clear lewat shell, yang lambat di terminal lapangan berdaya rendah.
+MODE_UI_CEPAT = os.environ.get('SISTA_UI_CEPAT', '') == '1'
+ANSI_BERSIH = '\x1b[H\x1b[2J\x1b[3J'
+_ansi_siap = False
+
+def _siapkan_ansi():
+    global _ansi_siap
+    if not _ansi_siap and os.name == 'nt':
+        os.system('')  # sekali saja: aktifkan pemrosesan VT di konsol Windows
+    _ansi_siap = True
+
+@terukur('layar.bersihkan')
 def clear_screen():
-    if os.name == 'nt':
+    if MODE_UI_CEPAT:
+        _siapkan_ansi()
+        sys.stdout.write(ANSI_BERSIH)
+        sys.stdout.flush()
+    elif os.name == 'nt':
         os.system('cls')
     else:
         os.system('clear')
 
+# Bingkai menu dirender sekali per kunci lalu diambil dari cache.
+_bingkai = {}
+
+@terukur('layar.bingkai')
+def tampilkan_bingkai(kunci, buat):
+    """Bersihkan layar lalu tulis bingkai menu dalam satu write."""
+    teks = _bingkai.get(kunci)
+    if teks is None:
+        teks = _bingkai[kunci] = buat()
+    if MODE_UI_CEPAT:
+        _siapkan_ansi()
+        sys.stdout.write(ANSI_BERSIH + teks)
+    else:
+        clear_screen()
+        sys.stdout.write(teks)
+    sys.stdout.flush()
+
 
 def ensure_csv(path, headers):
     """Buat file CSV dengan header bila belum ada atau kosong."""
     if not os.path.exists(path) or os.path.getsize(path) == 0:
+        pastikan_folder(path)
         with open(path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(headers)
+
+
+PRODUK_HEADER = ['id', 'nama_produk', 'harga', 'stok']
+
+def baris_ke_produk(r):
+    """Ubah satu baris DictReader produk.csv menjadi dict produk."""
+    try:
+        harga = int((r.get('harga') or r.get('price') or 0))
+    except Exception:
+        harga = 0
+    try:
+        stok = int((r.get('stok') or r.get('stock') or 0))
+    except Exception:
+        stok = 0
+    return {
+        'id': (r.get('id') or '').strip(),
+        'nama': (r.get('nama_produk') or r.get('nama') or r.get('name') or '').strip(),
+        'harga': harga,
+        'stok': stok,
+    }
+
+def tulis_produk(prods, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=PRODUK_HEADER)
+        writer.writeheader()
+        for p in prods:
+            writer.writerow({
+                'id': p.get('id', ''),
+                'nama_produk': p.get('nama', ''),
+                'harga': p.get('harga', 0),
+                'stok': p.get('stok', 0),
+            })
+
+
+# Mode jurnal: perubahan produk ditambahkan ke produk.csv.jurnal sebagai
+# catatan kecil, lalu dipadatkan kembali ke produk.csv secara berkala.
+MODE_JURNAL = os.environ.get('SISTA_JURNAL', '') == '1'
+BATAS_KOMPAKSI = 1000
+
+@terukur('produk.tulis_ulang')
+def tulis_atomik_produk(prods, path):
+    """Tulis produk ke file sementara lalu ganti path secara atomik."""
+    tmp = path + '.tmp'
+    tulis_produk(prods, tmp)
+    hitung(os.path.getsize(tmp), len(prods))
+    os.replace(tmp, path)
+
+
+def _trigram(teks):
+    teks = f"  {teks} "
+    return {teks[i:i + 3] for i in range(len(teks) - 2)}
+
+
+class IndeksCari:
+    """Indeks pencarian nama produk: array terurut untuk prefix, trigram untuk salah ketik.
+
+    Nama lengkap dan setiap katanya disimpan sebagai (teks, kode) di list
+    terurut sehingga prefix dicari dengan bisect. Trigram dipasang pada kosakata
+    (kata unik), bukan pada produk, jadi pencocokan kabur hanya membandingkan
+    kata lalu mengambil produknya dari array terurut.
+    """
+
+    def __init__(self, produk=()):
+        self.produk = {}
+        self.kata = {}
+        self.trigram = {}
+        self.urut = []
+        for p in produk:
+            self.tambah(p, urutkan=False)
+        self.urut.sort()
+
+    @staticmethod
+    def _kunci(nama):
+        nama = nama.casefold()
+        return {nama, *nama.split()}
+
+    def tambah(self, produk, nama=None, urutkan=True):
+        nama = produk['nama'] if nama is None else nama
+        if not nama:
+            return
+        kode = id(produk)
+        self.produk[kode] = produk
+        for teks in self._kunci(nama):
+            if urutkan:
+                bisect.insort(self.urut, (teks, kode))
+            else:
+                self.urut.append((teks, kode))
+        for kata in set(nama.casefold().split()):
+            n = self.kata.get(kata, 0)
+            self.kata[kata] = n + 1
+            if n == 0:
+                for g in _trigram(kata):
+                    self.trigram.setdefault(g, set()).add(kata)
+
+    def hapus(self, produk, nama=None):
+        nama = produk['nama'] if nama is None else nama
+        kode = id(produk)
+        if self.produk.pop(kode, None) is None or not nama:
+            return
+        for teks in self._kunci(nama):
+            i = bisect.bisect_left(self.urut, (teks, kode))
+            if i < len(self.urut) and self.urut[i] == (teks, kode):
+                del self.urut[i]
+        for kata in set(nama.casefold().split()):
+            n = self.kata.get(kata, 0) - 1
+            if n > 0:
+                self.kata[kata] = n
+                continue
+            self.kata.pop(kata, None)
+            for g in _trigram(kata):
+                kumpulan = self.trigram.get(g)
+                if kumpulan is not None:
+                    kumpulan.discard(kata)
+                    if not kumpulan:
+                        del self.trigram[g]
+
+    def _dengan_awalan(self, teks, persis=False):
+        """Kode produk yang nama/katanya diawali teks (atau sama persis)."""
+        i = bisect.bisect_left(self.urut, (teks,))
+        while i < len(self.urut):
+            kunci, kode = self.urut[i]
+            if kunci != teks if persis else not kunci.startswith(teks):
+                return
+            yield kode
+            i += 1
+
+    def _kata_mirip(self, token, ambang):
+        """{kata kosakata: skor Dice} untuk kata yang mirip token."""
+        gram = _trigram(token)
+        sama = {}
+        for g in gram:
+            for kata in self.trigram.get(g, ()):
+                sama[kata] = sama.get(kata, 0) + 1
+        hasil = {}
+        for kata, n in sama.items():
+            nilai = 2 * n / (len(gram) + len(kata) + 1)
+            if nilai >= ambang:
+                hasil[kata] = nilai
+        return hasil
+
+    def cari(self, teks, k=5, ambang=0.4):
+        """Top-k produk: kecocokan prefix dulu (urut nama), lalu kemiripan kata."""
+        teks = (teks or '').strip().casefold()
+        if not teks:
+            return []
+        hasil = []
+        terlihat = set()
+        for kode in self._dengan_awalan(teks):
+            if kode not in terlihat:
+                terlihat.add(kode)
+                hasil.append(self.produk[kode])
+                if len(hasil) >= k:
+                    return hasil
+        mirip = [self._kata_mirip(t, ambang) for t in teks.split()]
+        mirip = [m for m in mirip if m]
+        if not mirip:
+            return hasil
+        if len(mirip) == 1:
+            # Satu kata: semua produk dengan kata yang sama bernilai sama.
+            for kata, _ in sorted(mirip[0].items(), key=lambda x: -x[1]):
+                for kode in self._dengan_awalan(kata, persis=True):
+                    if kode not in terlihat:
+                        terlihat.add(kode)
+                        hasil.append(self.produk[kode])
+                        if len(hasil) >= k:
+                            return hasil
+            return hasil
+        # Telusuri produk dari token dengan kandidat paling sedikit, lalu nilai
+        # token lain lewat kata-kata nama produk itu.
+        mirip.sort(key=lambda m: sum(self.kata[w] for w in m))
+        skor = {}
+        for kata, nilai in mirip[0].items():
+            for kode in self._dengan_awalan(kata, persis=True):
+                if kode in terlihat or kode in skor:
+                    continue
+                kata_produk = set(self.produk[kode]['nama'].casefold().split())
+                if kata not in kata_produk:
+                    continue
+                skor[kode] = nilai + sum(max((m.get(w, 0) for w in kata_produk), default=0) for m in mirip[1:])
+        for _, kode in heapq.nlargest(k - len(hasil), ((v, kode) for kode, v in skor.items())):
+            hasil.append(self.produk[kode])
+        return hasil
+
+
+def buang_ekor_terpotong(path):
+    """Potong catatan terakhir yang tidak diakhiri newline (sisa crash) dari file jurnal.
+
+    Hanya boleh dipanggil di dalam kunci_data(): tanpa kunci, ekor itu bisa
+    jadi catatan yang sedang ditulis proses lain. Mengembalikan jumlah byte
+    yang dibuang.
+    """
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return 0
+    with f:
+        ukuran = f.seek(0, os.SEEK_END)
+        if ukuran == 0:
+            return 0
+        f.seek(ukuran - 1)
+        if f.read(1) == b'\n':
+            return 0
+        f.seek(0)
+        utuh = f.read().rfind(b'\n') + 1
+        f.truncate(utuh)
+        return ukuran - utuh
+
+
+class KatalogProduk:
+    """Katalog produk di memori dengan indeks id dan nama.
+
+    File hanya di-parse ulang bila mtime atau ukurannya berubah, sehingga
+    pencarian produk cukup lewat dict, bukan parse + scan setiap kali.
+    Dalam mode jurnal, perubahan disimpan sebagai catatan di file jurnal
+    dan diputar ulang saat memuat.
+    """
+
+    def __init__(self, path, jurnal=None):
+        self.path = path
+        self.jurnal = MODE_JURNAL if jurnal is None else jurnal
+        self.jurnal_path = path + '.jurnal'
+        self.produk = []
+        self.by_id = {}
+        self.by_nama = {}
+        self._indeks_cari = None
+        self._tanda = None
+        self._n_jurnal = 0
+
+    def _tanda_file(self):
+        tanda = []
+        for p in (self.path, self.jurnal_path):
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                tanda.append(None)
+                continue
+            tanda.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(tanda)
+
+    def _bangun_indeks(self):
+        self.by_id = {}
+        self.by_nama = {}
+        # Indeks pencarian dibangun ulang saat pertama kali dipakai.
+        self._indeks_cari = None
+        for p in self.produk:
+            if p['id']:
+                self.by_id.setdefault(p['id'], p)
+            if p['nama']:
+                self.by_nama.setdefault(p['nama'].casefold(), p)
+
+    @terukur('produk.baca')
+    def segarkan(self):
+        """Muat ulang produk.csv (dan jurnalnya) bila berubah sejak terakhir dibaca."""
+        ensure_csv(self.path, PRODUK_HEADER)
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
+            return self.produk
+        with open(self.path, newline='', encoding='utf-8') as f:
+            self.produk = [baris_ke_produk(r) for r in csv.DictReader(f)]
+        self._bangun_indeks()
+        self._putar_jurnal()
+        self._tanda = self._tanda_file()
+        hitung(sum(t[2] for t in self._tanda if t), len(self.produk))
+        return self.produk
+
+    def _putar_jurnal(self):
+        """Terapkan catatan jurnal ke snapshot (pemulihan setelah crash).
+
+        Catatan berisi nilai akhir, bukan selisih, jadi memutar ulang catatan
+        yang sudah dipadatkan tetap aman. Baris terakhir tanpa newline
+        diabaikan; file tidak diubah di sini karena pembaca tidak memegang
+        kunci, ekor itu dibuang penulis berikutnya (_tulis_jurnal).
+        """
+        self._n_jurnal = 0
+        if not os.path.exists(self.jurnal_path):
+            return
+        with open(self.jurnal_path, 'rb') as f:
+            data = f.read()
+        utuh = data.rfind(b'\n') + 1
+        for r in csv.reader(data[:utuh].decode('utf-8').splitlines()):
+            if len(r) < 2:
+                continue
+            op, pid = r[0], r[1]
+            lama = self.by_id.get(pid)
+            if op == 'D':
+                if lama is not None:
+                    self.produk.remove(lama)
+                    del self.by_id[pid]
+            elif op == 'U' and len(r) >= 5:
+                baru = baris_ke_produk({'id': pid, 'nama_produk': r[2], 'harga': r[3], 'stok': r[4]})
+                if lama is None:
+                    self.produk.append(baru)
+                    self.by_id[pid] = baru
+                else:
+                    lama.update(baru)
+            self._n_jurnal += 1
+        self._bangun_indeks()
+
+    @terukur('produk.jurnal')
+    def _tulis_jurnal(self, rows):
+        with kunci_data():
+            buang_ekor_terpotong(self.jurnal_path)
+            with open(self.jurnal_path, 'a', newline='', encoding='utf-8') as f:
+                awal = f.tell()
+                writer = csv.writer(f)
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+                hitung_tulis(f, awal, len(rows))
+            self._n_jurnal += len(rows)
+            if self._n_jurnal >= BATAS_KOMPAKSI:
+                self.kompaksi()
+            else:
+                self._tanda = self._tanda_file()
+
+    def cari(self, key):
+        """Cari produk berdasarkan id atau nama (tidak peka huruf besar/kecil)."""
+        self.segarkan()
+        key = (key or '').strip()
+        return self.by_id.get(key) or self.by_nama.get(key.casefold())
+
+    def cari_mirip(self, teks, k=5):
+        """Saran produk untuk teks yang diketik: prefix nama lalu kecocokan kabur."""
+        self.segarkan()
+        if self._indeks_cari is None:
+            self._indeks_cari = IndeksCari(self.produk)
+        return self._indeks_cari.cari(teks, k)
+
+    def ganti_nama(self, produk, nama_lama):
+        """Perbarui indeks nama setelah produk['nama'] diubah dari nama_lama."""
+        if nama_lama.casefold() == produk['nama'].casefold():
+            return
+        if self.by_nama.get(nama_lama.casefold()) is produk:
+            del self.by_nama[nama_lama.casefold()]
+        self.by_nama.setdefault(produk['nama'].casefold(), produk)
+        if self._indeks_cari is not None:
+            self._indeks_cari.hapus(produk, nama_lama)
+            self._indeks_cari.tambah(produk)
+
+    def simpan(self):
+        """Tulis seluruh katalog ke produk.csv (file sementara + rename)."""
+        tulis_atomik_produk(self.produk, self.path)
+        self._tanda = self._tanda_file()
+
+    def kompaksi(self):
+        """Padatkan jurnal ke produk.csv lalu kosongkan jurnal."""
+        tulis_atomik_produk(self.produk, self.path)
+        if os.path.exists(self.jurnal_path):
+            os.remove(self.jurnal_path)
+        self._n_jurnal = 0
+        self._tanda = self._tanda_file()
+
+    def ganti_semua(self, prods):
+        """Ganti seluruh isi katalog dengan prods dan padatkan ke disk.
+
+        Bila penulisan gagal, isi katalog di memori dikembalikan.
+        """
+        lama = self.produk
+        self.produk = prods
+        try:
+            self.kompaksi()
+        except BaseException:
+            self.produk = lama
+            self._tanda = None
+            raise
+        finally:
+            self._bangun_indeks()
+
+    def catat(self, produk, nama_lama=None):
+        """Simpan perubahan harga/stok/nama satu produk yang sudah ada di katalog."""
+        if nama_lama is not None:
+            self.ganti_nama(produk, nama_lama)
+        self.catat_banyak([produk])
+
+    def catat_banyak(self, prods):
+        """Simpan perubahan beberapa produk sekaligus dalam satu penulisan."""
+        if self.jurnal and all(p['id'] for p in prods):
+            self._tulis_jurnal([['U', p['id'], p['nama'], p['harga'], p['stok']] for p in prods])
+        else:
+            self.simpan()
+
+    @terukur('produk.tambah')
+    def tambah(self, produk, tulis=True):
+        """Tambahkan produk baru ke katalog (dan ke disk bila tulis=True)."""
+        self.produk.append(produk)
+        if produk['id']:
+            self.by_id.setdefault(produk['id'], produk)
+        if produk['nama']:
+            self.by_nama.setdefault(produk['nama'].casefold(), produk)
+        if self._indeks_cari is not None:
+            self._indeks_cari.tambah(produk)
+        if not tulis:
+            return
+        if self.jurnal and produk['id']:
+            self._tulis_jurnal([['U', produk['id'], produk['nama'], produk['harga'], produk['stok']]])
+            return
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            awal = f.tell()
+            csv.writer(f).writerow([produk['id'], produk['nama'], produk['harga'], produk['stok']])
+            hitung_tulis(f, awal, 1)
+        self._tanda = self._tanda_file()
+
+    def hapus(self, produk):
+        self.produk.remove(produk)
+        if self.by_id.get(produk['id']) is produk:
+            del self.by_id[produk['id']]
+        if self.by_nama.get(produk['nama'].casefold()) is produk:
+            del self.by_nama[produk['nama'].casefold()]
+        if self._indeks_cari is not None:
+            self._indeks_cari.hapus(produk)
+        if self.jurnal and produk['id']:
+            self._tulis_jurnal([['D', produk['id']]])
+        else:
+            self.simpan()
+
+
+KUNCI_PRODUK = ('id', 'nama', 'harga', 'stok')
+
+
+class BarisProduk(MutableMapping):
+    """Satu produk di KolomProduk; berperilaku seperti dict produk biasa."""
+    __slots__ = ('_kolom', '_i')
+
+    def __init__(self, kolom, i):
+        self._kolom = kolom
+        self._i = i
+
+    def __getitem__(self, kunci):
+        k = self._kolom
+        if kunci == 'harga':
+            return k.harga[self._i]
+        if kunci == 'stok':
+            return k.stok[self._i]
+        if kunci in ('id', 'nama'):
+            ubah = k.ubah.get(self._i)
+            if ubah and kunci in ubah:
+                return ubah[kunci]
+            return k.id[self._i] if kunci == 'id' else k.nama[self._i]
+        raise KeyError(kunci)
+
+    def __setitem__(self, kunci, nilai):
+        k = self._kolom
+        if kunci == 'harga':
+            k.harga[self._i] = nilai
+        elif kunci == 'stok':
+            k.stok[self._i] = nilai
+        elif kunci in ('id', 'nama'):
+            if self[kunci] != nilai:
+                k.ubah.setdefault(self._i, {})[kunci] = nilai
+        else:
+            raise KeyError(kunci)
+
+    def __delitem__(self, kunci):
+        raise TypeError("Kolom produk tidak bisa dihapus.")
+
+    def __iter__(self):
+        return iter(KUNCI_PRODUK)
+
+    def __len__(self):
+        return len(KUNCI_PRODUK)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class KolomProduk:
+    """Pengganti list produk di atas kolom snapshot.
+
+    Objek BarisProduk dibuat saat baris pertama kali diakses lalu disimpan,
+    sehingga identitas produk (dipakai indeks dan `is`) tetap. Produk yang
+    ditambah setelah dimuat disimpan sebagai dict biasa di `tambahan`.
+    """
+
+    def __init__(self, ids, nama, harga, stok):
+        self.id = ids
+        self.nama = nama
+        self.harga = harga
+        self.stok = stok
+        self.ubah = {}       # indeks -> {'id'/'nama': nilai baru}
+        self.terhapus = set()
+        self.tambahan = []
+        self._baris = [None] * len(harga)
+        self._hidup = None
+
+    def baris(self, i):
+        b = self._baris[i]
+        if b is None:
+            b = self._baris[i] = BarisProduk(self, i)
+        return b
+
+    def __len__(self):
+        return len(self._baris) - len(self.terhapus) + len(self.tambahan)
+
+    def __iter__(self):
+        terhapus, semua = self.terhapus, self._baris
+        for i, b in enumerate(semua):
+            if b is None:
+                b = semua[i] = BarisProduk(self, i)
+            if i not in terhapus:
+                yield b
+        yield from self.tambahan
+
+    def __getitem__(self, posisi):
+        if isinstance(posisi, slice):
+            return [self[j] for j in range(*posisi.indices(len(self)))]
+        if posisi < 0:
+            posisi += len(self)
+        if not self.terhapus:
+            hidup = range(len(self._baris))
+        else:
+            if self._hidup is None:
+                self._hidup = array('q', (i for i in range(len(self._baris)) if i not in self.terhapus))
+            hidup = self._hidup
+        if 0 <= posisi < len(hidup):
+            return self.baris(hidup[posisi])
+        return self.tambahan[posisi - len(hidup)]
+
+    def append(self, produk):
+        self.tambahan.append(produk)
+
+    def remove(self, produk):
+        if isinstance(produk, BarisProduk) and produk._kolom is self:
+            if produk._i in self.terhapus:
+                raise ValueError("produk tidak ada di katalog")
+            self.terhapus.add(produk._i)
+            self._hidup = None
+        else:
+            self.tambahan.remove(produk)
+
+
+class IndeksSnapshot:
+    """Pengganti dict by_id/by_nama: bisect pada urutan tersimpan di snapshot + overlay.
+
+    Entri dasar dilewati bila barisnya dihapus atau kuncinya sudah berubah;
+    entri baru (produk tambahan, nama baru) masuk ke overlay dict.
+    """
+
+    def __init__(self, kolom, dasar, urut, kunci):
+        self._kolom = kolom
+        self._dasar = dasar   # KolomTeks nilai saat snapshot dibuat
+        self._urut = urut
+        self._kunci = kunci   # 'id' atau 'nama' (nama dicocokkan casefold)
+        self._tambah = {}
+        self._lepas = set()
+
+    def _kunci_dasar(self, i):
+        teks = self._dasar[i]
+        return teks.casefold() if self._kunci == 'nama' else teks
+
+    def _ada_di_dasar(self, kunci):
+        """True bila snapshot punya baris dengan kunci ini, hidup atau tidak."""
+        urut = self._urut
+        j = bisect.bisect_left(_KunciUrut(urut, self._kunci_dasar), kunci)
+        return j < len(urut) and self._kunci_dasar(urut[j]) == kunci
+
+    def _cari_dasar(self, kunci):
+        urut = self._urut
+        j = bisect.bisect_left(_KunciUrut(urut, self._kunci_dasar), kunci)
+        while j < len(urut):
+            i = urut[j]
+            if self._kunci_dasar(i) != kunci:
+                return None
+            if i not in self._lepas and i not in self._kolom.terhapus:
+                b = self._kolom.baris(i)
+                sekarang = b[self._kunci]
+                if (sekarang.casefold() if self._kunci == 'nama' else sekarang) == kunci:
+                    return b
+            j += 1
+        return None
+
+    def get(self, kunci, default=None):
+        if not kunci:
+            return self._tambah.get(kunci, default)
+        b = self._cari_dasar(kunci)
+        if b is not None:
+            return b
+        return self._tambah.get(kunci, default)
+
+    def __getitem__(self, kunci):
+        b = self.get(kunci)
+        if b is None:
+            raise KeyError(kunci)
+        return b
+
+    def __contains__(self, kunci):
+        return self.get(kunci) is not None
+
+    def __setitem__(self, kunci, produk):
+        b = self._cari_dasar(kunci) if kunci else None
+        if b is not None:
+            self._lepas.add(b._i)
+        self._tambah[kunci] = produk
+
+    def setdefault(self, kunci, produk):
+        b = self.get(kunci)
+        if b is None:
+            self._tambah[kunci] = b = produk
+        return b
+
+    def __delitem__(self, kunci):
+        if kunci in self._tambah:
+            del self._tambah[kunci]
+            return
+        b = self._cari_dasar(kunci) if kunci else None
+        if b is not None:
+            self._lepas.add(b._i)
+        elif not kunci or not self._ada_di_dasar(kunci):
+            raise KeyError(kunci)
+        # Selain itu barisnya sudah dihapus dari kolom (mis. catatan D jurnal
+        # yang menghapus produk lebih dulu): entri dasar sudah tidak terlihat.
+
+
+class KatalogSnapshot(KatalogProduk):
+    """KatalogProduk yang memuat dari snapshot biner produk.csv.snap (SISTA_SNAPSHOT=1).
+
+    Bila snapshot tidak ada atau basi, produk.csv di-parse sekali seperti
+    biasa lalu snapshotnya ditulis ulang. Jurnal tetap diputar di atasnya.
+    """
+
+    JENIS = 'ssqqqq'  # id, nama, harga, stok, urutan id, urutan nama
+
+    def __init__(self, path, jurnal=None):
+        super().__init__(path, jurnal)
+        self.snap_path = path + '.snap'
+
+    def _bangun_indeks(self):
+        if not isinstance(self.produk, KolomProduk):
+            super()._bangun_indeks()
+            return
+        k = self.produk
+        self.by_id = IndeksSnapshot(k, k.id, self._urut_id, 'id')
+        self.by_nama = IndeksSnapshot(k, k.nama, self._urut_nama, 'nama')
+        self._indeks_cari = None
+        for i in sorted(k.ubah):
+            if i not in k.terhapus:
+                p = k.baris(i)
+                self.by_id.setdefault(p['id'], p)
+                self.by_nama.setdefault(p['nama'].casefold(), p)
+        for p in k.tambahan:
+            if p['id']:
+                self.by_id.setdefault(p['id'], p)
+            if p['nama']:
+                self.by_nama.setdefault(p['nama'].casefold(), p)
+
+    def _muat_snapshot(self, sumber):
+        snap = buka_snapshot(self.snap_path, self.JENIS, sumber)
+        if snap is None:
+            with open(self.path, newline='', encoding='utf-8') as f:
+                prods = [baris_ke_produk(r) for r in csv.DictReader(f)]
+            ids = [p['id'] for p in prods]
+            nama = [p['nama'] for p in prods]
+            lipat = [n.casefold() for n in nama]
+            try:
+                tulis_snapshot(self.snap_path, self.JENIS, sumber,
+                               [ids, nama, [p['harga'] for p in prods], [p['stok'] for p in prods],
+                                sorted(range(len(ids)), key=ids.__getitem__),
+                                sorted(range(len(lipat)), key=lipat.__getitem__)])
+            except OSError:
+                return prods
+            snap = buka_snapshot(self.snap_path, self.JENIS, sumber)
+            if snap is None:
+                return prods
+        (ids, nama, harga, stok, self._urut_id, self._urut_nama), _ = snap
+        return KolomProduk(ids, nama, harga, stok)
+
+    @terukur('produk.baca')
+    def segarkan(self):
+        ensure_csv(self.path, PRODUK_HEADER)
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
+            return self.produk
+        self.produk = self._muat_snapshot((tanda[0][2], tanda[0][1]))
+        self._bangun_indeks()
+        self._putar_jurnal()
+        self._tanda = self._tanda_file()
+        return self.produk
+
+
+KelasKatalog = KatalogSnapshot if MODE_SNAPSHOT else KatalogProduk
+katalog = KelasKatalog(produk_path)
+
+def katalog_untuk(path):
+    """Katalog bersama untuk produk_path, atau katalog baru untuk path lain."""
+    if path in (katalog.path, produk_path):
+        return katalog
+    return KelasKatalog(path)
+
 title = r"""
 ███████╗██╗███████╗████████╗ █████╗ 
 ██╔════╝██║██╔════╝╚══██╔══╝██╔══██╗
@@ -98,35 +1405,36 @@ title = r"""
                   
 Sistem Rekomendasi Irigasi & Stock Agroindustri
 """
-def halaman_utama():
+def bingkai_utama():
     WIDTH = 66
-    def hr_top():
-        print("╔" + "═" * WIDTH + "╗")
-    def hr_bottom():
-        print("╚" + "═" * WIDTH + "╝")
-    def empty_line():
-        print("║" + " " * WIDTH + "║")
+    def baris(teks=""):
+        return "║" + teks.center(WIDTH) + "║"
 
+    menu = ["1. Daftarkan Akun", "2. Login", "3. Keluar Program"]
+    return '\n'.join([
+        title,
+        "╔" + "═" * WIDTH + "╗",
+        baris(),
+        baris(),
+        baris("SISTEM IRIGASI & STOCK AGROINDUSTRI"),
+        baris(),
+        baris("Selamat datang, petani dan pegiat pertanian digital"),
+        baris("Kelola akun, produk, transaksi, dan rekomendasi irigasi"),
+        baris(),
+        baris("PILIH MENU"),
+        baris(),
+        *(baris(item) for item in menu),
+        baris(),
+        "╚" + "═" * WIDTH + "╝",
+    ]) + '\n'
+
+def halaman_utama():
     while True:
-        clear_screen()
-        print(title)
-        hr_top()
-        empty_line()
-        print("║" + "".center(WIDTH) + "║")
-        print("║" + "SISTEM IRIGASI & STOCK AGROINDUSTRI".center(WIDTH) + "║")
-        empty_line()
-        print("║" + "Selamat datang, petani dan pegiat pertanian digital".center(WIDTH) + "║")
-        print("║" + "Kelola akun, produk, transaksi, dan rekomendasi irigasi".center(WIDTH) + "║")
-        empty_line()
-        print("║" + "PILIH MENU".center(WIDTH) + "║")
-        empty_line()
-        menu = ["1. Daftarkan Akun", "2. Login", "3. Keluar Program"]
-        for item in menu:
-            print("║" + item.center(WIDTH) + "║")
-        empty_line()
-        hr_bottom()
+        catat_menu('utama', None)
+        tampilkan_bingkai('utama', bingkai_utama)
 
         command = input("Pilih menu (1/2/3): ").strip()
+        catat_menu('utama', command)
         if command == '1':
             daftarkan_akun()
         elif command == '2':
@@ -137,68 +1445,36 @@ def halaman_utama():
                     user_menu()
         elif command == '3':
             print("Keluar dari Program")
+            catat_menu('utama', None)
             break
         else:
             print("Masukkan pilihan yang valid (1-3).")
             input("Tekan Enter untuk melanjutkan...")
 
 def load_products(path=produk_path):
-   
-    ensure_csv(path, ['id','nama_produk','harga','stok', ])
+    """Muat katalog tanpa mencetak; tampilkan_produk() untuk daftar berhalaman."""
+    return katalog_untuk(path).segarkan()
 
-    products = []
-    if not os.path.exists(path):
-        print("File produk.csv tidak ditemukan:", path)
-        return products
-
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-           
-            pid = (r.get('id') or '').strip()
-            nama = (r.get('nama_produk') or r.get('nama') or '').strip()
-         
-            try:
-                harga = int((r.get('harga') or r.get('price') or 0))
-            except Exception:
-                harga = 0
-            try:
-                stok = int((r.get('stok') or r.get('stock') or 0))
-            except Exception:
-                stok = 0
-
-            prod = {
-                'id': pid,
-                'nama': nama,
-                'harga': harga,
-                'stok': stok,
-            }
-            products.append(prod)
-
-
-    if not products:
-        print("Belum ada produk terdaftar di produk.csv.")
-    else:
-        print("Daftar Produk:")
-        for p in products:
-            line = f"- ID:{p['id']}  {p['nama']}  (Rp{p['harga']:,})  Stok:{p['stok']}"
-            print(line)
-
-    return products
 
 
+def bingkai_user():
+    return '\n'.join([
+        f"{'='*6} User Menu - {pengguna_sekarang} {'='*6}",
+        "1. Lihat Produk",
+        "2. Transaksi",
+        "3. Riwayat Transaksi",
+        "4. Keranjang Belanja",
+        "5. Logout",
+    ]) + '\n'
 
 def user_menu():
     while True:
-        clear_screen()
-        print('='*6, f"User Menu - {pengguna_sekarang}", '='*6)
-        print("1. Lihat Produk")
-        print("2. Transaksi")
-        print("3. Riwayat Transaksi")
-        print("4. Logout")
+        catat_menu('user', None)
+        tampilkan_bingkai(('user', pengguna_sekarang), bingkai_user)
         cmd = input("Pilih: ").strip()
+        catat_menu('user', cmd)
         if cmd == '1':
-            load_products()
+            tampilkan_produk()
             input("Tekan Enter untuk kembali...")
         elif cmd == '2':
             transaksi()
@@ -207,17 +1483,18 @@ def user_menu():
             riwayat_transaksi()
             input("Tekan Enter untuk kembali...")
         elif cmd == '4':
+            transaksi_keranjang()
+            input("Tekan Enter untuk kembali...")
+        elif cmd == '5':
             logout()
-            return 
+            catat_menu('user', None)
+            return
         else:
             print("Pilihan tidak valid.")
             input("Tekan Enter untuk mencoba lagi...")
 
-def admin_menu():
-    while True:
-        clear_screen()
-        print('='*10, "Menu Admin", '='*10)
-        print("""
+def bingkai_admin():
+    return f"{'='*10} Menu Admin {'='*10}\n" + """
                 1. Lihat Semua Pengguna
                 2. Hapus Pengguna Tertentu
                 3. Tambahkan Produk
@@ -227,13 +1504,18 @@ def admin_menu():
                 7. Penjadwalan Irigasi
                 8. Logout
                 9. Hapus Semua Data
-              """)
+                10. Impor / Ekspor Produk
+                11. Laporan Penjualan
+              """ + '\n'
+
+def admin_menu():
+    while True:
+        catat_menu('admin', None)
+        tampilkan_bingkai('admin', bingkai_admin)
         cmd = input("Pilih: ").strip()
+        catat_menu('admin', cmd)
         if cmd == '1':
-            users = read_all_users()
-            print("Daftar pengguna:")
-            for u, v in users.items():
-                print("-", u, "(", v.get('role','user'), ")")
+            tampilkan_pengguna()
             input("Tekan Enter untuk kembali...")
         elif cmd == '2':
             username = input("Masukkan username yang akan dihapus: ").strip()
@@ -244,7 +1526,7 @@ def admin_menu():
             tambahkan_produk()
             input("Tekan Enter untuk kembali...")
         elif cmd == '4':
-            load_products()
+            daftar_produk_admin()
             input("Tekan Enter untuk kembali...")
         elif cmd == '5':
             hapus_produk()
@@ -257,7 +1539,14 @@ def admin_menu():
             input("Tekan Enter untuk kembali...")
         elif cmd == '8':
             logout()
-            return  
+            catat_menu('admin', None)
+            return
+        elif cmd == '10':
+            impor_ekspor_produk()
+            input("Tekan Enter untuk kembali...")
+        elif cmd == '11':
+            tampilkan_laporan_penjualan()
+            input("Tekan Enter untuk kembali...")
         else:
             print("Pilihan tidak valid.")
             input("Tekan Enter untuk mencoba lagi...")
@@ -266,16 +1555,13 @@ def daftarkan_akun():
     print('='*10, "Masukkan", '='*10)
     ensure_user_file(PENGGUNA_FILE)
 
-  
-    existing = read_all_users()
-
 
     while True:
         username = input("Masukkan Username: ").strip()
         if not username:
             print("⚠️ Username tidak boleh kosong.")
             continue
-        if username in existing:
+        if cari_pengguna(username) is not None:
             print("⚠️ Username sudah terdaftar. Silakan pilih username lain.")
             continue
         break
@@ -290,27 +1576,55 @@ def daftarkan_akun():
 
     role = input("Masukkan Role (admin/user) [default:user]: ").strip() or 'user'
 
-    append_user(username, password, role, PENGGUNA_FILE)
-    print("Akun berhasil didaftarkan.")
+    berhasil, pesan = daftarkan_pengguna(username, password, role)
+    print(pesan)
+
+def daftarkan_pengguna(username, password, role='user', path=PENGGUNA_FILE):
+    """Daftarkan akun tanpa prompt. Mengembalikan (berhasil, pesan)."""
+    username = (username or '').strip()
+    if not username:
+        return False, "Username tidak boleh kosong."
+    if not password:
+        return False, "Password tidak boleh kosong."
+    if role not in ('admin', 'user'):
+        return False, "Role harus admin atau user."
+    hashed = hash_password(password)
+    with kunci_data():
+        if cari_pengguna(username, path) is not None:
+            return False, "Username sudah terdaftar."
+        append_user(username, hashed, role, path)
+    return True, "Akun berhasil didaftarkan."
+
+def cari_pengguna(username, path=PENGGUNA_FILE):
+    if BACKEND == 'sqlite':
+        return db().cari_pengguna(username)
+    return repo_pengguna_untuk(path).cari(username)
+
+def cek_login(username, password, path=PENGGUNA_FILE):
+    """Verifikasi kredensial. Mengembalikan (Sesi atau None, pesan)."""
+    user = cari_pengguna(username, path)
+    if user is None:
+        return None, "Username tidak ditemukan."
+    if not verifikasi_password(password, user['password']):
+        return None, "Password salah."
+    if not password_ter_hash(user['password']):
+        # Akun lama dengan password teks biasa: ganti dengan hash saat login berhasil.
+        append_user(username, hash_password(password), user.get('role', 'user'), path)
+    return Sesi(username, user.get('role', 'user')), "Berhasil login."
 
 def login():
     global pengguna_sekarang, peran_sekarang
     print('='*6, "Login", '='*6)
-    users = read_all_users()
     usernameget = input("Masukkan Username: ").strip()
     passwordget = input("Masukkan Password: ").strip()
-    user = users.get(usernameget)
-    if user is None:
-        print("Username tidak ditemukan.")
-        return False
-    if user['password'] == passwordget:
-        pengguna_sekarang = usernameget
-        peran_sekarang = user.get('role', 'user')
-        print(f"Berhasil login: {pengguna_sekarang} ({peran_sekarang})")
-        return True
-    else:
-        print("Password salah.")
+    sesi, pesan = cek_login(usernameget, passwordget)
+    if sesi is None:
+        print(pesan)
         return False
+    pengguna_sekarang = sesi.username
+    peran_sekarang = sesi.peran
+    print(f"Berhasil login: {pengguna_sekarang} ({peran_sekarang})")
+    return True
 
 def logout():
     global pengguna_sekarang, peran_sekarang
@@ -318,326 +1632,3542 @@ def logout():
     peran_sekarang = None
     print("Anda telah logout. Kembali ke menu utama.")
 
-def riwayat_transaksi():
-    ensure_csv(TRANSAKSI_FILE, ['waktu','username','id','nama','stok','harga','total' ])
-    print("Riwayat Transaksi:")
-    with open(TRANSAKSI_FILE, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        found = False
-        for row in reader:
-            if pengguna_sekarang and row.get('username') != pengguna_sekarang:
-                continue  
-            found = True
-            print(f"- Waktu: {row.get('waktu','')}  Produk: {row.get('nama','')} x{row.get('stok','')}  Harga: Rp{row.get('harga','')}  Total: Rp{row.get('total','')} ")
-        if not found:
-            print("Belum ada riwayat transaksi.")
-    
-def transaksi():
-    ensure_csv(produk_path, ['id','nama_produk','harga','stok', ])
-    if not os.path.exists(produk_path):
-        print("File produk.csv tidak ditemukan.")
-        return
+TRANSAKSI_HEADER = ['waktu', 'username', 'id', 'nama', 'stok', 'harga', 'total']
 
-    prods = []
-    with open(produk_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                stok = int(r.get('stok') or r.get('stock') or 0)
-            except ValueError:
-                stok = 0
-            try:
-                harga = int(r.get('harga') or r.get('price') or 0)
-            except ValueError:
-                harga = 0
-            prods.append({
-                'id': (r.get('id') or '').strip(),
-                'nama': (r.get('nama_produk') or r.get('name') or '').strip(),
-                'harga': harga,
-                'stok': stok,
-            })
+# Pemindaian paralel transaksi.csv (SISTA_PARALEL=jumlah proses). File dibagi
+# menjadi rentang byte yang selalu berawal di awal baris, tiap rentang
+# di-parse di proses terpisah, lalu hasilnya digabung sesuai urutan rentang
+# sehingga sama persis dengan pemindaian berurutan. File yang lebih kecil
+# dari BATAS_PARALEL tetap dipindai di proses ini (biaya proses lebih mahal).
+# Batas rentang memperhitungkan tanda kutip, jadi nama produk berisi baris
+# baru tidak terpotong di antara dua rentang.
+PEKERJA_PINDAI = int(os.environ.get('SISTA_PARALEL', '0') or 0)
+BATAS_PARALEL = 64 * 1024 * 1024
+UKURAN_RENTANG = 32 * 1024 * 1024
 
-    if not prods:
-        print("Tidak ada produk terdaftar di produk.csv.")
-        return
+def _maju_ke_baris(f, pos, akhir, kutip, blok):
+    """Maju dari pos ke setelah newline pertama di luar field berkutip.
 
-    load_products(produk_path)
+    kutip adalah jumlah tanda kutip sebelum pos. Mengembalikan (offset, jumlah
+    kutip sebelum offset itu); offset = akhir bila tidak ada batas lagi.
+    """
+    while pos < akhir:
+        data = f.read(min(blok, akhir - pos))
+        if not data:
+            break
+        i = 0
+        while True:
+            j = data.find(b'\n', i)
+            if j < 0:
+                break
+            kutip += data.count(b'"', i, j)
+            i = j + 1
+            if kutip % 2 == 0:
+                f.seek(pos + i)
+                return pos + i, kutip
+        kutip += data.count(b'"', i)
+        pos += len(data)
+    return akhir, kutip
 
-    nama = input("Masukkan nama produk (atau id): ").strip()
-    produk = None
-    for p in prods:
-        if (p['id'] and p['id'] == nama) or (p['nama'] and p['nama'].lower() == nama.lower()):
-            produk = p
+def _rentang_baris(path, awal, akhir, ukuran, blok=1 << 16):
+    """Bagi [awal, akhir) menjadi rentang berukuran ~ukuran yang berawal di awal baris CSV.
+
+    `awal` harus awal baris. Tanda kutip dihitung sejak `awal`: newline yang
+    didahului kutip berjumlah ganjil ada di dalam field berkutip, jadi bukan
+    batas. Karena itu [awal, akhir) dibaca sekali di sini, tetapi hanya
+    bytes.count, jauh lebih murah daripada parse CSV di pekerja.
+    """
+    batas = [awal]
+    kutip = 0  # jumlah tanda kutip di [awal, pos)
+    pos = awal
+    with open(path, 'rb') as f:
+        f.seek(awal)
+        while True:
+            target = min(pos + ukuran, akhir)
+            while pos < target:
+                data = f.read(min(blok, target - pos))
+                if not data:
+                    break
+                kutip += data.count(b'"')
+                pos += len(data)
+            pos, kutip = _maju_ke_baris(f, pos, akhir, kutip, blok)
+            if pos >= akhir:
+                break
+            batas.append(pos)
+    batas.append(akhir)
+    return list(zip(batas, batas[1:]))
+
+def _peta_rentang(fungsi, path, awal, akhir, *args, pekerja=None):
+    """[fungsi(path, a, b, *args) untuk tiap rentang], paralel bila berkas cukup besar."""
+    pekerja = PEKERJA_PINDAI if pekerja is None else pekerja
+    if pekerja <= 1 or akhir - awal < BATAS_PARALEL:
+        # Tetap per rentang agar memori terbatas pada satu rentang.
+        return [fungsi(path, a, b, *args) for a, b in _rentang_baris(path, awal, akhir, UKURAN_RENTANG)]
+    ukuran = max(1, min(UKURAN_RENTANG, (akhir - awal) // (pekerja * 4) + 1))
+    rentang = _rentang_baris(path, awal, akhir, ukuran)
+    with ProcessPoolExecutor(max_workers=pekerja) as ex:
+        return list(ex.map(fungsi, *zip(*((path, a, b) + args for a, b in rentang))))
+
+def _awal_data(path):
+    """Offset byte setelah baris header."""
+    with open(path, 'rb') as f:
+        f.readline()
+        return f.tell()
+
+def _indeks_rentang(path, awal, akhir):
+    """Username, awal dan akhir tiap baris utuh di [awal, akhir).
+
+    Mengembalikan (username, array awal, array akhir, offset setelah baris
+    utuh terakhir). Baris tanpa tanda kutip cukup dipotong di koma pertama.
+    """
+    with open(path, 'rb') as f:
+        f.seek(awal)
+        data = f.read(akhir - awal)
+    nama, mulai, selesai = [], array('q'), array('q')
+    i = 0
+    while True:
+        j = data.find(b'\n', i)
+        if j < 0:
             break
+        baris = data[i:j]
+        if b'"' in baris:
+            r = next(csv.reader([baris.decode('utf-8')]), None)
+            username = r[1] if r and len(r) > 1 else None
+        else:
+            r = baris.rstrip(b'\r').split(b',', 2)
+            username = r[1].decode('utf-8') if len(r) > 1 else None
+        if username is not None:
+            nama.append(username)
+            mulai.append(awal + i)
+            selesai.append(awal + j + 1)
+        i = j + 1
+    return nama, mulai, selesai, awal + i
 
-    if not produk:
-        print("Produk tidak ditemukan.")
-        return
 
-    try:
-        stok = int(input("Masukkan jumlah: ").strip())
-    except ValueError:
-        print("Jumlah harus berupa angka.")
-        return
+class IndeksTransaksi:
+    """Indeks persisten username -> offset byte baris di transaksi.csv.
 
-    if stok <= 0:
-        print("Jumlah harus > 0.")
-        return
+    Indeks disimpan di transaksi.csv.idx sebagai baris "username,awal,akhir"
+    dan hanya ditambah untuk baris transaksi yang belum terindeks, jadi
+    riwayat satu user dibaca dengan seek, bukan scan seluruh file.
+    File .idx dipakai bersama beberapa proses: membaca entri baru dari
+    proses lain, memindai, dan menambah entri dilakukan di dalam kunci_data().
+    """
 
-    if produk['stok'] < stok:
-        print(f"Stok tidak cukup. Stok saat ini: {produk['stok']}")
-        return
+    def __init__(self, path):
+        self.path = path
+        self.idx_path = path + '.idx'
+        self.offset = {}
+        self._cakupan = None
+        self._idx_tanda = None  # (inode, byte .idx yang sudah dibaca)
 
-    total = produk['harga'] * stok
-    print(f"Anda membeli: {produk['nama']} x{stok}  Harga satuan: Rp{produk['harga']}  Total: Rp{total}")
+    def _muat(self):
+        """Baca entri .idx yang belum dibaca; semuanya bila file .idx diganti. Di dalam kunci."""
+        try:
+            st = os.stat(self.idx_path)
+        except FileNotFoundError:
+            st = None
+        tanda = self._idx_tanda
+        if st is None or tanda is None or st.st_ino != tanda[0] or st.st_size < tanda[1]:
+            self.offset = {}
+            self._cakupan = 0
+            self._idx_tanda = tanda = None
+        if st is None:
+            return
+        awal = tanda[1] if tanda else 0
+        if st.st_size == awal:
+            return
+        with open(self.idx_path, 'r+b') as f:
+            f.seek(awal)
+            data = f.read()
+            utuh = data.rfind(b'\n') + 1
+            for r in csv.reader(data[:utuh].decode('utf-8').splitlines()):
+                if len(r) < 3:
+                    continue
+                if r[0]:
+                    self.offset.setdefault(r[0], []).append(int(r[1]))
+                self._cakupan = max(self._cakupan, int(r[2]))
+            if utuh < len(data):
+                # Sisa crash di tengah penulisan; aman dipotong karena kunci dipegang.
+                f.truncate(awal + utuh)
+        self._idx_tanda = (st.st_ino, awal + utuh)
 
+    def bangun_ulang(self):
+        with kunci_data():
+            if os.path.exists(self.idx_path):
+                os.remove(self.idx_path)
+            self.offset = {}
+            self._cakupan = 0
+            self._idx_tanda = None
+            self.sinkron()
 
-    konf = input("Konfirmasi bayar? (ya/tidak): ").strip().lower()
-    if konf != 'ya':
-        print("Transaksi dibatalkan.")
-        return
+    @terukur('transaksi.indeks')
+    def sinkron(self):
+        """Indeks baris baru yang ditambahkan sejak sinkron terakhir."""
+        ensure_csv(self.path, TRANSAKSI_HEADER)
+        if os.path.getsize(self.path) == self._cakupan:
+            return
+        with kunci_data():
+            self._muat()
+            ukuran = os.path.getsize(self.path)
+            if ukuran < self._cakupan:
+                self.bangun_ulang()
+                return
+            if ukuran == self._cakupan:
+                return
+            awal = self._cakupan or _awal_data(self.path)
+            baru = []
+            pos = awal
+            for nama, mulai, selesai, pos in _peta_rentang(_indeks_rentang, self.path, awal, ukuran):
+                baru.extend(zip(nama, mulai, selesai))
+            if baru:
+                with open(self.idx_path, 'a', newline='', encoding='utf-8') as f:
+                    awal_idx = f.tell()
+                    csv.writer(f).writerows(baru)
+                    hitung_tulis(f, awal_idx)
+                st = os.stat(self.idx_path)
+                self._idx_tanda = (st.st_ino, st.st_size)
+            for username, off, _ in baru:
+                self.offset.setdefault(username, []).append(off)
+            # Baris kosong di ujung tidak dicatat ke .idx; cukup tidak dipindai ulang di proses ini.
+            hitung(pos - self._cakupan, len(baru))
+            self._cakupan = pos
 
-    ensure_csv(TRANSAKSI_FILE, ['waktu','username','id','nama','stok','harga','total'])
-    with open(TRANSAKSI_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        username = pengguna_sekarang or ''
-        writer.writerow([waktu, username, produk['id'], produk['nama'], stok, produk['harga'], total])
+    def jumlah(self, username):
+        self.sinkron()
+        return len(self.offset.get(username, ()))
+
+    @terukur('transaksi.riwayat')
+    def riwayat(self, username, halaman=1, per_halaman=None):
+        """Transaksi milik username, terbaru lebih dulu, per halaman."""
+        for coba in (0, 1):
+            self.sinkron()
+            offs = self.offset.get(username, [])
+            if per_halaman is None:
+                pilih = offs[::-1]
+            else:
+                akhir = len(offs) - (halaman - 1) * per_halaman
+                pilih = offs[max(akhir - per_halaman, 0):max(akhir, 0)][::-1]
+            rows = []
+            with open(self.path, 'rb') as f:
+                for off in pilih:
+                    f.seek(off)
+                    r = next(csv.reader([f.readline().decode('utf-8')]), [])
+                    if len(r) < 2 or r[1] != username:
+                        if coba == 0:
+                            break
+                        continue  # masih tidak cocok setelah dibangun ulang: lewati
+                    rows.append(dict(zip(TRANSAKSI_HEADER, r)))
+                else:
+                    return rows
+            # File transaksi diganti di luar program; indeks tidak valid, bangun ulang sekali.
+            self.bangun_ulang()
 
+    def iter_riwayat(self, username, terbaru_dulu=True, lewati=0):
+        """Generator transaksi username; baris dibaca satu per satu lewat offset."""
+        for coba in (0, 1):
+            self.sinkron()
+            offs = self.offset.get(username, [])
+            urutan = reversed(offs) if terbaru_dulu else iter(offs)
+            with open(self.path, 'rb') as f:
+                for n, off in enumerate(itertools.islice(urutan, lewati, None), lewati):
+                    f.seek(off)
+                    r = next(csv.reader([f.readline().decode('utf-8')]), [])
+                    if len(r) < 2 or r[1] != username:
+                        if coba == 0:
+                            break
+                        continue
+                    yield dict(zip(TRANSAKSI_HEADER, r))
+                else:
+                    return
+            # Lanjutkan dari baris yang gagal setelah indeks dibangun ulang sekali.
+            lewati = n
+            self.bangun_ulang()
 
 
-    with open(produk_path, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['id','nama_produk','harga','stok', ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for p in prods:
-            writer.writerow({
-                'id': p.get('id',''),
-                'nama_produk': p.get('nama',''),
-                'harga': p.get('harga',0),
-                'stok': p.get('stok',0)
+indeks_transaksi = IndeksTransaksi(TRANSAKSI_FILE)
 
-            })
+def indeks_untuk(path):
+    if path == indeks_transaksi.path:
+        return indeks_transaksi
+    return IndeksTransaksi(path)
 
-    print("Transaksi berhasil.")
+# Mode segmen: transaksi dipecah per hari/bulan di data_admin/transaksi/
+# dengan manifest rentang waktu dan jumlah baris tiap segmen.
+MODE_SEGMEN = os.environ.get('SISTA_SEGMEN', '')
+SEGMEN_DIR = os.path.join(DATA_ADMIN_DIR, 'transaksi')
 
-def tambahkan_produk():
-    ensure_csv(produk_path, ['id','nama_produk','harga','stok', ])
-    with open(produk_path, 'a', newline='', encoding='utf-8') as f:
-        fieldnames = ['id','nama_produk','harga','stok', ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+
+class PenyimpananSegmen:
+    """Transaksi terpartisi waktu: satu file CSV per periode plus manifest.
+
+    Pembaca bisa melewati segmen di luar rentang tanggal tanpa membukanya,
+    dan segmen lama dapat dikompres gzip tanpa menyentuh segmen aktif.
+    Manifest dibaca ulang bila file-nya berubah (proses lain menambah
+    segmen), dan setiap perubahan dilakukan di dalam kunci_data(). Selama
+    transaksi.csv lama (path `lama`) belum diimpor, isinya tetap ikut dibaca
+    sebagai riwayat sebelum segmen pertama.
+    """
+
+    def __init__(self, folder, periode='bulanan', lama=None):
+        self.folder = folder
+        self.periode = periode
+        self.lama = lama
+        self.manifest_path = os.path.join(folder, 'manifest.json')
+        self._manifest = None
+        self._tanda = None
+
+    def _tanda_file(self):
         try:
-            id_produk = int(input("Masukkan ID produk: ").strip())
-        except ValueError:
-            print("ID produk harus berupa angka.")
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def manifest(self):
+        """Manifest terbaru; dibaca ulang dari disk bila berubah sejak terakhir dibaca."""
+        tanda = self._tanda_file()
+        if self._manifest is None or tanda != self._tanda:
+            if tanda is None:
+                self._manifest = {}
+            else:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            self._tanda = tanda
+        return self._manifest
+
+    def _simpan_manifest(self):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+        self._tanda = self._tanda_file()
+
+    def kunci(self, waktu):
+        return waktu[:10] if self.periode == 'harian' else waktu[:7]
+
+    @terukur('transaksi.segmen')
+    def tambah(self, rows):
+        """Tambahkan baris transaksi (list sesuai TRANSAKSI_HEADER) ke segmennya."""
+        with kunci_data():
+            self._tambah(rows)
+
+    def _tambah(self, rows):
+        manifest = self.manifest()
+        per_segmen = {}
+        for r in rows:
+            per_segmen.setdefault(self.kunci(str(r[0])), []).append(r)
+        for kunci, isi in per_segmen.items():
+            meta = manifest.get(kunci)
+            if meta is None:
+                meta = manifest[kunci] = {'file': f"transaksi-{kunci}.csv", 'mulai': isi[0][0],
+                                          'akhir': isi[0][0], 'baris': 0, 'arsip': False}
+            if meta['arsip']:
+                raise ValueError(f"Segmen {kunci} sudah diarsipkan dan tidak bisa ditambah.")
+            path = os.path.join(self.folder, meta['file'])
+            ensure_csv(path, TRANSAKSI_HEADER)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                awal = f.tell()
+                csv.writer(f).writerows(isi)
+                hitung_tulis(f, awal, len(isi))
+            meta['baris'] += len(isi)
+            meta['mulai'] = min(meta['mulai'], min(str(r[0]) for r in isi))
+            meta['akhir'] = max(meta['akhir'], max(str(r[0]) for r in isi))
+        self._simpan_manifest()
+
+    def _buka(self, meta):
+        path = os.path.join(self.folder, meta['file'])
+        if meta['arsip']:
+            return gzip.open(path, 'rt', newline='', encoding='utf-8')
+        return open(path, newline='', encoding='utf-8')
+
+    def _baca_file(self, f, mulai, akhir, username, terbaru_dulu):
+        rows = (row for row in csv.DictReader(f)
+                if (not username or row.get('username') == username)
+                and (not mulai or row.get('waktu', '') >= mulai)
+                and (not akhir or row.get('waktu', '') <= akhir))
+        if terbaru_dulu:
+            rows = reversed(list(rows))
+        yield from rows
+
+    def _baca_lama(self, mulai, akhir, username, terbaru_dulu):
+        if not self.lama or not os.path.exists(self.lama):
             return
-        nama_produk = input("Masukkan nama produk: ").strip()
-        harga_produk = input("Masukkan harga produk: ").strip()
-        stok_produk = input("Masukkan stok produk: ").strip()
-    
-        try:
-            harga_v = int(harga_produk)
-            stok_v = int(stok_produk)
-        except ValueError:
-            print("Harga dan stok harus angka.")
+        with open(self.lama, newline='', encoding='utf-8') as f:
+            yield from self._baca_file(f, mulai, akhir, username, terbaru_dulu)
+
+    def baca(self, mulai=None, akhir=None, username=None, terbaru_dulu=False):
+        """Iterasi baris transaksi dalam rentang waktu [mulai, akhir]."""
+        manifest = dict(self.manifest())
+        if not terbaru_dulu:
+            yield from self._baca_lama(mulai, akhir, username, terbaru_dulu)
+        for k in sorted(manifest, reverse=terbaru_dulu):
+            meta = manifest[k]
+            if mulai and meta['akhir'] < mulai:
+                continue
+            if akhir and meta['mulai'] > akhir:
+                continue
+            with self._buka(meta) as f:
+                yield from self._baca_file(f, mulai, akhir, username, terbaru_dulu)
+        if terbaru_dulu:
+            yield from self._baca_lama(mulai, akhir, username, terbaru_dulu)
+
+    def arsipkan(self):
+        """Kompres semua segmen kecuali segmen terbaru (segmen aktif)."""
+        hasil = []
+        with kunci_data():
+            manifest = self.manifest()
+            aktif = max(manifest) if manifest else None
+            for k, meta in manifest.items():
+                if k == aktif or meta['arsip']:
+                    continue
+                path = os.path.join(self.folder, meta['file'])
+                with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+                    dst.writelines(src)
+                meta['file'] += '.gz'
+                meta['arsip'] = True
+                self._simpan_manifest()
+                os.remove(path)
+                hasil.append(k)
+        return hasil
+
+    def impor(self, path=None, ukuran_batch=10000):
+        """Pecah transaksi.csv lama ke dalam segmen. Mengembalikan jumlah baris.
+
+        Setelah selesai file lama diganti nama menjadi <path>.diimpor agar
+        tidak ikut dibaca (dan tidak diimpor) dua kali.
+        """
+        path = path or self.lama
+        if not path or not os.path.exists(path):
+            return 0
+        n = 0
+        with kunci_data():
+            with open(path, newline='', encoding='utf-8') as f:
+                batch = []
+                for row in csv.DictReader(f):
+                    batch.append([row.get(h, '') for h in TRANSAKSI_HEADER])
+                    if len(batch) >= ukuran_batch:
+                        self._tambah(batch)
+                        n += len(batch)
+                        batch = []
+                if batch:
+                    self._tambah(batch)
+                    n += len(batch)
+            os.replace(path, path + '.diimpor')
+        return n
+
+
+segmen_transaksi = PenyimpananSegmen(SEGMEN_DIR, MODE_SEGMEN or 'bulanan', lama=TRANSAKSI_FILE)
+
+# Ringkasan penjualan termaterialisasi: total per produk dan per hari yang
+# diperbarui bersama setiap transaksi, jadi membacanya O(1) berapa pun
+# besarnya riwayat transaksi.
+RINGKASAN_FILE = os.path.join(DATA_ADMIN_DIR, 'ringkasan_penjualan.json')
+
+
+class RingkasanPenjualan:
+    """Snapshot JSON + jurnal delta (satu baris JSON per transaksi), seperti katalog."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jurnal_path = path + '.jurnal'
+        self.produk = {}
+        self.harian = {}
+        self.produk_harian = {}
+        self._tanda = None
+        self._n_jurnal = 0
+        self._posisi_jurnal = 0
+        # Produk yang disentuh tiap catatan jurnal sejak ringkasan terakhir
+        # dibangun penuh (generasi), untuk pembaruan inkremental (perubahan_sejak).
+        self._generasi = 0
+        self._disentuh = []
+
+    def _tanda_file(self):
+        tanda = []
+        for p in (self.path, self.jurnal_path):
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                tanda.append(None)
+                continue
+            tanda.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(tanda)
+
+    def _terapkan(self, hari, pid, jumlah, total):
+        for tabel, kunci in ((self.produk, pid), (self.harian, hari)):
+            nilai = tabel.get(kunci)
+            if nilai is None:
+                nilai = tabel[kunci] = [0, 0, 0]
+            nilai[0] += jumlah
+            nilai[1] += total
+            nilai[2] += 1
+        per_hari = self.produk_harian.get(pid)
+        if per_hari is None:
+            per_hari = self.produk_harian[pid] = {}
+        per_hari[hari] = per_hari.get(hari, 0) + jumlah
+        self._disentuh.append(pid)
+
+    def _generasi_baru(self):
+        self._generasi += 1
+        self._disentuh = []
+
+    def _baca_jurnal(self, mulai):
+        """Terapkan catatan jurnal utuh dari offset `mulai`. Byte dibaca, atau None bila jurnal rusak."""
+        with open(self.jurnal_path, 'rb') as f:
+            f.seek(mulai)
+            isi = f.read()
+        utuh = isi.rfind(b'\n') + 1
+        for line in isi[:utuh].splitlines():
+            try:
+                item = json.loads(line)
+                self._terapkan(*item)
+            except (ValueError, TypeError):
+                # Jurnal rusak (mis. ekor terpotong yang tertimpa); hitung ulang dari transaksi.
+                self.bangun_ulang()
+                return None
+            self._n_jurnal += 1
+        self._posisi_jurnal = mulai + utuh
+        return len(isi)
+
+    @terukur('ringkasan.baca')
+    def segarkan(self):
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
             return
-        writer.writerow({
-            'id': id_produk,
-            'nama_produk': nama_produk,
-            'harga': harga_v,
-            'stok': stok_v,
-        })
-    print("Produk berhasil ditambahkan.")
+        if tanda[0] is None:
+            self.bangun_ulang()
+            return
+        lama = self._tanda
+        if (lama is not None and lama[0] == tanda[0] and tanda[1] is not None
+                and (lama[1] is None or (lama[1][0] == tanda[1][0] and tanda[1][2] >= lama[1][2]))):
+            # Snapshot sama dan jurnal hanya bertambah (proses lain mencatat
+            # transaksi): cukup terapkan catatan baru di ekor jurnal.
+            dibaca = self._baca_jurnal(self._posisi_jurnal if lama[1] is not None else 0)
+            if dibaca is None:
+                return
+            hitung(dibaca, self._n_jurnal)
+            self._tanda = tanda
+            return
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'produk_harian' not in data:
+            # Snapshot lama tanpa penjualan per produk per hari.
+            self.bangun_ulang()
+            return
+        self.produk = data.get('produk', {})
+        self.harian = data.get('harian', {})
+        self.produk_harian = data['produk_harian']
+        self._generasi_baru()
+        self._n_jurnal = 0
+        self._posisi_jurnal = 0
+        if tanda[1] is not None and self._baca_jurnal(0) is None:
+            return
+        hitung(sum(t[2] for t in tanda if t), self._n_jurnal)
+        self._tanda = tanda
 
+    def _simpan_snapshot(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'produk': self.produk, 'harian': self.harian, 'produk_harian': self.produk_harian}, f)
+        os.replace(tmp, self.path)
+        if os.path.exists(self.jurnal_path):
+            os.remove(self.jurnal_path)
+        self._n_jurnal = 0
+        self._posisi_jurnal = 0
+        self._generasi_baru()
+        self._tanda = self._tanda_file()
 
-def modifikasi_produk(path=produk_path):
-    
-    ensure_csv(path, ['id','nama_produk','harga','stok', ])
-    prods = []
-    try:
-        with open(path, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for r in reader:
-                try:
-                    harga = int(r.get('harga') or 0)
-                except Exception:
-                    harga = 0
+    @terukur('ringkasan.tambah')
+    def tambah(self, rows):
+        """Terapkan baris transaksi baru; dipanggil di bawah kunci_data()."""
+        self.segarkan()
+        delta = []
+        for r in rows:
+            item = [str(r[0])[:10], str(r[2]), int(r[4]), int(r[6])]
+            self._terapkan(*item)
+            delta.append(json.dumps(item) + '\n')
+        with kunci_data():
+            # Ekor terpotong dari crash dibuang dulu agar catatan baru tidak menempel padanya.
+            buang_ekor_terpotong(self.jurnal_path)
+            with open(self.jurnal_path, 'a', encoding='utf-8') as f:
+                awal = f.tell()
+                f.writelines(delta)
+                f.flush()
+                os.fsync(f.fileno())
+                hitung_tulis(f, awal, len(delta))
+                self._posisi_jurnal = f.tell()
+            self._n_jurnal += len(delta)
+            if self._n_jurnal >= BATAS_KOMPAKSI:
+                self._simpan_snapshot()
+            else:
+                self._tanda = self._tanda_file()
+
+    def bangun_ulang(self):
+        """Hitung ulang ringkasan dari seluruh riwayat transaksi (pemulihan)."""
+        with kunci_data():
+            self.produk = {}
+            self.harian = {}
+            self.produk_harian = {}
+            for r in baris_transaksi():
                 try:
-                    stok = int(r.get('stok') or 0)
-                except Exception:
-                    stok = 0
-                prods.append({
-                    'id': (r.get('id') or '').strip(),
-                    'nama_produk': (r.get('nama_produk') or r.get('nama') or '').strip(),
-                    'harga': harga,
-                    'stok': stok,
-                })
-    except FileNotFoundError:
-        print("produk.csv tidak ditemukan.")
-        return
+                    self._terapkan(str(r[0])[:10], str(r[2]), int(r[4]), int(r[6]))
+                except (IndexError, ValueError):
+                    continue
+            self._simpan_snapshot()
 
-    if not prods:
-        print("Tidak ada produk untuk dimodifikasi.")
-        return
+    def untuk_produk(self, pid):
+        self.segarkan()
+        return _nilai_ringkasan(self.produk.get(pid))
 
-    print("Daftar produk:")
-    for p in prods:
-        print(f"- ID:{p['id']}  {p['nama_produk']}  (Rp{p['harga']:,})  Stok:{p['stok']} ")
+    def untuk_hari(self, hari):
+        self.segarkan()
+        return _nilai_ringkasan(self.harian.get(hari))
 
-    key = input("Masukkan ID atau nama produk yang ingin dimodifikasi: ").strip()
-    target = None
-    for p in prods:
-        if p['id'] and p['id'] == key:
-            target = p
-            break
-        if p['nama_produk'] and p['nama_produk'].lower() == key.lower():
-            target = p
-            break
+    def penjualan_per_hari(self, hari, produk=None):
+        """{id produk: [jumlah terjual per tanggal di `hari`]} untuk produk yang laku (atau hanya `produk`)."""
+        self.segarkan()
+        sumber = self.produk_harian
+        if produk is not None:
+            sumber = {pid: sumber[pid] for pid in produk if pid in sumber}
+        return {pid: [per_hari.get(h, 0) for h in hari] for pid, per_hari in sumber.items()}
 
-    if not target:
-        print("Produk tidak ditemukan.")
+    def perubahan_sejak(self, token):
+        """(token baru, set id produk yang terjual sejak `token`).
+
+        Set bernilai None bila ringkasan dibangun penuh sejak token itu (atau
+        token None), artinya pemakai harus menghitung ulang semuanya.
+        """
+        self.segarkan()
+        baru = (self._generasi, len(self._disentuh))
+        if token is None or token[0] != self._generasi:
+            return baru, None
+        return baru, set(self._disentuh[token[1]:])
+
+
+def _nilai_ringkasan(nilai):
+    nilai = nilai or (0, 0, 0)
+    return {'stok': nilai[0], 'total': nilai[1], 'transaksi': nilai[2]}
+
+ringkasan_penjualan = RingkasanPenjualan(RINGKASAN_FILE)
+
+def ringkasan_produk(pid):
+    """Total terjual dan pendapatan seumur hidup satu produk."""
+    if BACKEND == 'sqlite':
+        return db().ringkasan('produk', pid)
+    with kunci_data():
+        return ringkasan_penjualan.untuk_produk(pid)
+
+def ringkasan_harian(hari):
+    """Total terjual dan pendapatan pada satu tanggal (YYYY-MM-DD)."""
+    if BACKEND == 'sqlite':
+        return db().ringkasan('harian', hari)
+    with kunci_data():
+        return ringkasan_penjualan.untuk_hari(hari)
+
+def bangun_ulang_ringkasan():
+    if BACKEND == 'sqlite':
+        db().bangun_ulang_ringkasan()
         return
+    with kunci_data():
+        ringkasan_penjualan.bangun_ulang()
 
-    print("Kosongkan input untuk menjaga nilai lama.")
-    nama_baru = input(f"Nama [{target['nama_produk']}]: ").strip()
-    harga_baru = input(f"Harga [{target['harga']}]: ").strip()
-    stok_baru = input(f"Stok [{target['stok']}]: ").strip()
+@terukur('transaksi.tulis')
+def catat_transaksi(rows, path=None):
+    """Tambahkan baris transaksi ke penyimpanan yang aktif."""
+    if BACKEND == 'sqlite':
+        hitung(baris=len(rows))
+        db().catat_transaksi(rows)
+        return
+    path = path or TRANSAKSI_FILE
+    utama = MODE_SEGMEN or path == TRANSAKSI_FILE
+    with kunci_data():
+        if utama:
+            # Bangun ringkasan awal (bila belum ada) sebelum baris baru ditulis.
+            ringkasan_penjualan.segarkan()
+        if MODE_SEGMEN:
+            # Byte dicatat di operasi transaksi.segmen.
+            hitung(baris=len(rows))
+            segmen_transaksi.tambah(rows)
+        else:
+            ensure_csv(path, TRANSAKSI_HEADER)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                awal = f.tell()
+                csv.writer(f).writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+                hitung_tulis(f, awal, len(rows))
+            indeks_untuk(path).sinkron()
+        if utama:
+            ringkasan_penjualan.tambah(rows)
 
-    if nama_baru:
-        target['nama_produk'] = nama_baru
-    if harga_baru:
+
+KUNCI_FILE = os.path.join(DATA_ADMIN_DIR, '.kunci')
+_kunci_lokal = threading.RLock()
+_kunci_fd = None
+_kunci_kedalaman = 0
+
+@contextmanager
+def kunci_data(path=None):
+    """Kunci eksklusif lintas proses atas data_admin (bisa dipanggil bersarang).
+
+    Thread lain di proses yang sama menunggu di RLock, proses lain menunggu
+    di kunci OS (flock / msvcrt.locking) pada file .kunci.
+    """
+    global _kunci_fd, _kunci_kedalaman
+    with _kunci_lokal:
+        if _kunci_kedalaman == 0:
+            path = path or KUNCI_FILE
+            pastikan_folder(path)
+            f = open(path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            _kunci_fd = f
+        _kunci_kedalaman += 1
         try:
-            target['harga'] = int(harga_baru)
-        except ValueError:
-            print("Harga tidak valid, perubahan harga diabaikan.")
-    if stok_baru:
+            yield
+        finally:
+            _kunci_kedalaman -= 1
+            if _kunci_kedalaman == 0:
+                if fcntl is not None:
+                    fcntl.flock(_kunci_fd.fileno(), fcntl.LOCK_UN)
+                else:
+                    _kunci_fd.seek(0)
+                    msvcrt.locking(_kunci_fd.fileno(), msvcrt.LK_UNLCK, 1)
+                _kunci_fd.close()
+                _kunci_fd = None
+
+@terukur('transaksi.checkout')
+def checkout_keranjang(username, items):
+    """Checkout banyak baris (key produk, jumlah) sebagai satu transaksi atomik.
+
+    Semua stok divalidasi dalam satu lintasan di bawah kunci; bila ada satu
+    baris yang gagal, tidak ada yang ditulis. Bila berhasil, semua baris
+    transaksi ditambahkan dalam satu batch lalu katalog ditulis sekali.
+    Mengembalikan (berhasil, pesan).
+    """
+    if not items:
+        return False, "Keranjang kosong."
+    if BACKEND == 'sqlite':
+        return db().checkout(username, items)
+    with kunci_data():
+        jumlah_per_produk = {}
+        urutan = []
+        for key, jumlah in items:
+            if jumlah <= 0:
+                return False, "Jumlah harus > 0."
+            produk = katalog.cari(key)
+            if produk is None:
+                return False, f"Produk '{key}' tidak ditemukan."
+            if id(produk) not in jumlah_per_produk:
+                urutan.append(produk)
+                jumlah_per_produk[id(produk)] = 0
+            jumlah_per_produk[id(produk)] += jumlah
+        for produk in urutan:
+            if produk['stok'] < jumlah_per_produk[id(produk)]:
+                return False, f"Stok {produk['nama']} tidak cukup. Stok saat ini: {produk['stok']}"
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for produk in urutan:
+            jumlah = jumlah_per_produk[id(produk)]
+            rows.append([waktu, username or '', produk['id'], produk['nama'], jumlah, produk['harga'], produk['harga'] * jumlah])
+        # Transaksi (dan ringkasannya) ditulis lebih dulu: bila gagal, stok
+        # belum berubah di memori maupun di disk.
+        catat_transaksi(rows)
+        stok_lama = [produk['stok'] for produk in urutan]
         try:
-            target['stok'] = int(stok_baru)
-        except ValueError:
-            print("Stok tidak valid, perubahan stok diabaikan.")
+            for produk in urutan:
+                produk['stok'] -= jumlah_per_produk[id(produk)]
+            katalog.catat_banyak(urutan)
+        except BaseException:
+            for produk, stok in zip(urutan, stok_lama):
+                produk['stok'] = stok
+            raise
+    return True, "Transaksi berhasil."
 
-    with open(path, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['id','nama_produk','harga','stok', ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for p in prods:
-            writer.writerow({
-                'id': p.get('id',''),
-                'nama_produk': p.get('nama_produk',''),
-                'harga': p.get('harga',0),
-                'stok': p.get('stok',0)
-            })
+def beli(username, key, jumlah):
+    """Cek dan kurangi stok satu produk secara atomik lalu catat transaksinya.
 
-    print(f"Produk '{target.get('nama_produk')}' (ID:{target.get('id')}) berhasil diperbarui.")
+    Stok diperiksa ulang di dalam kunci terhadap katalog terbaru di disk,
+    jadi beberapa terminal yang berbagi data_admin tidak bisa oversell.
+    Mengembalikan (berhasil, pesan).
+    """
+    return checkout_keranjang(username, [(key, jumlah)])
 
-def hapus_produk(path=produk_path):
-   
-    ensure_csv(path, ['id','nama_produk','harga','stok', ])
+def ubah_produk(key, nama=None, harga=None, stok=None, path=None):
+    """Ubah nama/harga/stok satu produk di bawah kunci. Mengembalikan produk atau None."""
+    kat = katalog_untuk(path or produk_path)
+    with kunci_data():
+        target = kat.cari(key)
+        if target is None:
+            return None
+        nama_lama = target['nama']
+        if nama:
+            target['nama'] = nama
+        if harga is not None:
+            target['harga'] = harga
+        if stok is not None:
+            target['stok'] = stok
+        kat.catat(target, nama_lama)
+    return target
 
-    rows = []
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
-    if not rows:
-        print("Belum ada produk untuk dihapus.")
-        return
+def hapus_produk_id(key, path=None):
+    """Hapus satu produk di bawah kunci. Mengembalikan produk yang dihapus atau None."""
+    kat = katalog_untuk(path or produk_path)
+    with kunci_data():
+        target = kat.cari(key)
+        if target is not None:
+            kat.hapus(target)
+    return target
 
-    print("Daftar produk:")
-    for r in rows:
-        print(f"- ID:{r.get('id','')}  {r.get('nama_produk','')}  Stok:{r.get('stok','')}  Harga:{r.get('harga','')}")
+# Backend SQLite opsional (SISTA_BACKEND=sqlite): tabel berindeks untuk
+# pengguna, produk dan transaksi, mode WAL agar pembaca tidak terblokir.
+BACKEND = os.environ.get('SISTA_BACKEND', 'csv')
+SQLITE_FILE = os.environ.get('SISTA_DB') or os.path.join(DATA_ADMIN_DIR, 'sista.db')
 
-    key = input("Masukkan ID atau nama produk yang ingin dihapus: ").strip()
-    idx = None
-    for i, r in enumerate(rows):
-        if (r.get('id') and r.get('id') == key) or (r.get('nama_produk') and r.get('nama_produk').lower() == key.lower()):
-            idx = i
-            break
+SKEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS pengguna (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'user'
+);
+CREATE TABLE IF NOT EXISTS produk (
+    id TEXT PRIMARY KEY,
+    nama TEXT NOT NULL,
+    nama_lower TEXT NOT NULL,
+    harga INTEGER NOT NULL DEFAULT 0,
+    stok INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS produk_nama ON produk(nama_lower);
+CREATE TABLE IF NOT EXISTS transaksi (
+    no INTEGER PRIMARY KEY,
+    waktu TEXT NOT NULL,
+    username TEXT NOT NULL,
+    id TEXT NOT NULL,
+    nama TEXT NOT NULL,
+    stok INTEGER NOT NULL,
+    harga INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transaksi_username ON transaksi(username, no);
+CREATE INDEX IF NOT EXISTS transaksi_waktu ON transaksi(waktu);
+CREATE TABLE IF NOT EXISTS ringkasan_produk (
+    kunci TEXT PRIMARY KEY,
+    stok INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    transaksi INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ringkasan_harian (
+    kunci TEXT PRIMARY KEY,
+    stok INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    transaksi INTEGER NOT NULL
+);
+"""
 
-    if idx is None:
-        print("Produk tidak ditemukan.")
-        return
 
-    target = rows[idx]
-    konf = input(f"Yakin ingin menghapus produk '{target.get('nama_produk','')}' (ID:{target.get('id','')})? (ya/tidak): ").strip().lower()
-    if konf != 'ya':
-        print("Penghapusan dibatalkan.")
-        return
+class PenyimpananSQLite:
+    """Penyimpanan pengguna/produk/transaksi di satu file SQLite.
 
-    del rows[idx]
-    with open(path, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['id','nama_produk','harga','stok', ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow({
-                'id': r.get('id',''),
-                'nama_produk': r.get('nama_produk',''),
-                'harga': r.get('harga',''),
-                'stok': r.get('stok',''),
+    Satu koneksi per objek (dijaga RLock) dalam mode autocommit; operasi
+    yang harus atomik membuka BEGIN IMMEDIATE sendiri.
+    """
 
-            })
-    print("Produk berhasil dihapus.")
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._kunci = threading.RLock()
+        self._versi_lokal = 0
 
-def cek_kelembaban_dan_cuaca():
-    
-    print("--- Input Manual Data Irigasi ---")
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SKEMA_SQLITE)
+            self._conn = conn
+        return self._conn
 
-    while True:
-        try:
-            kelembaban = int(input("Masukkan tingkat kelembaban tanah (0-100, di mana 0 sangat kering): "))
-            if 0 <= kelembaban <= 100:
-                break
-            else:
-                print("⚠️ Kelembaban harus di antara 0 dan 100.")
-        except ValueError:
-            print("⚠️ Masukkan angka yang valid.")
+    @contextmanager
+    def transaksi_db(self):
+        with self._kunci:
+            conn = self.conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+            self._versi_lokal += 1
 
+    def versi(self):
+        """Berubah setiap kali isi database berubah, oleh proses mana pun."""
+        with self._kunci:
+            return (self.conn().execute('PRAGMA data_version').fetchone()[0], self._versi_lokal)
 
-    while True:
-        cuaca_input = input("Apakah hari ini turun hujan? (ya/tidak): ").lower()
-        if cuaca_input in ['ya', 'tidak']:
-            cuaca_hujan = (cuaca_input == 'ya')
-            break
-        else:
-            print("⚠️ Masukkan 'ya' atau 'tidak'.")
+    def baca_pengguna(self):
+        with self._kunci:
+            rows = self.conn().execute('SELECT username, password, role FROM pengguna ORDER BY rowid')
+            return {u: {'password': pw, 'role': role} for u, pw, role in rows}
 
-    return kelembaban, cuaca_hujan
+    def cari_pengguna(self, username):
+        with self._kunci:
+            r = self.conn().execute('SELECT password, role FROM pengguna WHERE username = ?', (username,)).fetchone()
+        return {'password': r[0], 'role': r[1]} if r else None
 
-def tentukan_irigasi(kelembaban, hujan):
-   
-    
-    BATAS_KERING = 40
+    def tambah_pengguna(self, username, password, role='user'):
+        with self.transaksi_db() as conn:
+            conn.execute('INSERT OR REPLACE INTO pengguna (username, password, role) VALUES (?, ?, ?)',
+                         (username, password, role))
 
-    print("\n--- Analisis dan Rekomendasi ---")
+    def tulis_pengguna(self, users):
+        with self.transaksi_db() as conn:
+            conn.execute('DELETE FROM pengguna')
+            conn.executemany('INSERT INTO pengguna (username, password, role) VALUES (?, ?, ?)',
+                             [(u, m.get('password', ''), m.get('role', 'user')) for u, m in users.items()])
 
-    if hujan:
-        print("✅ Hari ini turun hujan. Irigasi TIDAK DIPERLUKAN saat ini.")
-    elif kelembaban < BATAS_KERING:
-        print(f"🔴 Kelembaban tanah ({kelembaban}%) di bawah batas kritis ({BATAS_KERING}%).")
-        print("💧 Rekomendasi: AKTIFKAN SISTEM IRIGASI atau berikan air.")
-    else:
-        print(f"🟢 Kelembaban tanah ({kelembaban}%) cukup baik.")
-        print("🛑 Rekomendasi: TIDAK PERLU IRIGASI saat ini. Periksa lagi nanti.")
+    def hapus_pengguna(self, username):
+        with self.transaksi_db() as conn:
+            return conn.execute('DELETE FROM pengguna WHERE username = ?', (username,)).rowcount > 0
 
-def irrigation_menu():
-   
-    while True:
-        clear_screen()
-        print("=== Menu Irigasi Manual Sederhana ===")
-        print("1. Cek kelembaban & cuaca (manual)")
-        print("2. Kembali")
-        cmd = input("Pilih: ").strip()
-        if cmd == '1':
-            kelembaban, hujan = cek_kelembaban_dan_cuaca()
-            tentukan_irigasi(kelembaban, hujan)
-            input("\nTekan Enter untuk kembali ke menu irigasi...")
-        elif cmd == '2':
-            return
-        else:
-            print("Pilihan tidak valid.")
-            input("Tekan Enter untuk mencoba lagi...")
+    def _produk_dari(self, conn, key):
+        key = (key or '').strip()
+        r = conn.execute('SELECT id, nama, harga, stok FROM produk WHERE id = ?', (key,)).fetchone()
+        if r is None:
+            r = conn.execute('SELECT id, nama, harga, stok FROM produk WHERE nama_lower = ? ORDER BY rowid LIMIT 1',
+                             (key.casefold(),)).fetchone()
+        return {'id': r[0], 'nama': r[1], 'harga': r[2], 'stok': r[3]} if r else None
+
+    def cari_produk(self, key):
+        with self._kunci:
+            return self._produk_dari(self.conn(), key)
+
+    def daftar_produk(self):
+        with self._kunci:
+            rows = self.conn().execute('SELECT id, nama, harga, stok FROM produk ORDER BY rowid').fetchall()
+        return [{'id': i, 'nama': n, 'harga': h, 'stok': st} for i, n, h, st in rows]
+
+    def simpan_produk(self, prods):
+        with self.transaksi_db() as conn:
+            conn.executemany(
+                'INSERT INTO produk (id, nama, nama_lower, harga, stok) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET nama = excluded.nama, nama_lower = excluded.nama_lower, '
+                'harga = excluded.harga, stok = excluded.stok',
+                [(p['id'], p['nama'], p['nama'].casefold(), p['harga'], p['stok']) for p in prods if p['id']])
+
+    def ganti_semua_produk(self, prods):
+        with self.transaksi_db() as conn:
+            conn.execute('DELETE FROM produk')
+            conn.executemany('INSERT OR REPLACE INTO produk (id, nama, nama_lower, harga, stok) VALUES (?, ?, ?, ?, ?)',
+                             [(p['id'], p['nama'], p['nama'].casefold(), p['harga'], p['stok']) for p in prods if p['id']])
+
+    def hapus_produk(self, pid):
+        with self.transaksi_db() as conn:
+            return conn.execute('DELETE FROM produk WHERE id = ?', (pid,)).rowcount > 0
+
+    @terukur('sqlite.transaksi')
+    def catat_transaksi(self, rows):
+        with self.transaksi_db() as conn:
+            conn.executemany('INSERT INTO transaksi (waktu, username, id, nama, stok, harga, total) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._tambah_ringkasan(conn, rows)
+
+    def _tambah_ringkasan(self, conn, rows):
+        for tabel, kolom in (('ringkasan_produk', 2), ('ringkasan_harian', 0)):
+            conn.executemany(
+                f'INSERT INTO {tabel} (kunci, stok, total, transaksi) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT(kunci) DO UPDATE SET stok = stok + excluded.stok, '
+                'total = total + excluded.total, transaksi = transaksi + 1',
+                [(str(r[kolom])[:10] if kolom == 0 else str(r[kolom]), int(r[4]), int(r[6])) for r in rows])
+
+    def ringkasan(self, tabel, kunci):
+        with self._kunci:
+            r = self.conn().execute(f'SELECT stok, total, transaksi FROM ringkasan_{tabel} WHERE kunci = ?',
+                                    (kunci,)).fetchone()
+        return _nilai_ringkasan(r)
+
+    def penjualan_per_hari(self, hari, produk=None):
+        posisi = {h: i for i, h in enumerate(hari)}
+        hasil = {}
+        with self._kunci:
+            baris = self.conn().execute(
+                'SELECT id, substr(waktu, 1, 10), SUM(stok) FROM transaksi WHERE waktu >= ? AND waktu < ? '
+                'GROUP BY 1, 2', (hari[0], hari[-1] + '~')).fetchall()
+        for pid, h, jumlah in baris:
+            if h in posisi and (produk is None or pid in produk):
+                hasil.setdefault(pid, [0] * len(hari))[posisi[h]] = jumlah
+        return hasil
+
+    def perubahan_sejak(self, token):
+        """Seperti RingkasanPenjualan.perubahan_sejak; token = nomor baris transaksi terakhir."""
+        with self._kunci:
+            conn = self.conn()
+            baru = conn.execute('SELECT MAX(no) FROM transaksi').fetchone()[0] or 0
+            if token is None or baru < token:
+                return baru, None
+            return baru, {r[0] for r in conn.execute('SELECT DISTINCT id FROM transaksi WHERE no > ?', (token,))}
+
+    def bangun_ulang_ringkasan(self):
+        with self.transaksi_db() as conn:
+            conn.execute('DELETE FROM ringkasan_produk')
+            conn.execute('DELETE FROM ringkasan_harian')
+            conn.execute('INSERT INTO ringkasan_produk SELECT id, SUM(stok), SUM(total), COUNT(*) '
+                         'FROM transaksi GROUP BY id')
+            conn.execute('INSERT INTO ringkasan_harian SELECT substr(waktu, 1, 10), SUM(stok), SUM(total), COUNT(*) '
+                         'FROM transaksi GROUP BY substr(waktu, 1, 10)')
+
+    @terukur('sqlite.checkout')
+    def checkout(self, username, items):
+        """Versi SQL dari checkout_keranjang: cek dan kurangi stok dalam satu transaksi."""
+        with self.transaksi_db() as conn:
+            jumlah_per_produk = {}
+            urutan = []
+            for key, jumlah in items:
+                if jumlah <= 0:
+                    return False, "Jumlah harus > 0."
+                produk = self._produk_dari(conn, key)
+                if produk is None:
+                    return False, f"Produk '{key}' tidak ditemukan."
+                if produk['id'] not in jumlah_per_produk:
+                    urutan.append(produk)
+                    jumlah_per_produk[produk['id']] = 0
+                jumlah_per_produk[produk['id']] += jumlah
+            for produk in urutan:
+                if produk['stok'] < jumlah_per_produk[produk['id']]:
+                    return False, f"Stok {produk['nama']} tidak cukup. Stok saat ini: {produk['stok']}"
+            waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            rows = []
+            for produk in urutan:
+                jumlah = jumlah_per_produk[produk['id']]
+                conn.execute('UPDATE produk SET stok = stok - ? WHERE id = ?', (jumlah, produk['id']))
+                rows.append((waktu, username or '', produk['id'], produk['nama'], jumlah,
+                             produk['harga'], produk['harga'] * jumlah))
+            conn.executemany('INSERT INTO transaksi (waktu, username, id, nama, stok, harga, total) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._tambah_ringkasan(conn, rows)
+        return True, "Transaksi berhasil."
+
+    @terukur('sqlite.riwayat')
+    def riwayat(self, username=None, halaman=1, per_halaman=None):
+        """Transaksi terbaru lebih dulu, opsional untuk satu username."""
+        sql = 'SELECT waktu, username, id, nama, stok, harga, total FROM transaksi'
+        args = []
+        if username is not None:
+            sql += ' WHERE username = ?'
+            args.append(username)
+        sql += ' ORDER BY no DESC'
+        if per_halaman is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            args += [per_halaman, (halaman - 1) * per_halaman]
+        with self._kunci:
+            rows = self.conn().execute(sql, args).fetchall()
+        return [dict(zip(TRANSAKSI_HEADER, (str(v) for v in r))) for r in rows]
+
+    def iter_riwayat(self, username=None, mulai=None, akhir=None, terbaru_dulu=True, ukuran=500):
+        """Generator transaksi per potongan (keyset pada kolom no), tanpa OFFSET."""
+        syarat, args = [], []
+        if username is not None:
+            syarat.append('username = ?')
+            args.append(username)
+        if mulai:
+            syarat.append('waktu >= ?')
+            args.append(mulai)
+        if akhir:
+            syarat.append('waktu <= ?')
+            args.append(akhir)
+        batas = None
+        while True:
+            sql = 'SELECT no, waktu, username, id, nama, stok, harga, total FROM transaksi'
+            kondisi = list(syarat)
+            argumen = list(args)
+            if batas is not None:
+                kondisi.append('no < ?' if terbaru_dulu else 'no > ?')
+                argumen.append(batas)
+            if kondisi:
+                sql += ' WHERE ' + ' AND '.join(kondisi)
+            sql += f" ORDER BY no {'DESC' if terbaru_dulu else 'ASC'} LIMIT ?"
+            argumen.append(ukuran)
+            with self._kunci:
+                rows = self.conn().execute(sql, argumen).fetchall()
+            for r in rows:
+                yield dict(zip(TRANSAKSI_HEADER, (str(v) for v in r[1:])))
+            if len(rows) < ukuran:
+                return
+            batas = rows[-1][0]
+
+
+class KatalogSQLite(KatalogProduk):
+    """KatalogProduk yang membaca dan menulis tabel produk SQLite.
+
+    Pencarian memakai indeks id/nama_lower di database; daftar lengkap hanya
+    dimuat ulang bila PRAGMA data_version berubah.
+    """
+
+    def __init__(self, penyimpanan):
+        super().__init__(penyimpanan.path, jurnal=False)
+        self.db = penyimpanan
+
+    def _tanda_file(self):
+        return self.db.versi()
+
+    @terukur('produk.baca')
+    def segarkan(self):
+        tanda = self._tanda_file()
+        if tanda == self._tanda:
+            return self.produk
+        self.produk = self.db.daftar_produk()
+        self._bangun_indeks()
+        self._tanda = tanda
+        hitung(baris=len(self.produk))
+        return self.produk
+
+    def cari(self, key):
+        return self.db.cari_produk(key)
+
+    def simpan(self):
+        self.db.ganti_semua_produk(self.produk)
+        self._tanda = None
+
+    def kompaksi(self):
+        self.simpan()
+
+    def catat_banyak(self, prods):
+        self.db.simpan_produk(prods)
+        self._tanda = None
+
+    def tambah(self, produk, tulis=True):
+        self.produk.append(produk)
+        if produk['id']:
+            self.by_id.setdefault(produk['id'], produk)
+        if produk['nama']:
+            self.by_nama.setdefault(produk['nama'].casefold(), produk)
+        if self._indeks_cari is not None:
+            self._indeks_cari.tambah(produk)
+        if tulis:
+            self.catat_banyak([produk])
+
+    def hapus(self, produk):
+        self.db.hapus_produk(produk['id'])
+        self._tanda = None
+
+
+_db = None
+
+def db():
+    global _db
+    if _db is None:
+        _db = PenyimpananSQLite(SQLITE_FILE)
+    return _db
+
+if BACKEND == 'sqlite':
+    katalog = KatalogSQLite(db())
+
+def migrasi_ke_sqlite(path=None, ukuran_batch=10000):
+    """Salin pengguna.csv, produk.csv (+jurnal) dan transaksi.csv ke SQLite."""
+    tujuan = PenyimpananSQLite(path or SQLITE_FILE)
+    hasil = {}
+    # Lewat RepoPengguna agar tombstone (__dihapus__) dan baris lama per username diterapkan.
+    users = RepoPengguna(PENGGUNA_FILE).segarkan()
+    tujuan.tulis_pengguna(users)
+    hasil['pengguna'] = len(users)
+    prods = KatalogProduk(produk_path).segarkan()
+    tujuan.ganti_semua_produk(prods)
+    hasil['produk'] = len(prods)
+    hasil['transaksi'] = 0
+    with tujuan.transaksi_db() as conn:
+        conn.execute('DELETE FROM transaksi')
+    ensure_csv(TRANSAKSI_FILE, TRANSAKSI_HEADER)
+    with open(TRANSAKSI_FILE, newline='', encoding='utf-8') as f:
+        rows = ([r.get(h, '') for h in TRANSAKSI_HEADER] for r in csv.DictReader(f))
+        while True:
+            batch = list(itertools.islice(rows, ukuran_batch))
+            if not batch:
+                break
+            tujuan.catat_transaksi(batch)
+            hasil['transaksi'] += len(batch)
+    tujuan.bangun_ulang_ringkasan()
+    return hasil
+
+def cetak_transaksi(row):
+    print(f"- Waktu: {row.get('waktu','')}  Produk: {row.get('nama','')} x{row.get('stok','')}  Harga: Rp{row.get('harga','')}  Total: Rp{row.get('total','')} ")
+
+# Daftar berhalaman: fungsi iter_*/halaman_* hanya mengambil data (generator,
+# berhenti setelah halaman yang diminta), fungsi tampilkan_* yang mencetak.
+
+def ambil_halaman(items, nomor=1, per_halaman=20):
+    """Satu halaman dari iterable; hanya dibaca sampai akhir halaman itu (+1 untuk cek lanjutan)."""
+    nomor = max(1, nomor)
+    mulai = (nomor - 1) * per_halaman
+    isi = list(itertools.islice(items, mulai, mulai + per_halaman + 1))
+    return {'halaman': nomor, 'per_halaman': per_halaman,
+            'isi': isi[:per_halaman], 'ada_berikutnya': len(isi) > per_halaman}
+
+def _halaman_urut(items, nomor, per_halaman, kunci, turun):
+    """Halaman dari data terurut tanpa mengurutkan semuanya: heap sebesar nomor*per_halaman."""
+    if kunci is not None:
+        pilih = heapq.nlargest if turun else heapq.nsmallest
+        items = iter(pilih(max(1, nomor) * per_halaman + 1, items, key=kunci))
+    return ambil_halaman(items, nomor, per_halaman)
+
+URUTAN_PRODUK = {
+    'id': lambda p: p['id'],
+    'nama': lambda p: p['nama'].casefold(),
+    'harga': lambda p: p['harga'],
+    'stok': lambda p: p['stok'],
+}
+
+def iter_produk(teks=None, min_harga=None, maks_harga=None, min_stok=None, maks_stok=None, path=None):
+    """Produk katalog yang lolos filter, dalam urutan file."""
+    teks = (teks or '').casefold()
+    for p in katalog_untuk(path or produk_path).segarkan():
+        if teks and teks not in p['nama'].casefold():
+            continue
+        if min_harga is not None and p['harga'] < min_harga:
+            continue
+        if maks_harga is not None and p['harga'] > maks_harga:
+            continue
+        if min_stok is not None and p['stok'] < min_stok:
+            continue
+        if maks_stok is not None and p['stok'] > maks_stok:
+            continue
+        yield p
+
+def halaman_produk(nomor=1, per_halaman=20, urut=None, turun=False, **filter):
+    """Satu halaman produk; urut: 'id', 'nama', 'harga' atau 'stok'."""
+    kunci = URUTAN_PRODUK[urut] if urut else None
+    return _halaman_urut(iter_produk(**filter), nomor, per_halaman, kunci, turun)
+
+def iter_pengguna(peran=None, awalan=None, path=PENGGUNA_FILE):
+    awalan = (awalan or '').casefold()
+    for u, v in read_all_users(path).items():
+        role = v.get('role', 'user')
+        if peran and role != peran:
+            continue
+        if awalan and not u.casefold().startswith(awalan):
+            continue
+        yield {'username': u, 'role': role}
+
+def halaman_pengguna(nomor=1, per_halaman=20, peran=None, awalan=None):
+    """Satu halaman pengguna, urut username."""
+    return _halaman_urut(iter_pengguna(peran, awalan), nomor, per_halaman,
+                         lambda u: u['username'].casefold(), False)
+
+def _baris_mundur(path, ukuran_blok=65536):
+    """Baris file teks dari belakang ke depan, dibaca per blok."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        posisi = f.tell()
+        sisa = b''
+        while posisi > 0:
+            baca = min(ukuran_blok, posisi)
+            posisi -= baca
+            f.seek(posisi)
+            blok = f.read(baca) + sisa
+            baris = blok.split(b'\n')
+            sisa = baris[0]
+            for b in reversed(baris[1:]):
+                if b.strip():
+                    yield b.decode('utf-8')
+        if sisa.strip():
+            yield sisa.decode('utf-8')
+
+def iter_transaksi(username=None, mulai=None, akhir=None, terbaru_dulu=True):
+    """Transaksi dari backend aktif, opsional per username dan rentang tanggal (YYYY-MM-DD, inklusif)."""
+    akhir_kunci = akhir + '~' if akhir else None  # '~' setelah jam: seluruh hari akhir ikut
+    if BACKEND == 'sqlite':
+        yield from db().iter_riwayat(username, mulai, akhir_kunci, terbaru_dulu)
+        return
+    if MODE_SEGMEN:
+        yield from segmen_transaksi.baca(mulai, akhir_kunci, username, terbaru_dulu)
+        return
+    if not os.path.exists(TRANSAKSI_FILE):
+        return
+    if username:
+        rows = indeks_untuk(TRANSAKSI_FILE).iter_riwayat(username, terbaru_dulu)
+    elif terbaru_dulu:
+        rows = (dict(zip(TRANSAKSI_HEADER, r)) for r in csv.reader(_baris_mundur(TRANSAKSI_FILE)))
+    else:
+        rows = _baris_csv(TRANSAKSI_FILE)
+    for row in rows:
+        waktu = row.get('waktu', '')
+        if waktu == 'waktu':
+            continue
+        if mulai and waktu < mulai:
+            if terbaru_dulu:
+                return
+            continue
+        if akhir_kunci and waktu > akhir_kunci:
+            if terbaru_dulu:
+                continue
+            return
+        yield row
+
+def _baris_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def halaman_transaksi(nomor=1, per_halaman=20, username=None, mulai=None, akhir=None, terbaru_dulu=True):
+    return ambil_halaman(iter_transaksi(username, mulai, akhir, terbaru_dulu), nomor, per_halaman)
+
+def tampilkan_berhalaman(ambil, render, judul, kosong):
+    """Pager interaktif: ambil(nomor) -> halaman, render(item) mencetak satu baris."""
+    nomor = 1
+    while True:
+        h = ambil(nomor)
+        if not h['isi']:
+            print(kosong if nomor == 1 else "Tidak ada data lagi.")
+            return
+        print(f"{judul} (halaman {nomor})")
+        for item in h['isi']:
+            render(item)
+        pilihan = []
+        if h['ada_berikutnya']:
+            pilihan.append("[n] berikutnya")
+        if nomor > 1:
+            pilihan.append("[p] sebelumnya")
+        if not pilihan:
+            return
+        cmd = input(', '.join(pilihan) + ", Enter untuk selesai: ").strip().lower()
+        if cmd == 'n' and h['ada_berikutnya']:
+            nomor += 1
+        elif cmd == 'p' and nomor > 1:
+            nomor -= 1
+        else:
+            return
+
+def cetak_produk(p):
+    print(f"- ID:{p['id']}  {p['nama']}  (Rp{p['harga']:,})  Stok:{p['stok']}")
+
+def _tanya_urutan():
+    pilih = input("Urutkan (nama/harga/stok, awali '-' untuk menurun; Enter = urutan asli): ").strip().lower()
+    turun = pilih.startswith('-')
+    urut = pilih.lstrip('-')
+    if urut and urut not in URUTAN_PRODUK:
+        print("Urutan tidak dikenal, memakai urutan asli.")
+        urut = ''
+    teks = input("Filter nama (Enter = semua): ").strip()
+    return urut or None, turun, teks or None
+
+def tampilkan_produk(path=produk_path):
+    urut, turun, teks = _tanya_urutan()
+    tampilkan_berhalaman(lambda n: halaman_produk(n, urut=urut, turun=turun, teks=teks, path=path),
+                         cetak_produk, "Daftar Produk", "Belum ada produk terdaftar di produk.csv.")
+
+def tampilkan_pengguna():
+    tampilkan_berhalaman(halaman_pengguna, lambda u: print("-", u['username'], "(", u['role'], ")"),
+                         "Daftar pengguna", "Belum ada pengguna.")
+
+def riwayat_transaksi():
+    mulai = input("Dari tanggal (YYYY-MM-DD, Enter = semua): ").strip() or None
+    akhir = input("Sampai tanggal (YYYY-MM-DD, Enter = semua): ").strip() or None
+    tampilkan_berhalaman(lambda n: halaman_transaksi(n, username=pengguna_sekarang or None, mulai=mulai, akhir=akhir),
+                         cetak_transaksi, "Riwayat Transaksi", "Belum ada riwayat transaksi.")
+
+def pilih_produk(kat, key):
+    """Cari produk persis; bila tidak ada, tawarkan saran dari indeks pencarian."""
+    produk = kat.cari(key)
+    if produk or not key:
+        return produk
+    saran = kat.cari_mirip(key)
+    if not saran:
+        return None
+    print("Produk tidak ditemukan persis. Mungkin maksud Anda:")
+    for i, p in enumerate(saran, 1):
+        print(f"{i}. {p['nama']} (ID:{p['id']})  Rp{p['harga']:,}  Stok:{p['stok']}")
+    pilih = input("Pilih nomor (Enter untuk batal): ").strip()
+    if pilih.isdigit() and 1 <= int(pilih) <= len(saran):
+        return saran[int(pilih) - 1]
+    return None
+
+def transaksi():
+    prods = load_products(produk_path)
+    if not prods:
+        print("Tidak ada produk terdaftar di produk.csv.")
+        return
+
+    nama = input("Masukkan nama produk (atau id): ").strip()
+    produk = pilih_produk(katalog, nama)
+
+    if not produk:
+        print("Produk tidak ditemukan.")
+        return
+
+    try:
+        stok = int(input("Masukkan jumlah: ").strip())
+    except ValueError:
+        print("Jumlah harus berupa angka.")
+        return
+
+    if stok <= 0:
+        print("Jumlah harus > 0.")
+        return
+
+    if produk['stok'] < stok:
+        print(f"Stok tidak cukup. Stok saat ini: {produk['stok']}")
+        return
+
+    total = produk['harga'] * stok
+    print(f"Anda membeli: {produk['nama']} x{stok}  Harga satuan: Rp{produk['harga']}  Total: Rp{total}")
+
+
+    konf = input("Konfirmasi bayar? (ya/tidak): ").strip().lower()
+    if konf != 'ya':
+        print("Transaksi dibatalkan.")
+        return
+
+    berhasil, pesan = beli(pengguna_sekarang, produk['id'] or produk['nama'], stok)
+    print(pesan)
+
+def transaksi_keranjang():
+    prods = load_products(produk_path)
+    if not prods:
+        print("Tidak ada produk terdaftar di produk.csv.")
+        return
+
+    keranjang = []
+    print("Kosongkan nama produk untuk selesai.")
+    while True:
+        nama = input("Masukkan nama produk (atau id): ").strip()
+        if not nama:
+            break
+        produk = pilih_produk(katalog, nama)
+        if not produk:
+            print("Produk tidak ditemukan.")
+            continue
+        try:
+            jumlah = int(input("Masukkan jumlah: ").strip())
+        except ValueError:
+            print("Jumlah harus berupa angka.")
+            continue
+        if jumlah <= 0:
+            print("Jumlah harus > 0.")
+            continue
+        keranjang.append((produk['id'] or produk['nama'], jumlah))
+        print(f"+ {produk['nama']} x{jumlah}  Subtotal: Rp{produk['harga'] * jumlah}")
+
+    if not keranjang:
+        print("Keranjang kosong.")
+        return
+
+    total = 0
+    katalog.segarkan()
+    isi = []
+    print("Isi keranjang:")
+    for key, jumlah in keranjang:
+        produk = katalog.cari(key)
+        if produk is None:
+            # Bisa dihapus terminal lain selama keranjang diisi.
+            print(f"! Produk '{key}' sudah tidak ada, dikeluarkan dari keranjang.")
+            continue
+        isi.append((key, jumlah))
+        total += produk['harga'] * jumlah
+        print(f"- {produk['nama']} x{jumlah}  Harga satuan: Rp{produk['harga']}")
+    keranjang = isi
+    if not keranjang:
+        print("Keranjang kosong.")
+        return
+    print(f"Total: Rp{total}")
+
+    konf = input("Konfirmasi bayar? (ya/tidak): ").strip().lower()
+    if konf != 'ya':
+        print("Transaksi dibatalkan.")
+        return
+
+    berhasil, pesan = checkout_keranjang(pengguna_sekarang, keranjang)
+    print(pesan)
+
+def tambahkan_produk():
+    try:
+        id_produk = int(input("Masukkan ID produk: ").strip())
+    except ValueError:
+        print("ID produk harus berupa angka.")
+        return
+    nama_produk = input("Masukkan nama produk: ").strip()
+    harga_produk = input("Masukkan harga produk: ").strip()
+    stok_produk = input("Masukkan stok produk: ").strip()
+
+    try:
+        harga_v = int(harga_produk)
+        stok_v = int(stok_produk)
+    except ValueError:
+        print("Harga dan stok harus angka.")
+        return
+
+    with kunci_data():
+        katalog.segarkan()
+        if str(id_produk) in katalog.by_id:
+            print(f"ID produk {id_produk} sudah terdaftar.")
+            return
+        katalog.tambah({'id': str(id_produk), 'nama': nama_produk, 'harga': harga_v, 'stok': stok_v})
+    print("Produk berhasil ditambahkan.")
+
+def _baca_bertahap(sumber, ukuran_chunk):
+    """Baca file CSV atau JSON Lines per potongan berisi dict baris.
+
+    Baris JSON yang bukan objek menimbulkan ValueError.
+    """
+    def objek(nomor, line):
+        r = json.loads(line)
+        if not isinstance(r, dict):
+            raise ValueError(f"Baris {nomor}: harus objek JSON, bukan {type(r).__name__}.")
+        return r
+
+    with open(sumber, newline='', encoding='utf-8') as f:
+        if sumber.endswith(('.jsonl', '.ndjson')):
+            rows = (objek(nomor, line) for nomor, line in enumerate(f, 1) if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        while True:
+            chunk = list(itertools.islice(rows, ukuran_chunk))
+            if not chunk:
+                return
+            yield chunk
+
+def impor_produk(sumber, ukuran_chunk=5000):
+    """Gabungkan produk dari file CSV/JSON Lines ke katalog berdasarkan id.
+
+    File dibaca per potongan sehingga memori hanya sebesar salinan katalog
+    ditambah satu potongan. Produk yang sudah ada diperbarui harga/stok/
+    namanya dan id baru ditambahkan pada salinan; katalog baru diganti dan
+    ditulis sekali di akhir, jadi impor yang gagal di tengah tidak mengubah
+    apa pun.
+    """
+    hasil = {'baru': 0, 'diperbarui': 0, 'duplikat': 0, 'ditolak': 0}
+    terlihat = set()
+    with kunci_data():
+        produk = [dict(p) for p in katalog.segarkan()]
+        by_id = {}
+        for p in produk:
+            if p['id']:
+                by_id.setdefault(p['id'], p)
+        for chunk in _baca_bertahap(sumber, ukuran_chunk):
+            for r in chunk:
+                pid = str(r.get('id') or '').strip()
+                try:
+                    harga = int(r.get('harga') if r.get('harga') not in (None, '') else r.get('price'))
+                    stok = int(r.get('stok') if r.get('stok') not in (None, '') else r.get('stock'))
+                except (TypeError, ValueError):
+                    hasil['ditolak'] += 1
+                    continue
+                if not pid or harga < 0 or stok < 0:
+                    hasil['ditolak'] += 1
+                    continue
+                nama = str(r.get('nama_produk') or r.get('nama') or '').strip()
+                if pid in terlihat:
+                    hasil['duplikat'] += 1
+                terlihat.add(pid)
+                lama = by_id.get(pid)
+                if lama is None:
+                    if not nama:
+                        hasil['ditolak'] += 1
+                        continue
+                    by_id[pid] = {'id': pid, 'nama': nama, 'harga': harga, 'stok': stok}
+                    produk.append(by_id[pid])
+                    hasil['baru'] += 1
+                    continue
+                lama['harga'] = harga
+                lama['stok'] = stok
+                if nama:
+                    lama['nama'] = nama
+                hasil['diperbarui'] += 1
+        katalog.ganti_semua(produk)
+    return hasil
+
+def ekspor_produk(tujuan):
+    """Tulis katalog ke CSV atau JSON Lines baris demi baris."""
+    prods = katalog.segarkan()
+    with open(tujuan, 'w', newline='', encoding='utf-8') as f:
+        if tujuan.endswith(('.jsonl', '.ndjson')):
+            for p in prods:
+                f.write(json.dumps({'id': p['id'], 'nama_produk': p['nama'], 'harga': p['harga'], 'stok': p['stok']}) + '\n')
+        else:
+            writer = csv.writer(f)
+            writer.writerow(PRODUK_HEADER)
+            for p in prods:
+                writer.writerow([p['id'], p['nama'], p['harga'], p['stok']])
+    return len(prods)
+
+def impor_ekspor_produk():
+    print("1. Impor produk dari file (CSV / JSON Lines)")
+    print("2. Ekspor produk ke file (CSV / JSON Lines)")
+    cmd = input("Pilih: ").strip()
+    path = input("Path file: ").strip()
+    if not path:
+        print("Path file tidak boleh kosong.")
+        return
+    try:
+        if cmd == '1':
+            hasil = impor_produk(path)
+            print(f"Impor selesai: {hasil['baru']} baru, {hasil['diperbarui']} diperbarui, "
+                  f"{hasil['duplikat']} duplikat, {hasil['ditolak']} ditolak.")
+        elif cmd == '2':
+            print(f"{ekspor_produk(path)} produk diekspor ke {path}.")
+        else:
+            print("Pilihan tidak valid.")
+    except (OSError, ValueError) as e:
+        print("Gagal memproses file:", e)
+
+def modifikasi_produk(path=produk_path):
+
+    kat = katalog_untuk(path)
+    prods = kat.segarkan()
+    if not prods:
+        print("Tidak ada produk untuk dimodifikasi.")
+        return
+
+    h = halaman_produk(path=path)
+    print("Daftar produk:")
+    for p in h['isi']:
+        cetak_produk(p)
+    if h['ada_berikutnya']:
+        print(f"... dan {len(prods) - len(h['isi'])} produk lain (ketik awalan nama untuk mencari).")
+
+    key = input("Masukkan ID atau nama produk yang ingin dimodifikasi: ").strip()
+    target = pilih_produk(kat, key)
+
+    if not target:
+        print("Produk tidak ditemukan.")
+        return
+
+    print("Kosongkan input untuk menjaga nilai lama.")
+    nama_baru = input(f"Nama [{target['nama']}]: ").strip()
+    harga_baru = input(f"Harga [{target['harga']}]: ").strip()
+    stok_baru = input(f"Stok [{target['stok']}]: ").strip()
+
+    harga_v = stok_v = None
+    if harga_baru:
+        try:
+            harga_v = int(harga_baru)
+        except ValueError:
+            print("Harga tidak valid, perubahan harga diabaikan.")
+    if stok_baru:
+        try:
+            stok_v = int(stok_baru)
+        except ValueError:
+            print("Stok tidak valid, perubahan stok diabaikan.")
+
+    target = ubah_produk(target['id'] or target['nama'], nama_baru or None, harga_v, stok_v, path)
+    if target is None:
+        print("Produk tidak ditemukan.")
+        return
+
+    print(f"Produk '{target.get('nama')}' (ID:{target.get('id')}) berhasil diperbarui.")
+
+def hapus_produk(path=produk_path):
+
+    kat = katalog_untuk(path)
+    rows = kat.segarkan()
+    if not rows:
+        print("Belum ada produk untuk dihapus.")
+        return
+
+    h = halaman_produk(path=path)
+    print("Daftar produk:")
+    for r in h['isi']:
+        cetak_produk(r)
+    if h['ada_berikutnya']:
+        print(f"... dan {len(rows) - len(h['isi'])} produk lain (ketik awalan nama untuk mencari).")
+
+    key = input("Masukkan ID atau nama produk yang ingin dihapus: ").strip()
+    target = pilih_produk(kat, key)
+
+    if target is None:
+        print("Produk tidak ditemukan.")
+        return
+
+    konf = input(f"Yakin ingin menghapus produk '{target['nama']}' (ID:{target['id']})? (ya/tidak): ").strip().lower()
+    if konf != 'ya':
+        print("Penghapusan dibatalkan.")
+        return
+
+    if hapus_produk_id(target['id'] or target['nama'], path) is None:
+        print("Produk tidak ditemukan.")
+        return
+    print("Produk berhasil dihapus.")
+
+def cek_kelembaban_dan_cuaca():
+    
+    print("--- Input Manual Data Irigasi ---")
+
+    while True:
+        try:
+            kelembaban = int(input("Masukkan tingkat kelembaban tanah (0-100, di mana 0 sangat kering): "))
+            if 0 <= kelembaban <= 100:
+                break
+            else:
+                print("⚠️ Kelembaban harus di antara 0 dan 100.")
+        except ValueError:
+            print("⚠️ Masukkan angka yang valid.")
+
+
+    while True:
+        cuaca_input = input("Apakah hari ini turun hujan? (ya/tidak): ").lower()
+        if cuaca_input in ['ya', 'tidak']:
+            cuaca_hujan = (cuaca_input == 'ya')
+            break
+        else:
+            print("⚠️ Masukkan 'ya' atau 'tidak'.")
+
+    return kelembaban, cuaca_hujan
+
+BATAS_KERING = 40
+
+def rekomendasi_irigasi(kelembaban, hujan, batas=BATAS_KERING):
+    """Rekomendasi irigasi sebagai dict, tanpa mencetak apa pun."""
+    if hujan:
+        status = 'hujan'
+    elif kelembaban < batas:
+        status = 'kering'
+    else:
+        status = 'cukup'
+    return {
+        'kelembaban': kelembaban,
+        'hujan': bool(hujan),
+        'batas': batas,
+        'status': status,
+        'irigasi': status == 'kering',
+    }
+
+# Ambang kering per jenis tanaman (persen kelembaban tanah); tanaman yang
+# tidak dikenal memakai BATAS_KERING.
+AMBANG_TANAMAN = {
+    'padi': 60,
+    'jagung': 40,
+    'kedelai': 45,
+    'cabai': 50,
+    'tebu': 35,
+}
+
+def _waktu_detik(teks):
+    try:
+        return float(teks)
+    except ValueError:
+        return datetime.fromisoformat(teks.strip()).timestamp()
+
+def _nilai_hujan(teks):
+    return str(teks).strip().lower() in ('1', 'ya', 'true', 'y', 'hujan')
+
+class KolomSensor:
+    """Pembacaan sensor (field_id, timestamp, kelembaban, hujan) dalam kolom array."""
+
+    def __init__(self):
+        self.lahan = array('q')
+        self.waktu = array('d')
+        self.kelembaban = array('d')
+        self.hujan = array('b')
+        self.kamus_lahan = {}
+        self.tanaman = {}
+
+    @classmethod
+    def dari_baris(cls, rows):
+        k = cls()
+        lahan, waktu, kel, hujan = k.lahan.append, k.waktu.append, k.kelembaban.append, k.hujan.append
+        kamus = k.kamus_lahan
+        for r in rows:
+            if len(r) < 4:
+                continue
+            try:
+                t = _waktu_detik(r[1])
+                v = float(r[2])
+            except (TypeError, ValueError):
+                continue
+            lahan(kamus.setdefault(str(r[0]), len(kamus)))
+            waktu(t)
+            kel(v)
+            hujan(_nilai_hujan(r[3]))
+            if len(r) > 4 and r[4]:
+                k.tanaman[str(r[0])] = str(r[4]).strip().lower()
+        return k
+
+    @classmethod
+    def dari_file(cls, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            kepala = next(reader, None)
+            if kepala and kepala[0].strip().lower() not in ('field_id', 'lahan', 'id'):
+                # File tanpa header: baris pertama adalah data.
+                reader = itertools.chain([kepala], reader)
+            return cls.dari_baris(reader)
+
+def muat_tanaman_lahan(path):
+    """Baca pemetaan field_id -> tanaman dari CSV (field_id,tanaman)."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return {r['field_id']: (r.get('tanaman') or '').strip().lower() for r in csv.DictReader(f) if r.get('field_id')}
+
+def rekomendasi_irigasi_batch(sumber, tanaman_lahan=None, ambang=None):
+    """Evaluasi aturan BATAS_KERING / ambang per tanaman untuk banyak lahan sekaligus.
+
+    sumber: path file CSV, iterable baris, atau KolomSensor. Rekomendasi tiap
+    lahan diambil dari pembacaan terbarunya, disertai min/rata-rata kelembaban.
+    """
+    if isinstance(sumber, KolomSensor):
+        k = sumber
+    elif isinstance(sumber, str):
+        k = KolomSensor.dari_file(sumber)
+    else:
+        k = KolomSensor.dari_baris(sumber)
+    ambang_tanaman = dict(AMBANG_TANAMAN, **(ambang or {}))
+    tanaman = dict(k.tanaman, **(tanaman_lahan or {}))
+    nama_lahan = list(k.kamus_lahan)
+    n = len(nama_lahan)
+    if n == 0:
+        return []
+    batas = [ambang_tanaman.get(tanaman.get(f, ''), BATAS_KERING) for f in nama_lahan]
+
+    if np is not None:
+        lahan = np.frombuffer(k.lahan, dtype=np.int64)
+        waktu = np.frombuffer(k.waktu, dtype=np.float64)
+        kel = np.frombuffer(k.kelembaban, dtype=np.float64)
+        hujan = np.frombuffer(k.hujan, dtype=np.int8).astype(bool)
+        urut = np.lexsort((waktu, lahan))
+        lahan_urut = lahan[urut]
+        terakhir = urut[np.flatnonzero(np.r_[lahan_urut[1:] != lahan_urut[:-1], True])]
+        jumlah_per_lahan = np.bincount(lahan, minlength=n)
+        rata = np.bincount(lahan, weights=kel, minlength=n) / np.maximum(jumlah_per_lahan, 1)
+        minimum = np.full(n, np.inf)
+        np.minimum.at(minimum, lahan, kel)
+        kel_akhir = kel[terakhir]
+        hujan_akhir = hujan[terakhir]
+        irigasi = ~hujan_akhir & (kel_akhir < np.asarray(batas, dtype=np.float64))
+        kolom = zip(lahan[terakhir].tolist(), waktu[terakhir].tolist(), kel_akhir.tolist(),
+                    hujan_akhir.tolist(), irigasi.tolist())
+        hasil = []
+        for kode, t, v, h, ir in kolom:
+            hasil.append((kode, t, v, h, ir, float(rata[kode]), float(minimum[kode]), int(jumlah_per_lahan[kode])))
+    else:
+        akhir = {}
+        statistik = [[0, 0.0, float('inf')] for _ in range(n)]
+        for i, kode in enumerate(k.lahan):
+            v = k.kelembaban[i]
+            st = statistik[kode]
+            st[0] += 1
+            st[1] += v
+            if v < st[2]:
+                st[2] = v
+            j = akhir.get(kode)
+            if j is None or k.waktu[i] >= k.waktu[j]:
+                akhir[kode] = i
+        hasil = []
+        for kode, i in sorted(akhir.items()):
+            v, h = k.kelembaban[i], bool(k.hujan[i])
+            st = statistik[kode]
+            hasil.append((kode, k.waktu[i], v, h, (not h) and v < batas[kode], st[1] / st[0], st[2], st[0]))
+
+    keluaran = []
+    for kode, t, v, h, ir, rata_v, min_v, jumlah in hasil:
+        f = nama_lahan[kode]
+        keluaran.append({
+            'field_id': f,
+            'tanaman': tanaman.get(f, ''),
+            'batas': batas[kode],
+            'waktu': datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S"),
+            'kelembaban': v,
+            'hujan': h,
+            'status': 'hujan' if h else ('kering' if ir else 'cukup'),
+            'irigasi': ir,
+            'rata_kelembaban': round(rata_v, 2),
+            'min_kelembaban': min_v,
+            'pembacaan': jumlah,
+        })
+    return keluaran
+
+def irigasi_batch_menu():
+    path = input("Path file pembacaan sensor (field_id,timestamp,kelembaban,hujan[,tanaman]): ").strip()
+    peta = input("Path file tanaman per lahan (opsional): ").strip()
+    try:
+        hasil = rekomendasi_irigasi_batch(path, muat_tanaman_lahan(peta) if peta else None)
+    except OSError as e:
+        print("Gagal membaca file:", e)
+        return
+    perlu = [h for h in hasil if h['irigasi']]
+    print(f"{len(hasil)} lahan dievaluasi, {len(perlu)} perlu irigasi.")
+    for h in perlu:
+        print(f"💧 {h['field_id']} ({h['tanaman'] or '-'}): kelembaban {h['kelembaban']}% < batas {h['batas']}%")
+
+class JendelaLahan:
+    """Jendela waktu bergulir satu lahan dengan memori terbatas.
+
+    Rata-rata dan tren (kemiringan regresi, %/jam) dihitung dari jumlah
+    berjalan; minimum memakai deque monoton, jadi setiap pembacaan O(1).
+    """
+
+    __slots__ = ('data', 'minimum', 'jumlah', 'sum_t', 'sum_tt', 'sum_tv', 'hujan', 't0', 'aktif')
+
+    def __init__(self):
+        self.data = deque()
+        self.minimum = deque()
+        self.jumlah = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_tv = 0.0
+        self.hujan = 0
+        self.t0 = None
+        self.aktif = False
+
+    def _ubah(self, t, v, h, tanda):
+        x = t - self.t0
+        self.jumlah += tanda * v
+        self.sum_t += tanda * x
+        self.sum_tt += tanda * x * x
+        self.sum_tv += tanda * x * v
+        self.hujan += tanda * h
+
+    def tambah(self, t, v, h, jendela_detik, maks):
+        if self.t0 is None:
+            self.t0 = t
+        item = (t, v, h)
+        self.data.append(item)
+        self._ubah(t, v, h, 1)
+        while self.minimum and self.minimum[-1][1] > v:
+            self.minimum.pop()
+        self.minimum.append(item)
+        while self.data and (len(self.data) > maks or self.data[0][0] < t - jendela_detik):
+            lama = self.data.popleft()
+            self._ubah(*lama, -1)
+            if self.minimum and self.minimum[0] is lama:
+                self.minimum.popleft()
+
+    def rata(self):
+        return self.jumlah / len(self.data)
+
+    def min(self):
+        return self.minimum[0][1]
+
+    def tren(self):
+        n = len(self.data)
+        penyebut = n * self.sum_tt - self.sum_t ** 2
+        if n < 2 or penyebut <= 0:
+            return 0.0
+        return (n * self.sum_tv - self.sum_t * self.jumlah) / penyebut * 3600
+
+
+class PemantauIrigasi:
+    """Keputusan irigasi mulai/berhenti per lahan dengan histeresis.
+
+    Irigasi dimulai saat rata-rata jendela di bawah batas dan tidak ada hujan
+    di jendela; berhenti saat rata-rata melewati batas + histeresis atau
+    turun hujan. Event hanya dikirim ketika status berubah.
+    """
+
+    def __init__(self, jendela_detik=1800, maks_pembacaan=256, histeresis=5.0,
+                 tanaman_lahan=None, ambang=None):
+        self.jendela_detik = jendela_detik
+        self.maks_pembacaan = maks_pembacaan
+        self.histeresis = histeresis
+        self.tanaman_lahan = tanaman_lahan or {}
+        self.ambang = dict(AMBANG_TANAMAN, **(ambang or {}))
+        self.lahan = {}
+        self.pembacaan = 0
+
+    def batas(self, field_id):
+        return self.ambang.get(self.tanaman_lahan.get(field_id, ''), BATAS_KERING)
+
+    def proses(self, field_id, t, kelembaban, hujan):
+        """Tambahkan satu pembacaan; kembalikan event dict bila status berubah."""
+        self.pembacaan += 1
+        j = self.lahan.get(field_id)
+        if j is None:
+            j = self.lahan[field_id] = JendelaLahan()
+        j.tambah(t, kelembaban, 1 if hujan else 0, self.jendela_detik, self.maks_pembacaan)
+        batas = self.batas(field_id)
+        rata = j.rata()
+        if not j.aktif and j.hujan == 0 and rata < batas:
+            j.aktif = True
+            aksi = 'mulai'
+        elif j.aktif and (j.hujan > 0 or rata >= batas + self.histeresis):
+            j.aktif = False
+            aksi = 'berhenti'
+        else:
+            return None
+        return {
+            'field_id': field_id,
+            'waktu': datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S"),
+            'aksi': aksi,
+            'batas': batas,
+            'rata_kelembaban': round(rata, 2),
+            'min_kelembaban': j.min(),
+            'tren_per_jam': round(j.tren(), 3),
+            'hujan_di_jendela': j.hujan,
+        }
+
+
+def parse_pembacaan(line):
+    """Baris 'field_id,timestamp,kelembaban,hujan' atau objek JSON -> tuple, atau None."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line.startswith('{'):
+            d = json.loads(line)
+            return str(d['field_id']), _waktu_detik(str(d['timestamp'])), float(d['kelembaban']), _nilai_hujan(d.get('hujan', 0))
+        r = next(csv.reader([line]))
+        return r[0], _waktu_detik(r[1]), float(r[2]), _nilai_hujan(r[3])
+    except (KeyError, IndexError, ValueError, json.JSONDecodeError):
+        return None
+
+def baris_sumber(sumber, ikuti=False, berhenti=None):
+    """Iterasi baris dari file/FIFO, 'unix:/path/socket' atau 'tcp:host:port'.
+
+    Untuk socket, program mendengarkan dan menerima satu koneksi per kali.
+    ikuti=True membuat file dibaca terus seperti tail -f.
+    """
+    if sumber.startswith(('unix:', 'tcp:')):
+        if sumber.startswith('unix:'):
+            path = sumber[5:]
+            if os.path.exists(path):
+                os.remove(path)
+            srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            srv.bind(path)
+        else:
+            host, _, port = sumber[4:].rpartition(':')
+            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            srv.bind((host or '127.0.0.1', int(port)))
+        srv.listen(8)
+        srv.settimeout(0.5)
+        with srv:
+            while not (berhenti and berhenti.is_set()):
+                try:
+                    conn, _ = srv.accept()
+                except socket.timeout:
+                    continue
+                with conn, conn.makefile('r', encoding='utf-8', newline='') as f:
+                    yield from f
+        return
+    with open(sumber, encoding='utf-8', newline='') as f:
+        while not (berhenti and berhenti.is_set()):
+            line = f.readline()
+            if line.endswith('\n'):
+                yield line
+            elif not ikuti:
+                if line:
+                    yield line
+                return
+            else:
+                # Baris belum lengkap atau belum ada data baru: tunggu penulis.
+                if line:
+                    f.seek(f.tell() - len(line.encode('utf-8')))
+                time.sleep(0.2)
+
+def pantau_sensor(sumber, pemantau=None, kirim=print, ikuti=False, ukuran_antrian=10000,
+                  interval_laporan=5.0, seri=None, ukuran_batch=5000):
+    """Pipeline ingest: thread pembaca -> antrian terbatas -> pemantau -> event.
+
+    Antrian berukuran tetap memberi backpressure: bila pemrosesan tertinggal,
+    thread pembaca berhenti membaca sampai ada ruang. Mengembalikan metrik
+    akhir (pembacaan, event, pembacaan/detik). Bila seri (SeriSensor) diberikan,
+    pembacaan juga disimpan per batch ke riwayat sensor.
+    """
+    pemantau = pemantau or PemantauIrigasi()
+    antrian = queue.Queue(maxsize=ukuran_antrian)
+    berhenti = threading.Event()
+    SELESAI = object()
+
+    def pembaca():
+        try:
+            for line in baris_sumber(sumber, ikuti, berhenti):
+                antrian.put(line)
+        finally:
+            antrian.put(SELESAI)
+
+    thread = threading.Thread(target=pembaca, daemon=True)
+    thread.start()
+    mulai = laporan_terakhir = time.perf_counter()
+    diproses = ditolak = event = 0
+    batch = []
+    try:
+        while True:
+            line = antrian.get()
+            if line is SELESAI:
+                break
+            bacaan = parse_pembacaan(line)
+            if bacaan is None:
+                ditolak += 1
+                continue
+            diproses += 1
+            if seri is not None:
+                batch.append(bacaan)
+                if len(batch) >= ukuran_batch:
+                    seri.tambah_banyak(batch)
+                    batch = []
+            hasil = pemantau.proses(*bacaan)
+            if hasil is not None:
+                event += 1
+                kirim(json.dumps(hasil, ensure_ascii=False))
+            sekarang = time.perf_counter()
+            if interval_laporan and sekarang - laporan_terakhir >= interval_laporan:
+                laporan_terakhir = sekarang
+                kirim(json.dumps({'metrik': {'pembacaan': diproses,
+                                             'pembacaan_per_detik': round(diproses / (sekarang - mulai), 1),
+                                             'antrian': antrian.qsize()}}))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        berhenti.set()
+        if batch:
+            seri.tambah_banyak(batch)
+    durasi = time.perf_counter() - mulai
+    return {
+        'pembacaan': diproses,
+        'ditolak': ditolak,
+        'event': event,
+        'lahan': len(pemantau.lahan),
+        'detik': round(durasi, 3),
+        'pembacaan_per_detik': round(diproses / durasi, 1) if durasi else 0.0,
+    }
+
+# Penjadwalan irigasi multi-hari: kelembaban tiap lahan disimulasikan per hari
+# (susut harian, tambahan dari prakiraan hujan, irigasi), lalu air dibagi
+# dengan antrian prioritas ke lahan yang paling defisit, dibatasi kapasitas
+# pompa per hari dan anggaran air total.
+
+JADWAL_FILE = os.path.join(DATA_ADMIN_DIR, 'jadwal_irigasi.json')
+PERSEN_PER_MM_HUJAN = 0.5
+MARGIN_IRIGASI = 15
+LITER_PER_PERSEN = 100.0
+
+def muat_lahan_jadwal(path):
+    """CSV field_id,kelembaban,laju_susut[,tanaman][,liter_per_persen] -> list dict."""
+    lahan = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for r in csv.DictReader(f):
+            try:
+                lahan.append({
+                    'field_id': r['field_id'].strip(),
+                    'kelembaban': float(r['kelembaban']),
+                    'laju_susut': float(r['laju_susut']),
+                    'tanaman': (r.get('tanaman') or '').strip().lower(),
+                    'liter_per_persen': float(r.get('liter_per_persen') or LITER_PER_PERSEN),
+                })
+            except (KeyError, TypeError, ValueError):
+                continue
+    return lahan
+
+def muat_prakiraan(path):
+    """CSV tanggal,hujan_mm[,field_id] -> {(tanggal, field_id atau ''): mm}."""
+    prakiraan = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for r in csv.DictReader(f):
+            try:
+                kunci = (r['tanggal'].strip(), (r.get('field_id') or '').strip())
+                prakiraan[kunci] = prakiraan.get(kunci, 0.0) + float(r['hujan_mm'])
+            except (KeyError, TypeError, ValueError):
+                continue
+    return prakiraan
+
+def _sidik_lahan(l, tanggal, prakiraan):
+    hujan = [prakiraan.get((t, l['field_id']), prakiraan.get((t, ''), 0.0)) for t in tanggal]
+    teks = json.dumps([l['kelembaban'], l['laju_susut'], l['tanaman'], l['liter_per_persen'], hujan])
+    return hashlib.sha1(teks.encode('utf-8')).hexdigest()
+
+def jadwalkan_irigasi(lahan, prakiraan=None, kapasitas_pompa=50000.0, anggaran_air=None, hari=7,
+                      mulai=None, ambang=None, tetap=None):
+    """Susun jadwal irigasi `hari` hari untuk daftar lahan (hasil muat_lahan_jadwal).
+
+    Setiap hari, lahan yang akan jatuh di bawah batas tanamannya dimasukkan ke
+    heap berdasarkan defisit; air dialokasikan dari defisit terbesar sampai
+    kapasitas pompa hari itu atau anggaran habis. Bila kebutuhan besok melebihi
+    kapasitas, sisa kapasitas hari ini dipakai untuk mengairi lebih awal.
+    tetap: {field_id: [liter per hari]} yang dipakai apa adanya (re-plan inkremental).
+    """
+    prakiraan = prakiraan or {}
+    tetap = tetap or {}
+    mulai = mulai or date.today()
+    tanggal = [(mulai + timedelta(days=i)).isoformat() for i in range(hari)]
+    ambang_tanaman = dict(AMBANG_TANAMAN, **(ambang or {}))
+    n = len(lahan)
+    batas = [ambang_tanaman.get(l['tanaman'], BATAS_KERING) for l in lahan]
+    target = [min(100.0, b + MARGIN_IRIGASI) for b in batas]
+    laju = [l['laju_susut'] for l in lahan]
+    lpp = [l['liter_per_persen'] for l in lahan]
+    kel = [l['kelembaban'] for l in lahan]
+    hujan = [[PERSEN_PER_MM_HUJAN * prakiraan.get((t, l['field_id']), prakiraan.get((t, ''), 0.0))
+              for t in tanggal] for l in lahan]
+    idx_tetap = [i for i, l in enumerate(lahan) if l['field_id'] in tetap]
+    sisa_anggaran = float('inf') if anggaran_air is None else float(anggaran_air)
+    for i in idx_tetap:
+        sisa_anggaran -= sum(tetap[lahan[i]['field_id']])
+
+    jadwal = []
+    pemakaian = {}
+    hari_kurang = 0
+
+    def beri(i, d, liter):
+        nonlocal sisa_anggaran
+        sebelum = kel[i]
+        kel[i] = min(100.0, kel[i] + liter / lpp[i])
+        sisa_anggaran -= liter
+        jadwal.append({'tanggal': tanggal[d], 'field_id': lahan[i]['field_id'], 'liter': round(liter, 1),
+                       'kelembaban_sebelum': round(sebelum, 2), 'kelembaban_sesudah': round(kel[i], 2)})
+        return liter
+
+    for d in range(hari):
+        # Kelembaban akhir hari tanpa irigasi.
+        for i in range(n):
+            kel[i] = max(0.0, min(100.0, kel[i] - laju[i] + hujan[i][d]))
+        kapasitas = kapasitas_pompa
+        for i in idx_tetap:
+            liter = tetap[lahan[i]['field_id']][d]
+            if liter > 0:
+                kapasitas -= beri(i, d, liter)
+        sisa_anggaran += sum(tetap[lahan[i]['field_id']][d] for i in idx_tetap)
+
+        besok = d + 1 < hari
+        heap = []
+        kebutuhan_besok = 0.0
+        for i in range(n):
+            if lahan[i]['field_id'] in tetap:
+                continue
+            if kel[i] < batas[i]:
+                hujan_besok = hujan[i][d + 1] if besok else 0.0
+                persen = max(batas[i] - kel[i], target[i] - kel[i] - hujan_besok)
+                heap.append((kel[i] - batas[i], i, persen * lpp[i]))
+            elif besok:
+                lusa = kel[i] - laju[i] + hujan[i][d + 1]
+                if lusa < batas[i]:
+                    kebutuhan_besok += (batas[i] - lusa) * lpp[i]
+        heapq.heapify(heap)
+        while heap and kapasitas > 0 and sisa_anggaran > 0:
+            _, i, liter = heapq.heappop(heap)
+            kapasitas -= beri(i, d, min(liter, kapasitas, sisa_anggaran))
+
+        if besok and kapasitas > 0 and sisa_anggaran > 0 and kebutuhan_besok > kapasitas_pompa:
+            maju = []
+            for i in range(n):
+                if lahan[i]['field_id'] in tetap or kel[i] < batas[i]:
+                    continue
+                lusa = kel[i] - laju[i] + hujan[i][d + 1]
+                if lusa < batas[i]:
+                    maju.append((lusa - batas[i], i, (target[i] - lusa) * lpp[i]))
+            heapq.heapify(maju)
+            while maju and kapasitas > 0 and sisa_anggaran > 0:
+                _, i, liter = heapq.heappop(maju)
+                liter = min(liter, (100.0 - kel[i]) * lpp[i], kapasitas, sisa_anggaran)
+                if liter > 0:
+                    kapasitas -= beri(i, d, liter)
+
+        pemakaian[tanggal[d]] = round(kapasitas_pompa - kapasitas, 1)
+        hari_kurang += sum(1 for i in range(n) if kel[i] < batas[i])
+
+    return {
+        'mulai': tanggal[0] if tanggal else mulai.isoformat(),
+        'hari': hari,
+        'kapasitas_pompa': kapasitas_pompa,
+        'anggaran_air': anggaran_air,
+        'jadwal': jadwal,
+        'pemakaian_harian': pemakaian,
+        'total_liter': round(sum(pemakaian.values()), 1),
+        'hari_lahan_kurang': hari_kurang,
+        'akhir': {l['field_id']: round(kel[i], 2) for i, l in enumerate(lahan)},
+    }
+
+def rencanakan_irigasi(lahan, prakiraan=None, kapasitas_pompa=50000.0, anggaran_air=None, hari=7,
+                       mulai=None, path=None):
+    """Jadwalkan lalu simpan ke jadwal_irigasi.json; re-plan memakai jadwal lama.
+
+    Lahan yang data dan prakiraannya tidak berubah sejak jadwal terakhir (tanggal
+    mulai, horizon, dan batas yang sama) tetap memakai alokasi lamanya; hanya
+    lahan lain yang dijadwalkan ulang di sisa kapasitas.
+    """
+    path = path or JADWAL_FILE
+    mulai = mulai or date.today()
+    tanggal = [(mulai + timedelta(days=i)).isoformat() for i in range(hari)]
+    sidik = {l['field_id']: _sidik_lahan(l, tanggal, prakiraan or {}) for l in lahan}
+    parameter = {'mulai': tanggal[0] if tanggal else None, 'hari': hari,
+                 'kapasitas_pompa': kapasitas_pompa, 'anggaran_air': anggaran_air}
+    lama = None
+    try:
+        with open(path, encoding='utf-8') as f:
+            lama = json.load(f)
+    except (OSError, ValueError):
+        pass
+    tetap = {}
+    if lama and lama.get('parameter') == parameter:
+        posisi = {t: d for d, t in enumerate(tanggal)}
+        for f, s in lama.get('sidik', {}).items():
+            if sidik.get(f) == s:
+                tetap[f] = [0.0] * hari
+        for j in lama.get('jadwal', []):
+            if j['field_id'] in tetap:
+                tetap[j['field_id']][posisi[j['tanggal']]] += j['liter']
+    hasil = jadwalkan_irigasi(lahan, prakiraan, kapasitas_pompa, anggaran_air, hari, mulai, tetap=tetap)
+    hasil['dipakai_ulang'] = len(tetap)
+    hasil['dijadwalkan'] = len(lahan) - len(tetap)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(hasil, parameter=parameter, sidik=sidik), f)
+    os.replace(tmp, path)
+    return hasil
+
+def penjadwalan_irigasi_menu():
+    path_lahan = input("Path file lahan (field_id,kelembaban,laju_susut[,tanaman][,liter_per_persen]): ").strip()
+    path_prakiraan = input("Path file prakiraan hujan (tanggal,hujan_mm[,field_id], opsional): ").strip()
+    try:
+        kapasitas = float(input("Kapasitas pompa per hari (liter): ").strip())
+        anggaran = input("Anggaran air total (liter, kosongkan jika tanpa batas): ").strip()
+        anggaran = float(anggaran) if anggaran else None
+        hari = int(input("Jumlah hari (default 7): ").strip() or 7)
+    except ValueError:
+        print("Masukkan angka yang valid.")
+        return
+    try:
+        lahan = muat_lahan_jadwal(path_lahan)
+        prakiraan = muat_prakiraan(path_prakiraan) if path_prakiraan else {}
+    except OSError as e:
+        print("Gagal membaca file:", e)
+        return
+    hasil = rencanakan_irigasi(lahan, prakiraan, kapasitas, anggaran, hari)
+    print(f"Jadwal {hasil['hari']} hari mulai {hasil['mulai']} untuk {len(lahan)} lahan "
+          f"({hasil['dipakai_ulang']} dipakai ulang), total {hasil['total_liter']} liter.")
+    for t, liter in hasil['pemakaian_harian'].items():
+        jumlah = sum(1 for j in hasil['jadwal'] if j['tanggal'] == t)
+        print(f"- {t}: {jumlah} lahan, {liter} liter")
+    if hasil['hari_lahan_kurang']:
+        print(f"⚠️ {hasil['hari_lahan_kurang']} hari-lahan tetap di bawah batas (kapasitas/anggaran kurang).")
+
+# Riwayat sensor: tiap lahan punya tiga file kolom biner (waktu float64,
+# kelembaban float32, hujan uint8) yang hanya ditambah di akhir, plus rollup
+# per jam dan per hari berupa record lebar tetap. Pembacaan memakai mmap, jadi
+# rentang waktu bisa diambil sebagai memoryview tanpa parsing teks.
+
+SENSOR_DIR = os.path.join(DATA_ADMIN_DIR, 'sensor')
+KOLOM_SENSOR = (('waktu', 'd'), ('kelembaban', 'f'), ('hujan', 'B'))
+ROLLUP = struct.Struct('<qqdddq')  # awal bucket, jumlah, total, min, max, hujan
+RESOLUSI_ROLLUP = {'jam': 3600, 'hari': 86400}
+
+
+class SeriSensor:
+    """Penyimpanan time-series kelembaban/hujan per lahan berbasis mmap."""
+
+    def __init__(self, direktori=None):
+        self.direktori = direktori or SENSOR_DIR
+        self._peta = {}
+        self._akhir = {}
+
+    def _path(self, field_id, akhiran):
+        return os.path.join(self.direktori, quote(str(field_id), safe='') + '.' + akhiran)
+
+    def lahan(self):
+        try:
+            nama = os.listdir(self.direktori)
+        except FileNotFoundError:
+            return []
+        return sorted(unquote(n[:-6]) for n in nama if n.endswith('.waktu'))
+
+    def _mmap(self, path):
+        """mmap read-only yang dipetakan ulang bila ukuran file berubah."""
+        try:
+            ukuran = os.path.getsize(path)
+        except FileNotFoundError:
+            return b''
+        lama = self._peta.get(path)
+        if lama is not None and len(lama) == ukuran:
+            return lama
+        if ukuran == 0:
+            return b''
+        with open(path, 'rb') as f:
+            peta = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # mmap lama tidak ditutup: memoryview yang sudah diberikan masih memakainya.
+        self._peta[path] = peta
+        return peta
+
+    def _kolom(self, field_id, nama, kode):
+        buf = self._mmap(self._path(field_id, nama))
+        n = len(buf) // array(kode).itemsize
+        return memoryview(buf)[:n * array(kode).itemsize].cast(kode)
+
+    def _pulihkan(self, field_id):
+        """Samakan panjang kolom setelah crash di tengah penulisan, lalu rapikan rollup."""
+        panjang = []
+        for nama, kode in KOLOM_SENSOR:
+            try:
+                panjang.append(os.path.getsize(self._path(field_id, nama)) // array(kode).itemsize)
+            except FileNotFoundError:
+                panjang.append(0)
+        n = min(panjang)
+        for (nama, kode), p in zip(KOLOM_SENSOR, panjang):
+            if p != n:
+                with open(self._path(field_id, nama), 'r+b') as f:
+                    f.truncate(n * array(kode).itemsize)
+        waktu = self._kolom(field_id, 'waktu', 'd')
+        self._akhir[field_id] = (n * waktu.itemsize, waktu[-1] if n else float('-inf'))
+        for res in RESOLUSI_ROLLUP:
+            # Rollup ditulis setelah data mentah; bila jumlahnya tidak cocok,
+            # penulisan terakhir terputus dan rollup dibangun ulang.
+            buf = self._mmap(self._path(field_id, res))
+            utuh = len(buf) - len(buf) % ROLLUP.size
+            if sum(r[1] for r in ROLLUP.iter_unpack(buf[:utuh])) != n:
+                self._bangun_rollup(field_id, res)
+
+    def _bangun_rollup(self, field_id, res):
+        detik = RESOLUSI_ROLLUP[res]
+        waktu = self._kolom(field_id, 'waktu', 'd')
+        kel = self._kolom(field_id, 'kelembaban', 'f')
+        hujan = self._kolom(field_id, 'hujan', 'B')
+        keluaran = bytearray()
+        i, n = 0, len(waktu)
+        while i < n:
+            awal = int(waktu[i] // detik * detik)
+            j = bisect.bisect_left(waktu, awal + detik, i)
+            potong = kel[i:j]
+            keluaran += ROLLUP.pack(awal, j - i, sum(potong), min(potong), max(potong), sum(hujan[i:j]))
+            i = j
+        tmp = self._path(field_id, res) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(keluaran)
+        os.replace(tmp, self._path(field_id, res))
+
+    def tambah(self, field_id, waktu, kelembaban, hujan):
+        return self.tambah_banyak([(field_id, waktu, kelembaban, hujan)])
+
+    @terukur('sensor.tambah')
+    def tambah_banyak(self, pembacaan):
+        """Tambahkan (field_id, waktu, kelembaban, hujan) secara batch.
+
+        Waktu per lahan harus tidak menurun; pembacaan yang lebih lama dari
+        data terakhir lahan itu dilewati. Mengembalikan jumlah yang disimpan.
+        """
+        per_lahan = {}
+        disimpan = 0
+        with kunci_data():
+            for field_id, t, v, h in pembacaan:
+                field_id = str(field_id)
+                kolom = per_lahan.get(field_id)
+                if kolom is None:
+                    kolom = per_lahan[field_id] = [self._waktu_akhir(field_id)] + [array(kode) for _, kode in KOLOM_SENSOR]
+                if t < kolom[0]:
+                    continue
+                kolom[0] = t
+                kolom[1].append(t)
+                kolom[2].append(v)
+                kolom[3].append(1 if h else 0)
+            for field_id, kolom in per_lahan.items():
+                if not kolom[1]:
+                    continue
+                for (nama, _), arr in zip(KOLOM_SENSOR, kolom[1:]):
+                    with open(self._path(field_id, nama), 'ab') as f:
+                        arr.tofile(f)
+                    hitung(len(arr) * arr.itemsize)
+                self._gabung_rollup(field_id, *kolom[1:])
+                self._akhir[field_id] = (os.path.getsize(self._path(field_id, 'waktu')), kolom[0])
+                disimpan += len(kolom[1])
+        hitung(baris=disimpan)
+        return disimpan
+
+    def _waktu_akhir(self, field_id):
+        """Waktu pembacaan terakhir lahan; file dibaca ulang bila proses lain menambah data."""
+        path = self._path(field_id, 'waktu')
+        tersimpan = self._akhir.get(field_id)
+        if tersimpan is None:
+            os.makedirs(self.direktori, exist_ok=True)
+            self._pulihkan(field_id)
+            tersimpan = self._akhir[field_id]
+        try:
+            ukuran = os.path.getsize(path)
+        except FileNotFoundError:
+            ukuran = 0
+        if ukuran != tersimpan[0]:
+            waktu = self._kolom(field_id, 'waktu', 'd')
+            tersimpan = self._akhir[field_id] = (ukuran, waktu[-1] if len(waktu) else float('-inf'))
+        return tersimpan[1]
+
+    def _gabung_rollup(self, field_id, waktu, kel, hujan):
+        for res, detik in RESOLUSI_ROLLUP.items():
+            path = self._path(field_id, res)
+            try:
+                ukuran = os.path.getsize(path)
+            except FileNotFoundError:
+                ukuran = 0
+            ukuran -= ukuran % ROLLUP.size
+            with open(path, 'r+b' if ukuran else 'wb') as f:
+                sekarang = None
+                if ukuran:
+                    f.seek(ukuran - ROLLUP.size)
+                    sekarang = list(ROLLUP.unpack(f.read(ROLLUP.size)))
+                    posisi = ukuran - ROLLUP.size
+                else:
+                    posisi = 0
+                keluaran = bytearray()
+                for t, v, h in zip(waktu, kel, hujan):
+                    awal = int(t // detik * detik)
+                    if sekarang is not None and sekarang[0] == awal:
+                        sekarang[1] += 1
+                        sekarang[2] += v
+                        sekarang[3] = min(sekarang[3], v)
+                        sekarang[4] = max(sekarang[4], v)
+                        sekarang[5] += h
+                        continue
+                    if sekarang is not None:
+                        keluaran += ROLLUP.pack(*sekarang)
+                    sekarang = [awal, 1, v, v, v, h]
+                keluaran += ROLLUP.pack(*sekarang)
+                f.seek(posisi)
+                f.write(keluaran)
+                hitung(ROLLUP.size + len(keluaran) if ukuran else len(keluaran))
+
+    def rentang(self, field_id, awal=None, akhir=None):
+        """Kolom waktu/kelembaban/hujan untuk awal <= waktu < akhir, sebagai memoryview (zero-copy)."""
+        waktu = self._kolom(field_id, 'waktu', 'd')
+        kel = self._kolom(field_id, 'kelembaban', 'f')
+        hujan = self._kolom(field_id, 'hujan', 'B')
+        n = min(len(waktu), len(kel), len(hujan))
+        i = 0 if awal is None else bisect.bisect_left(waktu, awal, 0, n)
+        j = n if akhir is None else bisect.bisect_left(waktu, akhir, i, n)
+        return {'waktu': waktu[i:j], 'kelembaban': kel[i:j], 'hujan': hujan[i:j]}
+
+    def rollup(self, field_id, resolusi='hari', awal=None, akhir=None):
+        """Agregat per jam/hari dalam rentang waktu, sebagai list dict."""
+        buf = self._mmap(self._path(field_id, resolusi))
+        n = len(buf) // ROLLUP.size
+        bucket = lambda k: ROLLUP.unpack_from(buf, k * ROLLUP.size)[0]
+        cari = range(n)
+        i = 0 if awal is None else bisect.bisect_left(cari, awal - RESOLUSI_ROLLUP[resolusi] + 1, key=bucket)
+        j = n if akhir is None else bisect.bisect_left(cari, akhir, key=bucket)
+        hasil = []
+        for k in range(i, j):
+            t, jumlah, total, v_min, v_max, h = ROLLUP.unpack_from(buf, k * ROLLUP.size)
+            hasil.append({'waktu': datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S"),
+                          'pembacaan': jumlah, 'rata_kelembaban': round(total / jumlah, 2),
+                          'min_kelembaban': round(v_min, 2), 'max_kelembaban': round(v_max, 2),
+                          'hujan': h})
+        return hasil
+
+
+_seri_sensor = None
+
+def seri_sensor():
+    global _seri_sensor
+    if _seri_sensor is None:
+        _seri_sensor = SeriSensor()
+    return _seri_sensor
+
+def tentukan_irigasi(kelembaban, hujan):
+
+    hasil = rekomendasi_irigasi(kelembaban, hujan)
+
+    print("\n--- Analisis dan Rekomendasi ---")
+
+    if hasil['status'] == 'hujan':
+        print("✅ Hari ini turun hujan. Irigasi TIDAK DIPERLUKAN saat ini.")
+    elif hasil['status'] == 'kering':
+        print(f"🔴 Kelembaban tanah ({kelembaban}%) di bawah batas kritis ({BATAS_KERING}%).")
+        print("💧 Rekomendasi: AKTIFKAN SISTEM IRIGASI atau berikan air.")
+    else:
+        print(f"🟢 Kelembaban tanah ({kelembaban}%) cukup baik.")
+        print("🛑 Rekomendasi: TIDAK PERLU IRIGASI saat ini. Periksa lagi nanti.")
+    return hasil
+
+def riwayat_sensor_menu():
+    daftar = seri_sensor().lahan()
+    if not daftar:
+        print("Belum ada riwayat sensor.")
+        return
+    print("Lahan:", ', '.join(daftar))
+    lahan = input("ID lahan: ").strip()
+    resolusi = input("Resolusi (jam/hari, default hari): ").strip().lower() or 'hari'
+    if resolusi not in RESOLUSI_ROLLUP:
+        print("Resolusi tidak dikenal.")
+        return
+    hasil = seri_sensor().rollup(lahan, resolusi)
+    if not hasil:
+        print("Tidak ada data untuk lahan tersebut.")
+        return
+    for r in hasil[-30:]:
+        print(f"{r['waktu']}: rata {r['rata_kelembaban']}% (min {r['min_kelembaban']}, max {r['max_kelembaban']}), "
+              f"{r['pembacaan']} pembacaan, hujan {r['hujan']}x")
+
+def irrigation_menu():
+   
+    while True:
+        catat_menu('irigasi', None)
+        clear_screen()
+        print("=== Menu Irigasi Manual Sederhana ===")
+        print("1. Cek kelembaban & cuaca (manual)")
+        print("2. Rekomendasi banyak lahan dari file sensor")
+        print("3. Jadwal irigasi multi-hari")
+        print("4. Riwayat kelembaban lahan")
+        print("5. Kembali")
+        cmd = input("Pilih: ").strip()
+        catat_menu('irigasi', cmd)
+        if cmd == '1':
+            kelembaban, hujan = cek_kelembaban_dan_cuaca()
+            lahan = input("ID lahan untuk riwayat (Enter = manual): ").strip() or 'manual'
+            seri_sensor().tambah(lahan, time.time(), kelembaban, hujan)
+            tentukan_irigasi(kelembaban, hujan)
+            input("\nTekan Enter untuk kembali ke menu irigasi...")
+        elif cmd == '2':
+            irigasi_batch_menu()
+            input("\nTekan Enter untuk kembali ke menu irigasi...")
+        elif cmd == '3':
+            penjadwalan_irigasi_menu()
+            input("\nTekan Enter untuk kembali ke menu irigasi...")
+        elif cmd == '4':
+            riwayat_sensor_menu()
+            input("\nTekan Enter untuk kembali ke menu irigasi...")
+        elif cmd == '5':
+            catat_menu('irigasi', None)
+            return
+        else:
+            print("Pilihan tidak valid.")
+            input("Tekan Enter untuk mencoba lagi...")
+
+
+# Analitik penjualan: kolom transaksi dimuat ke array (kode kamus untuk
+# string, int64 untuk angka) lalu diagregasi dengan numpy bila tersedia.
+
+def baris_transaksi():
+    """Iterasi baris transaksi [waktu, username, id, nama, stok, harga, total] dari backend aktif."""
+    if BACKEND == 'sqlite':
+        with db()._kunci:
+            yield from db().conn().execute(
+                'SELECT waktu, username, id, nama, stok, harga, total FROM transaksi ORDER BY no')
+        return
+    if MODE_SEGMEN:
+        for row in segmen_transaksi.baca():
+            yield [row.get(h, '') for h in TRANSAKSI_HEADER]
+        return
+    ensure_csv(TRANSAKSI_FILE, TRANSAKSI_HEADER)
+    with open(TRANSAKSI_FILE, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+
+class KolomTransaksi:
+    """Transaksi dalam bentuk kolom: hari/user/produk sebagai kode int64."""
+
+    def __init__(self):
+        self.hari = array('q')
+        self.user = array('q')
+        self.produk = array('q')
+        self.stok = array('q')
+        self.total = array('q')
+        self.kamus_hari = {}
+        self.kamus_user = {}
+        self.kamus_produk = {}
+        self.nama_produk = {}
+
+    @classmethod
+    def dari_baris(cls, rows):
+        """Kodekan baris (list) menjadi kolom.
+
+        Tahap ini masih loop Python per baris: nama produk boleh berisi koma,
+        kutip dan baris baru, jadi transaksi.csv tidak bisa dibaca np.loadtxt.
+        Agregasinya yang divektorisasi; untuk file besar, SISTA_PARALEL
+        membagi tahap ini ke beberapa proses.
+        """
+        k = cls()
+        hari, user, produk, stok, total = k.hari.append, k.user.append, k.produk.append, k.stok.append, k.total.append
+        kh, ku, kp = k.kamus_hari, k.kamus_user, k.kamus_produk
+        for r in rows:
+            if len(r) < 7:
+                continue
+            try:
+                jumlah = int(r[4])
+                nilai = int(r[6])
+            except (TypeError, ValueError):
+                continue
+            hari(kh.setdefault(str(r[0])[:10], len(kh)))
+            user(ku.setdefault(r[1], len(ku)))
+            pid = r[2]
+            produk(kp.setdefault(pid, len(kp)))
+            k.nama_produk[pid] = r[3]
+            stok(jumlah)
+            total(nilai)
+        return k
+
+    def __len__(self):
+        return len(self.total)
+
+    def jumlahkan(self, kode, bobot, n):
+        """Jumlah bobot per kode (bincount)."""
+        if np is not None and len(kode):
+            return np.bincount(np.frombuffer(kode, dtype=np.int64),
+                               weights=np.frombuffer(bobot, dtype=np.int64), minlength=n).astype(np.int64).tolist()
+        hasil = [0] * n
+        for k, b in zip(kode, bobot):
+            hasil[k] += b
+        return hasil
+
+
+def _cocok(r, username=None, mulai=None, akhir_kunci=None, produk=None):
+    """Saringan baris transaksi (list) yang dipakai pemindaian berurutan dan paralel."""
+    if username is not None and (len(r) < 2 or r[1] != username):
+        return False
+    if produk is not None and (len(r) < 3 or r[2] != produk):
+        return False
+    waktu = str(r[0]) if r else ''
+    if mulai and waktu < mulai:
+        return False
+    if akhir_kunci and waktu > akhir_kunci:
+        return False
+    return True
+
+def _agregat_kolom(k):
+    """Jumlah per produk/user/hari dari KolomTransaksi, bentuknya sama dengan pindai_transaksi(agregat=True)."""
+    per_produk = k.jumlahkan(k.produk, k.total, len(k.kamus_produk))
+    qty_produk = k.jumlahkan(k.produk, k.stok, len(k.kamus_produk))
+    per_user = k.jumlahkan(k.user, k.total, len(k.kamus_user))
+    per_hari = k.jumlahkan(k.hari, k.total, len(k.kamus_hari))
+    qty_hari = k.jumlahkan(k.hari, k.stok, len(k.kamus_hari))
+    return {
+        'produk': {pid: [qty_produk[c], per_produk[c]] for pid, c in k.kamus_produk.items()},
+        'user': {u: per_user[c] for u, c in k.kamus_user.items()},
+        'hari': {h: [qty_hari[c], per_hari[c]] for h, c in k.kamus_hari.items()},
+        'nama': k.nama_produk,
+        'baris': len(k),
+    }
+
+def _pindai_rentang(path, awal, akhir, saring, agregat):
+    """Parse baris di [awal, akhir) dan terapkan saringan.
+
+    agregat=False: list baris. agregat=True: jumlah per produk/user/hari
+    menurut urutan kemunculan (lihat _agregat_kolom), dengan aturan lewati
+    baris yang sama seperti KolomTransaksi.dari_baris. Hasilnya kecil, jadi
+    murah dikirim balik dari proses pekerja.
+    """
+    with open(path, 'rb') as f:
+        f.seek(awal)
+        data = f.read(akhir - awal)
+    rows = (r for r in csv.reader(io.StringIO(data.decode('utf-8'), newline='')) if r and _cocok(r, *saring))
+    if not agregat:
+        return list(rows)
+    produk, user, hari, nama = {}, {}, {}, {}
+    n = 0
+    for r in rows:
+        if len(r) < 7:
+            continue
+        try:
+            jumlah = int(r[4])
+            nilai = int(r[6])
+        except ValueError:
+            continue
+        pid = r[2]
+        for tabel, kunci in ((produk, pid), (hari, r[0][:10])):
+            g = tabel.get(kunci)
+            if g is None:
+                tabel[kunci] = [jumlah, nilai]
+            else:
+                g[0] += jumlah
+                g[1] += nilai
+        user[r[1]] = user.get(r[1], 0) + nilai
+        nama[pid] = r[3]
+        n += 1
+    return {'produk': produk, 'user': user, 'hari': hari, 'nama': nama, 'baris': n}
+
+@terukur('transaksi.pindai')
+def pindai_transaksi(username=None, mulai=None, akhir=None, produk=None, agregat=False, pekerja=None):
+    """Pindai seluruh transaksi dengan saringan username/tanggal (YYYY-MM-DD, inklusif)/id produk.
+
+    agregat=False mengembalikan list dict baris urut file; agregat=True
+    mengembalikan jumlah stok/total per produk, user dan hari (urut
+    kemunculan pertama) yang dipakai laporan_penjualan(). Pada backend CSV
+    biasa, berkas besar dipindai paralel (SISTA_PARALEL); backend lain
+    memakai pemindaian berurutan dengan saringan yang sama.
+    """
+    saring = (username, mulai, akhir + '~' if akhir else None, produk)
+    if BACKEND == 'sqlite' or MODE_SEGMEN:
+        rows = (r for r in baris_transaksi() if r and _cocok(r, *saring))
+        if agregat:
+            return _agregat_kolom(KolomTransaksi.dari_baris(rows))
+        return [dict(zip(TRANSAKSI_HEADER, r)) for r in rows]
+    ensure_csv(TRANSAKSI_FILE, TRANSAKSI_HEADER)
+    awal = _awal_data(TRANSAKSI_FILE)
+    ukuran = os.path.getsize(TRANSAKSI_FILE)
+    bagian = _peta_rentang(_pindai_rentang, TRANSAKSI_FILE, awal, ukuran, saring, agregat, pekerja=pekerja)
+    hitung(ukuran - awal)
+    if not agregat:
+        hasil = [dict(zip(TRANSAKSI_HEADER, r)) for rows in bagian for r in rows]
+        hitung(baris=len(hasil))
+        return hasil
+    # Digabung menurut urutan rentang agar urutan kemunculan sama dengan pindaian berurutan.
+    hasil = bagian[0]
+    for b in bagian[1:]:
+        for dim in ('produk', 'hari'):
+            tabel = hasil[dim]
+            for kunci, (jumlah, nilai) in b[dim].items():
+                g = tabel.get(kunci)
+                if g is None:
+                    tabel[kunci] = [jumlah, nilai]
+                else:
+                    g[0] += jumlah
+                    g[1] += nilai
+        tabel = hasil['user']
+        for kunci, nilai in b['user'].items():
+            tabel[kunci] = tabel.get(kunci, 0) + nilai
+        hasil['nama'].update(b['nama'])
+        hasil['baris'] += b['baris']
+    hitung(baris=hasil['baris'])
+    return hasil
+
+
+def _peringkat(pasangan, top=None):
+    pasangan = sorted(pasangan, key=lambda kv: kv[1], reverse=True)
+    return pasangan[:top] if top else pasangan
+
+def _rata_bergerak(nilai, jendela):
+    """Rata-rata bergerak ke belakang; awal deret memakai data yang tersedia."""
+    if np is not None and nilai:
+        x = np.asarray(nilai, dtype=np.float64)
+        kum = np.cumsum(np.concatenate(([0.0], x)))
+        idx = np.arange(1, len(x) + 1)
+        awal = np.maximum(idx - jendela, 0)
+        return ((kum[idx] - kum[awal]) / (idx - awal)).round(2).tolist()
+    hasil = []
+    jumlah = 0
+    for i, v in enumerate(nilai):
+        jumlah += v
+        if i >= jendela:
+            jumlah -= nilai[i - jendela]
+        hasil.append(round(jumlah / min(i + 1, jendela), 2))
+    return hasil
+
+@terukur('laporan.penjualan')
+def laporan_penjualan(top=10, jendela=7, kolom=None, username=None, mulai=None, akhir=None, produk=None):
+    """Pendapatan per produk/user/hari, produk terlaris, dan rata-rata bergerak harian.
+
+    Saringan opsional (username, rentang tanggal, id produk) diterapkan saat
+    memindai, lewat pindai_transaksi() bila pemindaian paralel aktif.
+    """
+    if kolom is not None:
+        a = _agregat_kolom(kolom)
+    elif PEKERJA_PINDAI > 1:
+        a = pindai_transaksi(username, mulai, akhir, produk, agregat=True)
+    else:
+        saring = (username, mulai, akhir + '~' if akhir else None, produk)
+        a = _agregat_kolom(KolomTransaksi.dari_baris(r for r in baris_transaksi() if r and _cocok(r, *saring)))
+    per_produk = a['produk']
+
+    # Deret harian kontinu (hari tanpa penjualan bernilai 0) untuk rata-rata bergerak.
+    harian = {h: tuple(v) for h, v in a['hari'].items()}
+    deret = []
+    valid = sorted(h for h in harian if len(h) == 10 and h[4] == '-')
+    if valid:
+        hari = date.fromisoformat(valid[0])
+        akhir = date.fromisoformat(valid[-1])
+        while hari <= akhir:
+            kunci = hari.isoformat()
+            deret.append((kunci,) + harian.get(kunci, (0, 0)))
+            hari += timedelta(days=1)
+    rata_qty = _rata_bergerak([d[1] for d in deret], jendela)
+    rata_total = _rata_bergerak([d[2] for d in deret], jendela)
+
+    return {
+        'baris': a['baris'],
+        'pendapatan': sum(v[1] for v in per_produk.values()),
+        'per_produk': dict(_peringkat((pid, v[1]) for pid, v in per_produk.items())),
+        'per_user': dict(_peringkat(a['user'].items())),
+        'per_hari': {h: v[1] for h, v in sorted(a['hari'].items())},
+        'terlaris': [{'id': pid, 'nama': a['nama'].get(pid, ''), 'stok': q, 'total': per_produk[pid][1]}
+                     for pid, q in _peringkat(((pid, v[0]) for pid, v in per_produk.items()), top)],
+        'rata_bergerak': [{'hari': d[0], 'stok': d[1], 'total': d[2], 'rata_stok': rs, 'rata_total': rt}
+                          for d, rs, rt in zip(deret, rata_qty, rata_total)],
+    }
+
+def tampilkan_laporan_penjualan():
+    lap = laporan_penjualan()
+    print("=== Laporan Penjualan ===")
+    print(f"Jumlah transaksi: {lap['baris']}  Total pendapatan: Rp{lap['pendapatan']:,}")
+    print("\nProduk terlaris:")
+    for i, t in enumerate(lap['terlaris'], 1):
+        print(f"{i}. ID:{t['id']}  {t['nama']}  Terjual:{t['stok']}  Pendapatan: Rp{t['total']:,}")
+    print("\nPendapatan per user:")
+    for u, total in lap['per_user'].items():
+        print(f"- {u}: Rp{total:,}")
+    print("\nPendapatan harian (7 hari terakhir, rata-rata bergerak 7 hari):")
+    for d in lap['rata_bergerak'][-7:]:
+        print(f"- {d['hari']}  Terjual:{d['stok']}  Total: Rp{d['total']:,}  Rata: Rp{d['rata_total']:,}")
+
+
+# Prakiraan stok: laju permintaan harian per produk dihaluskan eksponensial
+# dari penjualan per produk per hari (ringkasan yang dipelihara inkremental),
+# lalu titik pemesanan ulang dan perkiraan hari sampai stok habis dihitung
+# untuk seluruh katalog sekaligus.
+
+JENDELA_PRAKIRAAN = 28
+ALPHA_PRAKIRAAN = 0.3
+WAKTU_TUNGGU_HARI = 3
+Z_LAYANAN = 1.65  # ~95% tingkat layanan
+
+_cache_laju = {}
+
+def laju_permintaan(seri, alpha=ALPHA_PRAKIRAAN):
+    """Rata-rata dan simpangan baku tertimbang eksponensial dari baris seri harian.
+
+    seri: {id: [jumlah per hari, terlama dulu]}; hasil {id: (laju, sigma)}.
+    """
+    if not seri:
+        return {}
+    pid = list(seri)
+    d = len(seri[pid[0]])
+    bobot = [alpha * (1 - alpha) ** (d - 1 - k) for k in range(d)]
+    total_bobot = sum(bobot)
+    bobot = [b / total_bobot for b in bobot]
+    if np is not None:
+        x = np.array([seri[p] for p in pid], dtype=np.float64)
+        w = np.array(bobot)
+        laju = x @ w
+        sigma = np.sqrt(((x - laju[:, None]) ** 2) @ w)
+        return dict(zip(pid, zip(laju.tolist(), sigma.tolist())))
+    hasil = {}
+    for p in pid:
+        baris = seri[p]
+        laju = sum(b * v for b, v in zip(bobot, baris))
+        sigma = sum(b * (v - laju) ** 2 for b, v in zip(bobot, baris)) ** 0.5
+        hasil[p] = (laju, sigma)
+    return hasil
+
+def prakiraan_stok(produk=None, hari_ini=None, waktu_tunggu=WAKTU_TUNGGU_HARI):
+    """Laju harian, titik pesan ulang, dan hari sampai habis untuk tiap produk.
+
+    Laju dihitung ulang seluruhnya hanya saat tanggal berganti atau ringkasan
+    dibangun ulang; selain itu hanya produk yang terjual sejak pemanggilan
+    sebelumnya yang dihitung ulang. Stok selalu diambil dari katalog saat ini.
+    """
+    if produk is None:
+        produk = katalog_untuk(produk_path).segarkan()
+    hari_ini = hari_ini or date.today()
+    hari = [(hari_ini - timedelta(days=JENDELA_PRAKIRAAN - 1 - i)).isoformat() for i in range(JENDELA_PRAKIRAAN)]
+    with kunci_data():
+        sumber = db() if BACKEND == 'sqlite' else ringkasan_penjualan
+        kunci = (hari[-1], BACKEND)
+        token, berubah = sumber.perubahan_sejak(_cache_laju.get('token') if _cache_laju.get('kunci') == kunci else None)
+        if berubah is None:
+            _cache_laju['laju'] = laju_permintaan(sumber.penjualan_per_hari(hari))
+        elif berubah:
+            laju = dict(_cache_laju['laju'])
+            laju.update(laju_permintaan(sumber.penjualan_per_hari(hari, berubah)))
+            _cache_laju['laju'] = laju
+        _cache_laju['kunci'] = kunci
+        _cache_laju['token'] = token
+        laju = _cache_laju['laju']
+    akar_tunggu = waktu_tunggu ** 0.5
+    hasil = []
+    for p in produk:
+        r, sigma = laju.get(p['id'], (0.0, 0.0))
+        titik_pesan = r * waktu_tunggu + Z_LAYANAN * sigma * akar_tunggu
+        hasil.append({
+            'id': p['id'],
+            'nama': p['nama'],
+            'stok': p['stok'],
+            'laju_harian': round(r, 2),
+            'titik_pesan': round(titik_pesan, 1),
+            'hari_habis': round(p['stok'] / r, 1) if r > 0 else None,
+            'perlu_pesan': r > 0 and p['stok'] <= titik_pesan,
+        })
+    return hasil
+
+def cetak_prakiraan(p):
+    habis = f"{p['hari_habis']} hari" if p['hari_habis'] is not None else "-"
+    tanda = "  ⚠️ PESAN ULANG" if p['perlu_pesan'] else ""
+    print(f"- ID:{p['id']}  {p['nama']}  Stok:{p['stok']}  Laju:{p['laju_harian']}/hari  "
+          f"Titik pesan:{p['titik_pesan']}  Habis dalam:{habis}{tanda}")
+
+def daftar_produk_admin(path=produk_path):
+    """Daftar produk berhalaman untuk admin; prakiraan stok hanya untuk halaman yang tampil."""
+    urut, turun, teks = _tanya_urutan()
+
+    def ambil(nomor):
+        h = halaman_produk(nomor, urut=urut, turun=turun, teks=teks, path=path)
+        h['isi'] = prakiraan_stok(h['isi'])
+        return h
+
+    tampilkan_berhalaman(ambil, cetak_prakiraan, "Daftar Produk", "Belum ada produk terdaftar di produk.csv.")
+
+# Lapisan layanan: operasi inti tanpa input()/print() dan tanpa global sesi,
+# dipakai oleh CLI dan bisa dipanggil banyak sesi sekaligus dalam satu proses.
+
+def layanan_login(username, password):
+    return cek_login(username, password)
+
+def layanan_daftar(username, password, role='user'):
+    return daftarkan_pengguna(username, password, role)
+
+def layanan_produk(halaman=None, per_halaman=20, urut=None, turun=False, **filter):
+    """Seluruh katalog, atau satu halaman bila `halaman` diberikan."""
+    if halaman is None and not urut and not any(v is not None for v in filter.values()):
+        return [dict(p) for p in katalog.segarkan()]
+    h = halaman_produk(halaman or 1, per_halaman, urut, turun, **filter)
+    h['isi'] = [dict(p) for p in h['isi']]
+    return h
+
+def layanan_cari(teks, k=5):
+    return [dict(p) for p in katalog.cari_mirip(teks, k)]
+
+def layanan_beli(sesi, items):
+    """items: list (id atau nama produk, jumlah)."""
+    return checkout_keranjang(sesi.username, items)
+
+def layanan_riwayat(sesi, halaman=1, per_halaman=20, username=None, mulai=None, akhir=None):
+    """Riwayat terbaru lebih dulu; hanya admin yang boleh melihat user lain."""
+    username = username or sesi.username
+    if username != sesi.username and not sesi.admin:
+        raise PermissionError("Hanya admin yang boleh melihat riwayat user lain.")
+    if mulai or akhir:
+        return halaman_transaksi(halaman, per_halaman, username, mulai, akhir)['isi']
+    if BACKEND == 'sqlite':
+        return db().riwayat(username, halaman, per_halaman)
+    if MODE_SEGMEN:
+        rows = segmen_transaksi.baca(username=username, terbaru_dulu=True)
+        mulai = (halaman - 1) * per_halaman
+        return list(itertools.islice(rows, mulai, mulai + per_halaman))
+    return indeks_untuk(TRANSAKSI_FILE).riwayat(username, halaman, per_halaman)
+
+def layanan_hapus_pengguna(sesi, username, konfirmasi_admin=False):
+    if not sesi.admin:
+        raise PermissionError("Hanya admin yang boleh menghapus pengguna.")
+    return hapus_pengguna(username, sesi.username, konfirmasi_admin)
+
+def layanan_irigasi(kelembaban, hujan):
+    return rekomendasi_irigasi(kelembaban, hujan)
+
+
+# Server HTTP/JSON asyncio. Katalog di memori dipakai bersama semua klien;
+# semua operasi yang menyentuh disk dijalankan berurutan di satu thread
+# penulis, sehingga loop tetap responsif dan penulisan tidak saling tabrak.
+
+# Batas server HTTP: ukuran halaman maksimum, ukuran body permintaan (byte)
+# dan umur token sesi (detik).
+MAKS_PER_HALAMAN = 500
+MAKS_BODY = 1 << 20
+SESI_TTL = int(os.environ.get('SISTA_SESI_TTL', '') or 8 * 3600)
+
+
+class ServerSista:
+    STATUS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden',
+              404: 'Not Found', 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+    def __init__(self, host='127.0.0.1', port=8080, interval_segarkan=2.0):
+        self.host = host
+        self.port = port
+        self.interval_segarkan = interval_segarkan
+        self.sesi = {}  # token -> (Sesi, waktu kedaluwarsa monotonic)
+        self._penulis = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sista-penulis')
+        # PBKDF2 tidak menyentuh data bersama; dihitung di luar thread penulis
+        # agar login tidak mengantrekan checkout.
+        self._hasher = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                          thread_name_prefix='sista-hash')
+
+    async def _di_penulis(self, fungsi, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._penulis, fungsi, *args)
+
+    async def _di_hasher(self, fungsi, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hasher, fungsi, *args)
+
+    async def _login(self, username, password):
+        """Seperti cek_login, tetapi hanya baca/tulis pengguna yang lewat thread penulis."""
+        user = await self._di_penulis(cari_pengguna, username)
+        if user is None:
+            return None, "Username tidak ditemukan."
+        if not await self._di_hasher(verifikasi_password, password, user['password']):
+            return None, "Password salah."
+        peran = user.get('role', 'user')
+        if not password_ter_hash(user['password']):
+            hashed = await self._di_hasher(hash_password, password)
+            await self._di_penulis(append_user, username, hashed, peran)
+        return Sesi(username, peran), "Berhasil login."
+
+    async def _segarkan_berkala(self):
+        # Tangkap perubahan dari proses lain (CLI, terminal kasir) secara berkala.
+        while True:
+            await self._di_penulis(katalog.segarkan)
+            self._buang_sesi_kedaluwarsa()
+            if instrumen is not None:
+                await self._di_penulis(instrumen.tulis)
+            await asyncio.sleep(self.interval_segarkan)
+
+    def _sesi_dari(self, headers):
+        auth = headers.get('authorization', '')
+        if not auth.startswith('Bearer '):
+            return None
+        token = auth[7:].strip()
+        isi = self.sesi.get(token)
+        if isi is None:
+            return None
+        if isi[1] <= time.monotonic():
+            self.sesi.pop(token, None)
+            return None
+        return isi[0]
+
+    def _buang_sesi_kedaluwarsa(self):
+        sekarang = time.monotonic()
+        for token in [t for t, (_, batas) in self.sesi.items() if batas <= sekarang]:
+            del self.sesi[token]
+
+    @staticmethod
+    def _objek_json(body):
+        """Body permintaan sebagai dict; None bila JSON-nya bukan objek."""
+        data = json.loads(body or b'{}')
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _halaman(query, bawaan='20'):
+        """(halaman, per_halaman) dari query, atau (None, pesan) bila tidak valid."""
+        try:
+            halaman = int(query.get('halaman', ['1'])[0])
+            per_halaman = int(query.get('per_halaman', [bawaan])[0])
+        except ValueError:
+            return None, "halaman dan per_halaman harus angka."
+        if halaman < 1 or not 1 <= per_halaman <= MAKS_PER_HALAMAN:
+            return None, f"halaman harus >= 1 dan per_halaman antara 1 dan {MAKS_PER_HALAMAN}."
+        return halaman, per_halaman
+
+    async def tangani(self, metode, path, query, headers, body):
+        """Routing satu permintaan. Mengembalikan (status, objek JSON)."""
+        if metode == 'GET' and path == '/produk':
+            if 'halaman' not in query:
+                return 200, [dict(p) for p in list(katalog.produk)]
+            halaman, per_halaman = self._halaman(query)
+            if halaman is None:
+                return 400, {'pesan': per_halaman}
+            urut = query.get('urut', [None])[0]
+            if urut is not None and urut not in URUTAN_PRODUK:
+                return 400, {'pesan': "urut harus salah satu dari: " + ', '.join(sorted(URUTAN_PRODUK))}
+            # Penyaringan/pengurutan dan segarkan katalog jangan memblokir loop.
+            turun = query.get('turun', ['0'])[0] == '1'
+            teks = query.get('nama', [None])[0]
+            return 200, await self._di_penulis(
+                lambda: layanan_produk(halaman, per_halaman, urut, turun, teks=teks))
+        if metode == 'GET' and path == '/cari':
+            try:
+                k = int(query.get('k', ['5'])[0])
+            except ValueError:
+                return 400, {'pesan': "Parameter k harus angka."}
+            return 200, await self._di_penulis(layanan_cari, query.get('q', [''])[0], k)
+        if metode == 'GET' and path == '/irigasi':
+            try:
+                kelembaban = int(query.get('kelembaban', [''])[0])
+            except ValueError:
+                return 400, {'pesan': "Parameter kelembaban harus angka."}
+            hujan = query.get('hujan', ['0'])[0].lower() in ('1', 'ya', 'true')
+            return 200, rekomendasi_irigasi(kelembaban, hujan)
+        if metode == 'POST' and path == '/login':
+            data = self._objek_json(body)
+            if data is None:
+                return 400, {'pesan': "Body harus objek JSON."}
+            sesi, pesan = await self._login(str(data.get('username', '')), str(data.get('password', '')))
+            if sesi is None:
+                return 401, {'pesan': pesan}
+            token = secrets.token_urlsafe(24)
+            self.sesi[token] = (sesi, time.monotonic() + SESI_TTL)
+            return 200, {'token': token, 'username': sesi.username, 'peran': sesi.peran,
+                         'berlaku_detik': SESI_TTL}
+
+        sesi = self._sesi_dari(headers)
+        if sesi is None:
+            return 401, {'pesan': "Perlu login (header Authorization: Bearer <token>)."}
+        if metode == 'POST' and path == '/beli':
+            data = self._objek_json(body)
+            if data is None:
+                return 400, {'pesan': "Body harus objek JSON."}
+            items = data.get('items') or [[data.get('id'), data.get('jumlah')]]
+            try:
+                items = [(str(k), int(j)) for k, j in items]
+            except (TypeError, ValueError):
+                return 400, {'pesan': "Format items: [[id, jumlah], ...]."}
+            ok, pesan = await self._di_penulis(layanan_beli, sesi, items)
+            return (200 if ok else 409), {'berhasil': ok, 'pesan': pesan}
+        if metode == 'GET' and path == '/riwayat':
+            halaman, per_halaman = self._halaman(query)
+            if halaman is None:
+                return 400, {'pesan': per_halaman}
+            try:
+                rows = await self._di_penulis(layanan_riwayat, sesi, halaman, per_halaman,
+                                              query.get('username', [None])[0],
+                                              query.get('dari', [None])[0], query.get('sampai', [None])[0])
+            except PermissionError as e:
+                return 403, {'pesan': str(e)}
+            return 200, rows
+        return 404, {'pesan': f"Tidak ada rute {metode} {path}."}
+
+    async def _klien(self, reader, writer):
+        try:
+            while True:
+                baris = await reader.readline()
+                if not baris:
+                    break
+                try:
+                    metode, target, versi = baris.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    k, _, v = h.decode('latin-1').partition(':')
+                    headers[k.strip().lower()] = v.strip()
+                url = urlsplit(target)
+                tutup = headers.get('connection', '').lower() == 'close' or versi == 'HTTP/1.0'
+                t0 = time.perf_counter()
+                try:
+                    panjang = int(headers.get('content-length', '') or 0)
+                except ValueError:
+                    panjang = -1
+                if panjang < 0:
+                    # Body tidak bisa dilewati dengan aman, jadi koneksi ditutup.
+                    status, hasil, tutup = 400, {'pesan': "Content-Length tidak valid."}, True
+                elif panjang > MAKS_BODY:
+                    status, hasil, tutup = 413, {'pesan': f"Body maksimal {MAKS_BODY} byte."}, True
+                else:
+                    body = await reader.readexactly(panjang) if panjang else b''
+                    try:
+                        status, hasil = await self.tangani(metode, url.path, parse_qs(url.query), headers, body)
+                    except json.JSONDecodeError:
+                        status, hasil = 400, {'pesan': "Body harus JSON."}
+                    except Exception as e:
+                        status, hasil = 500, {'pesan': str(e)}
+                if instrumen is not None:
+                    instrumen.catat_latensi('http', f"{metode} {url.path}", time.perf_counter() - t0)
+                data = json.dumps(hasil, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {self.STATUS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'close' if tutup else 'keep-alive'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if tutup:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def mulai(self):
+        server = await asyncio.start_server(self._klien, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._tugas_segarkan = asyncio.create_task(self._segarkan_berkala())
+        return server
+
+    async def layani(self):
+        server = await self.mulai()
+        print(f"Server berjalan di http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+async def uji_beban(host, port, permintaan=1000, konkurensi=50, path='/produk', metode='GET',
+                    body=None, token=None):
+    """Kirim banyak permintaan keep-alive paralel; ukur throughput dan latensi."""
+    latensi = []
+    gagal = 0
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    kepala = f"{metode} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(data)}\r\n"
+    if token:
+        kepala += f"Authorization: Bearer {token}\r\n"
+    pesan = (kepala + "\r\n").encode('latin-1') + data
+    sisa = [permintaan]
+
+    async def pekerja():
+        nonlocal gagal
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while sisa[0] > 0:
+                sisa[0] -= 1
+                t0 = time.perf_counter()
+                writer.write(pesan)
+                await writer.drain()
+                status = await reader.readline()
+                panjang = 0
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b''):
+                        break
+                    if h.lower().startswith(b'content-length:'):
+                        panjang = int(h.split(b':')[1])
+                await reader.readexactly(panjang)
+                latensi.append(time.perf_counter() - t0)
+                if b' 200 ' not in status:
+                    gagal += 1
+        finally:
+            writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(pekerja() for _ in range(konkurensi)))
+    durasi = time.perf_counter() - t0
+    latensi.sort()
+
+    def persentil(q):
+        return latensi[min(len(latensi) - 1, int(q * len(latensi)))] * 1000 if latensi else 0.0
+
+    return {
+        'permintaan': len(latensi),
+        'gagal': gagal,
+        'detik': round(durasi, 4),
+        'throughput': round(len(latensi) / durasi, 1) if durasi else 0.0,
+        'p50_ms': round(persentil(0.50), 3),
+        'p99_ms': round(persentil(0.99), 3),
+    }
+
+
+def _sesi_cli(args, admin=False):
+    sesi, pesan = layanan_login(args.user, args.password)
+    if sesi is None:
+        raise PermissionError(pesan)
+    if admin and not sesi.admin:
+        raise PermissionError("Perintah ini hanya untuk admin.")
+    return sesi
+
+def _item_cli(teks):
+    key, _, jumlah = teks.rpartition(':')
+    if not key:
+        raise argparse.ArgumentTypeError(f"Item harus berbentuk id:jumlah, bukan {teks!r}")
+    try:
+        return key, int(jumlah)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Jumlah tidak valid pada {teks!r}")
+
+def buat_parser():
+    parser = argparse.ArgumentParser(
+        description="Sistem Irigasi & Stock Agroindustri. Tanpa perintah, menjalankan menu interaktif. "
+                    "Folder data bisa diganti lewat variabel lingkungan SISTA_DATA_DIR. "
+                    "SISTA_UI_CEPAT=1 membersihkan layar dengan escape ANSI (terminal lambat). "
+                    "SISTA_SNAPSHOT=1 memuat produk dan pengguna dari snapshot biner (.snap) lewat mmap. "
+                    "SISTA_PARALEL=N memindai transaksi.csv besar dengan N proses. "
+                    "SISTA_METRIK=path menulis metrik waktu operasi dan latensi menu saat keluar; "
+                    "SISTA_PROFIL=path menyimpan profil cProfile (baca dengan python -m pstats path).")
+    sub = parser.add_subparsers(dest='perintah')
+
+    def dengan_login(p):
+        p.add_argument('--user', default=os.environ.get('SISTA_USER'), required='SISTA_USER' not in os.environ)
+        p.add_argument('--password', default=os.environ.get('SISTA_PASSWORD'), required='SISTA_PASSWORD' not in os.environ)
+        return p
+
+    p = sub.add_parser('daftar', help="Daftarkan akun baru")
+    p.add_argument('username')
+    p.add_argument('password')
+    p.add_argument('--role', default='user', choices=['user', 'admin'])
+
+    p = sub.add_parser('produk', help="Daftar produk (JSON)")
+    p.add_argument('--halaman', type=int, help="Nomor halaman (tanpa ini: seluruh katalog)")
+    p.add_argument('--per-halaman', type=int, default=20)
+    p.add_argument('--urut', choices=sorted(URUTAN_PRODUK))
+    p.add_argument('--turun', action='store_true', help="Urutan menurun")
+    p.add_argument('--nama', help="Filter bagian nama")
+    p.add_argument('--min-harga', type=int)
+    p.add_argument('--maks-harga', type=int)
+    p.add_argument('--min-stok', type=int)
+    p.add_argument('--maks-stok', type=int)
+
+    p = sub.add_parser('cari', help="Cari produk berdasarkan awalan nama atau nama mirip")
+    p.add_argument('teks')
+    p.add_argument('-k', type=int, default=5, help="Jumlah hasil maksimum")
+
+    p = dengan_login(sub.add_parser('beli', help="Beli satu atau beberapa produk"))
+    p.add_argument('items', nargs='+', type=_item_cli, metavar='ID:JUMLAH')
+
+    p = dengan_login(sub.add_parser('riwayat', help="Riwayat transaksi, terbaru lebih dulu"))
+    p.add_argument('--halaman', type=int, default=1)
+    p.add_argument('--per-halaman', type=int, default=20)
+    p.add_argument('--untuk', help="Username lain (khusus admin)")
+    p.add_argument('--dari', help="Tanggal awal YYYY-MM-DD")
+    p.add_argument('--sampai', help="Tanggal akhir YYYY-MM-DD (inklusif)")
+
+    p = dengan_login(sub.add_parser('hapus-pengguna', help="Hapus akun (khusus admin)"))
+    p.add_argument('username')
+    p.add_argument('--konfirmasi-admin', action='store_true')
+
+    p = sub.add_parser('irigasi', help="Rekomendasi irigasi untuk satu pembacaan")
+    p.add_argument('kelembaban', type=int)
+    p.add_argument('--hujan', action='store_true')
+
+    p = dengan_login(sub.add_parser('impor', help="Impor produk dari CSV/JSON Lines (khusus admin)"))
+    p.add_argument('file')
+
+    p = dengan_login(sub.add_parser('ekspor', help="Ekspor produk ke CSV/JSON Lines (khusus admin)"))
+    p.add_argument('file')
+
+    def dengan_saringan(p):
+        p.add_argument('--untuk', help="Hanya transaksi username ini")
+        p.add_argument('--dari', help="Tanggal awal YYYY-MM-DD")
+        p.add_argument('--sampai', help="Tanggal akhir YYYY-MM-DD (inklusif)")
+        p.add_argument('--produk', help="Hanya transaksi id produk ini")
+        return p
+
+    p = dengan_saringan(dengan_login(sub.add_parser('laporan', help="Laporan penjualan (khusus admin)")))
+    p.add_argument('--top', type=int, default=10)
+    p.add_argument('--jendela', type=int, default=7, help="Jendela rata-rata bergerak (hari)")
+
+    dengan_saringan(dengan_login(sub.add_parser(
+        'transaksi', help="Semua transaksi yang cocok dengan saringan, urut file (khusus admin)")))
+
+    p = sub.add_parser('irigasi-batch', help="Rekomendasi irigasi banyak lahan dari file sensor")
+    p.add_argument('file', help="CSV field_id,timestamp,kelembaban,hujan[,tanaman]")
+    p.add_argument('--tanaman', help="CSV field_id,tanaman")
+    p.add_argument('--ambang', nargs='*', metavar='TANAMAN=PERSEN', help="Ganti ambang per tanaman")
+
+    p = sub.add_parser('pantau', help="Ingest pembacaan sensor terus-menerus dan kirim keputusan irigasi")
+    p.add_argument('sumber', help="File/FIFO, unix:/path/socket, atau tcp:host:port")
+    p.add_argument('--ikuti', action='store_true', help="Terus baca file seperti tail -f")
+    p.add_argument('--jendela', type=float, default=30, help="Panjang jendela (menit)")
+    p.add_argument('--maks-pembacaan', type=int, default=256, help="Batas pembacaan per lahan di jendela")
+    p.add_argument('--histeresis', type=float, default=5.0)
+    p.add_argument('--antrian', type=int, default=10000, help="Ukuran antrian (backpressure)")
+    p.add_argument('--tanaman', help="CSV field_id,tanaman")
+    p.add_argument('--simpan', action='store_true', help="Simpan pembacaan ke riwayat sensor")
+
+    p = sub.add_parser('sensor', help="Riwayat sensor satu lahan (rollup per jam/hari)")
+    p.add_argument('lahan')
+    p.add_argument('--resolusi', choices=sorted(RESOLUSI_ROLLUP), default='hari')
+    p.add_argument('--dari', type=_waktu_detik, help="Waktu awal (ISO atau epoch)")
+    p.add_argument('--sampai', type=_waktu_detik, help="Waktu akhir, eksklusif")
+
+    p = sub.add_parser('jadwal-irigasi', help="Susun jadwal irigasi multi-hari dan simpan")
+    p.add_argument('lahan', help="CSV field_id,kelembaban,laju_susut[,tanaman][,liter_per_persen]")
+    p.add_argument('--prakiraan', help="CSV tanggal,hujan_mm[,field_id]")
+    p.add_argument('--kapasitas', type=float, default=50000.0, help="Kapasitas pompa per hari (liter)")
+    p.add_argument('--anggaran', type=float, help="Anggaran air total (liter)")
+    p.add_argument('--hari', type=int, default=7)
+    p.add_argument('--mulai', type=date.fromisoformat, help="Tanggal mulai YYYY-MM-DD (default hari ini)")
+
+    p = dengan_login(sub.add_parser('ringkasan', help="Ringkasan penjualan per produk/hari (khusus admin)"))
+    p.add_argument('--produk', help="ID produk")
+    p.add_argument('--hari', help="Tanggal YYYY-MM-DD")
+    p.add_argument('--bangun-ulang', action='store_true', help="Hitung ulang dari seluruh transaksi")
+
+    p = dengan_login(sub.add_parser('prakiraan', help="Prakiraan stok dan titik pesan ulang (khusus admin)"))
+    p.add_argument('--perlu-pesan', action='store_true', help="Hanya produk yang perlu dipesan ulang")
+    p.add_argument('--waktu-tunggu', type=float, default=WAKTU_TUNGGU_HARI, help="Waktu tunggu pasokan (hari)")
+
+    p = dengan_login(sub.add_parser('segmen', help="Impor transaksi.csv lama ke segmen dan arsipkan segmen lama "
+                                                   "(SISTA_SEGMEN, khusus admin)"))
+    p.add_argument('--impor', action='store_true', help="Pecah transaksi.csv ke segmen lalu ganti namanya jadi .diimpor")
+    p.add_argument('--arsipkan', action='store_true', help="Kompres gzip semua segmen kecuali yang aktif")
+
+    p = dengan_login(sub.add_parser('migrasi-sqlite', help="Salin data CSV ke database SQLite (khusus admin)"))
+    p.add_argument('--db', help="Path database tujuan (default SISTA_DB atau data_admin/sista.db)")
+
+    p = sub.add_parser('server', help="Jalankan server HTTP/JSON asyncio")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8080)
+
+    p = sub.add_parser('uji-beban', help="Uji beban server HTTP lokal")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8080)
+    p.add_argument('--permintaan', type=int, default=1000)
+    p.add_argument('--konkurensi', type=int, default=50)
+    p.add_argument('--path', default='/produk')
+    return parser
+
+def jalankan_perintah(args):
+    """Jalankan satu subperintah CLI dan kembalikan hasil yang bisa di-JSON-kan."""
+    if args.perintah == 'daftar':
+        ok, pesan = layanan_daftar(args.username, args.password, args.role)
+        return {'berhasil': ok, 'pesan': pesan}
+    if args.perintah == 'produk':
+        return layanan_produk(args.halaman, args.per_halaman, args.urut, args.turun, teks=args.nama,
+                              min_harga=args.min_harga, maks_harga=args.maks_harga,
+                              min_stok=args.min_stok, maks_stok=args.maks_stok)
+    if args.perintah == 'cari':
+        return layanan_cari(args.teks, args.k)
+    if args.perintah == 'beli':
+        ok, pesan = layanan_beli(_sesi_cli(args), args.items)
+        return {'berhasil': ok, 'pesan': pesan}
+    if args.perintah == 'riwayat':
+        return layanan_riwayat(_sesi_cli(args), args.halaman, args.per_halaman, args.untuk, args.dari, args.sampai)
+    if args.perintah == 'hapus-pengguna':
+        ok, pesan = layanan_hapus_pengguna(_sesi_cli(args, admin=True), args.username, args.konfirmasi_admin)
+        return {'berhasil': ok, 'pesan': pesan}
+    if args.perintah == 'irigasi':
+        return layanan_irigasi(args.kelembaban, args.hujan)
+    if args.perintah == 'impor':
+        _sesi_cli(args, admin=True)
+        return impor_produk(args.file)
+    if args.perintah == 'ekspor':
+        _sesi_cli(args, admin=True)
+        return {'jumlah': ekspor_produk(args.file)}
+    if args.perintah == 'laporan':
+        _sesi_cli(args, admin=True)
+        return laporan_penjualan(args.top, args.jendela, None, args.untuk, args.dari, args.sampai, args.produk)
+    if args.perintah == 'transaksi':
+        _sesi_cli(args, admin=True)
+        return pindai_transaksi(args.untuk, args.dari, args.sampai, args.produk)
+    if args.perintah == 'irigasi-batch':
+        ambang = {}
+        for item in args.ambang or []:
+            nama, _, nilai = item.partition('=')
+            ambang[nama.strip().lower()] = float(nilai)
+        return rekomendasi_irigasi_batch(args.file, muat_tanaman_lahan(args.tanaman) if args.tanaman else None, ambang)
+    if args.perintah == 'pantau':
+        pemantau = PemantauIrigasi(args.jendela * 60, args.maks_pembacaan, args.histeresis,
+                                   muat_tanaman_lahan(args.tanaman) if args.tanaman else None)
+        return pantau_sensor(args.sumber, pemantau, ikuti=args.ikuti, ukuran_antrian=args.antrian,
+                             seri=seri_sensor() if args.simpan else None)
+    if args.perintah == 'sensor':
+        return seri_sensor().rollup(args.lahan, args.resolusi, args.dari, args.sampai)
+    if args.perintah == 'jadwal-irigasi':
+        return rencanakan_irigasi(muat_lahan_jadwal(args.lahan),
+                                  muat_prakiraan(args.prakiraan) if args.prakiraan else None,
+                                  args.kapasitas, args.anggaran, args.hari, args.mulai)
+    if args.perintah == 'ringkasan':
+        _sesi_cli(args, admin=True)
+        if args.bangun_ulang:
+            bangun_ulang_ringkasan()
+        hasil = {}
+        if args.produk:
+            hasil['produk'] = ringkasan_produk(args.produk)
+        if args.hari:
+            hasil['hari'] = ringkasan_harian(args.hari)
+        return hasil
+    if args.perintah == 'prakiraan':
+        _sesi_cli(args, admin=True)
+        hasil = prakiraan_stok(waktu_tunggu=args.waktu_tunggu)
+        return [p for p in hasil if p['perlu_pesan']] if args.perlu_pesan else hasil
+    if args.perintah == 'segmen':
+        _sesi_cli(args, admin=True)
+        if not MODE_SEGMEN:
+            raise ValueError("Set SISTA_SEGMEN=harian atau bulanan untuk memakai segmen.")
+        hasil = {'diimpor': segmen_transaksi.impor() if args.impor else 0}
+        hasil['diarsipkan'] = segmen_transaksi.arsipkan() if args.arsipkan else []
+        return hasil
+    if args.perintah == 'migrasi-sqlite':
+        _sesi_cli(args, admin=True)
+        return migrasi_ke_sqlite(args.db)
+    if args.perintah == 'uji-beban':
+        return asyncio.run(uji_beban(args.host, args.port, args.permintaan, args.konkurensi, args.path))
+    raise ValueError(f"Perintah tidak dikenal: {args.perintah}")
+
+def main(argv=None):
+    if not PROFIL_FILE:
+        return _main(argv)
+    profil = cProfile.Profile()
+    try:
+        return profil.runcall(_main, argv)
+    finally:
+        profil.dump_stats(PROFIL_FILE)
+
+def _main(argv=None):
+    args = buat_parser().parse_args(argv)
+    if not args.perintah:
+        halaman_utama()
+        return 0
+    if args.perintah == 'server':
+        try:
+            asyncio.run(ServerSista(args.host, args.port).layani())
+        except KeyboardInterrupt:
+            pass
+        return 0
+    try:
+        hasil = jalankan_perintah(args)
+    except (PermissionError, OSError, ValueError) as e:
+        print(json.dumps({'berhasil': False, 'pesan': str(e)}, ensure_ascii=False))
+        return 1
+    print(json.dumps(hasil, ensure_ascii=False, indent=1))
+    if isinstance(hasil, dict) and hasil.get('berhasil') is False:
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    halaman_utama()
+    sys.exit(main())
 
@@ -0,0 +1,41 @@
+import importlib.util
+import itertools
+import os
+import sys
+
+import pytest
+
+SKRIP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'projek Algo Kelompok 12.py')
+_nomor = itertools.count()
+
+
+@pytest.fixture
+def muat(tmp_path, monkeypatch):
+    """Impor ulang skrip utama dengan SISTA_DATA_DIR di folder sementara.
+
+    Variabel SISTA_* lain dikosongkan dulu, lalu diisi dari argumen, misalnya
+    muat(SISTA_JURNAL='1'). Bisa dipanggil berkali-kali untuk meniru proses
+    baru yang membuka data yang sama.
+    """
+    def muat(**env):
+        for k in list(os.environ):
+            if k.startswith('SISTA_'):
+                monkeypatch.delenv(k)
+        monkeypatch.setenv('SISTA_DATA_DIR', str(tmp_path))
+        for k, v in env.items():
+            monkeypatch.setenv(k, v)
+        nama = f'sista_uji_{next(_nomor)}'
+        spec = importlib.util.spec_from_file_location(nama, SKRIP)
+        modul = importlib.util.module_from_spec(spec)
+        sys.modules[nama] = modul
+        spec.loader.exec_module(modul)
+        return modul
+    return muat
+
+
+def produk(m, pid, stok=10, harga=1000):
+    """Tambahkan produk 'Produk <pid>' ke katalog modul m."""
+    p = {'id': pid, 'nama': f'Produk {pid}', 'harga': harga, 'stok': stok}
+    m.katalog.segarkan()
+    m.katalog.tambah(p)
+    return p
@@ -0,0 +1,44 @@
+import csv
+
+import pytest
+
+
+def _data(m):
+    rows = [
+        ['2025-01-01 08:00:00', 'budi', 'P1', 'Padi, Premium', 2, 100, 200],
+        ['2025-01-01 09:00:00', 'sari', 'P2', 'Jagung', 1, 500, 500],
+        ['2025-01-03 10:00:00', 'budi', 'P2', 'Jagung', 3, 500, 1500],
+        ['2025-01-04 11:00:00', 'sari', 'P1', 'Padi, Premium', 5, 100, 500],
+        ['rusak', 'x', 'P3', 'Kedelai', 'dua', 1, 1],
+    ]
+    # Ditulis langsung: baris rusak tidak akan lolos catat_transaksi.
+    m.ensure_csv(m.TRANSAKSI_FILE, m.TRANSAKSI_HEADER)
+    with open(m.TRANSAKSI_FILE, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+
+@pytest.mark.parametrize('tanpa_numpy', [False, True])
+def test_laporan_penjualan(muat, monkeypatch, tanpa_numpy):
+    m = muat()
+    _data(m)
+    if tanpa_numpy:
+        monkeypatch.setattr(m, 'np', None)
+    lap = m.laporan_penjualan(top=1, jendela=2)
+    assert lap['baris'] == 4 and lap['pendapatan'] == 2700
+    assert lap['per_produk'] == {'P2': 2000, 'P1': 700}
+    assert lap['per_user'] == {'budi': 1700, 'sari': 1000}
+    assert lap['per_hari'] == {'2025-01-01': 700, '2025-01-03': 1500, '2025-01-04': 500}
+    assert lap['terlaris'] == [{'id': 'P1', 'nama': 'Padi, Premium', 'stok': 7, 'total': 700}]
+    # Hari tanpa penjualan (01-02) ikut sebagai 0 dalam rata-rata bergerak.
+    assert [(d['hari'], d['total'], d['rata_total']) for d in lap['rata_bergerak']] == [
+        ('2025-01-01', 700, 700.0), ('2025-01-02', 0, 350.0),
+        ('2025-01-03', 1500, 750.0), ('2025-01-04', 500, 1000.0)]
+    assert [d['rata_stok'] for d in lap['rata_bergerak']] == [3.0, 1.5, 1.5, 4.0]
+
+
+def test_laporan_dengan_saringan(muat):
+    m = muat()
+    _data(m)
+    assert m.laporan_penjualan(username='budi')['pendapatan'] == 1700
+    assert m.laporan_penjualan(mulai='2025-01-03', akhir='2025-01-03')['per_produk'] == {'P2': 1500}
+    assert m.laporan_penjualan(produk='P1')['baris'] == 2
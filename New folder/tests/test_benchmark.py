@@ -0,0 +1,27 @@
+import importlib.util
+import os
+
+SKRIP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark.py')
+spec = importlib.util.spec_from_file_location('benchmark_uji', SKRIP)
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+
+def _hasil(ulang, p50, p99):
+    return {'1k': {'op': {'ulang': ulang, 'ops_per_detik': 100.0, 'p50_ms': p50, 'p99_ms': p99}}}
+
+
+def test_p99_sampel_sedikit_tidak_dianggap_regresi():
+    # Dua sampel: p99 = sampel terlambat, jadi satu jeda GC sudah melewati toleransi.
+    assert benchmark.bandingkan(_hasil(2, 1.0, 9.0), _hasil(2, 1.0, 1.2), 0.5) == []
+
+
+def test_median_tetap_dicek_saat_sampel_sedikit():
+    regresi = benchmark.bandingkan(_hasil(2, 3.0, 3.0), _hasil(2, 1.0, 1.2), 0.5)
+    assert [r['metrik'] for r in regresi] == ['p50_ms']
+
+
+def test_p99_dicek_saat_sampel_cukup():
+    n = benchmark.MIN_SAMPEL_P99
+    regresi = benchmark.bandingkan(_hasil(n, 1.0, 9.0), _hasil(n, 1.0, 1.2), 0.5)
+    assert [r['metrik'] for r in regresi] == ['p99_ms']
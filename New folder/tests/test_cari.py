@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from conftest import produk
+
+
+def _isi(idx):
+    return sorted(idx.urut), dict(idx.kata), {g: set(k) for g, k in idx.trigram.items()}
+
+
+def test_indeks_inkremental_sama_dengan_dibangun_ulang(muat):
+    m = muat()
+    acak = random.Random(11)
+    kata = ['padi', 'jagung', 'kedelai', 'pupuk', 'urea', 'benih', 'cabai', 'merah', 'organik']
+    idx = m.IndeksCari()
+    ada = []
+    for i in range(300):
+        aksi = acak.random()
+        if aksi < 0.5 or not ada:
+            p = {'id': str(i), 'nama': ' '.join(acak.sample(kata, acak.randint(1, 3)))}
+            idx.tambah(p)
+            ada.append(p)
+        elif aksi < 0.8:
+            p = acak.choice(ada)
+            lama = p['nama']
+            p['nama'] = ' '.join(acak.sample(kata, acak.randint(1, 3)))
+            idx.hapus(p, lama)
+            idx.tambah(p)
+        else:
+            p = ada.pop(acak.randrange(len(ada)))
+            idx.hapus(p)
+        assert _isi(idx) == _isi(m.IndeksCari(ada))
+
+
+@pytest.mark.parametrize('jurnal', ['', '1'])
+def test_katalog_memperbarui_indeks_tanpa_membangun_ulang(muat, jurnal):
+    m = muat(SISTA_JURNAL=jurnal)
+    produk(m, 'P1')
+    m.ubah_produk('P1', nama='Pupuk Urea')
+    produk(m, 'P2')
+    m.ubah_produk('P2', nama='Padi Ciherang')
+    assert [p['id'] for p in m.katalog.cari_mirip('pupuk')] == ['P1']
+    idx = m.katalog._indeks_cari
+    produk(m, 'P3')
+    m.ubah_produk('P3', nama='Pupuk Kandang')
+    m.ubah_produk('P1', nama='Benih Jagung')
+    m.hapus_produk_id('P2')
+    assert m.katalog._indeks_cari is idx
+    assert [p['id'] for p in m.katalog.cari_mirip('pupuk')] == ['P3']
+    assert [p['id'] for p in m.katalog.cari_mirip('jagun')] == ['P1']
+    assert [p['id'] for p in m.katalog.cari_mirip('jagnug')] == ['P1']  # salah ketik
+    assert m.katalog.cari_mirip('padi') == []
+    assert _isi(idx) == _isi(m.IndeksCari(m.katalog.produk))
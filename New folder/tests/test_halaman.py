@@ -0,0 +1,73 @@
+import csv
+
+import pytest
+
+from conftest import produk
+
+
+def test_ambil_halaman_batas(muat):
+    m = muat()
+    assert m.ambil_halaman(range(10), 1, 5) == {'halaman': 1, 'per_halaman': 5,
+                                                'isi': [0, 1, 2, 3, 4], 'ada_berikutnya': True}
+    assert m.ambil_halaman(range(10), 2, 5)['isi'] == [5, 6, 7, 8, 9]
+    assert m.ambil_halaman(range(10), 2, 5)['ada_berikutnya'] is False
+    assert m.ambil_halaman(range(10), 3, 5)['isi'] == []
+    assert m.ambil_halaman(range(10), 0, 5)['halaman'] == 1
+    assert m.ambil_halaman([], 1, 5) == {'halaman': 1, 'per_halaman': 5, 'isi': [], 'ada_berikutnya': False}
+
+
+def test_ambil_halaman_tidak_membaca_melewati_halaman(muat):
+    m = muat()
+    dibaca = []
+
+    def sumber():
+        for i in range(1000):
+            dibaca.append(i)
+            yield i
+    assert m.ambil_halaman(sumber(), 2, 10)['isi'] == list(range(10, 20))
+    assert len(dibaca) == 21  # satu lagi untuk ada_berikutnya
+
+
+@pytest.mark.parametrize('urut,turun', [('harga', False), ('harga', True), ('stok', False), ('nama', True)])
+def test_halaman_produk_terurut_menutup_semua(muat, urut, turun):
+    m = muat()
+    for i in range(23):
+        produk(m, f'P{i:02d}', stok=(i * 7) % 5, harga=(i * 13) % 9 * 100)
+    semua = []
+    nomor = 1
+    while True:
+        h = m.halaman_produk(nomor, 5, urut, turun)
+        semua += [p['id'] for p in h['isi']]
+        if not h['ada_berikutnya']:
+            break
+        nomor += 1
+    assert nomor == 5 and len(semua) == 23
+    kunci = m.URUTAN_PRODUK[urut]
+    harapan = sorted(m.katalog.segarkan(), key=kunci, reverse=turun)
+    assert [kunci(m.katalog.cari(pid)) for pid in semua] == [kunci(p) for p in harapan]
+    assert sorted(semua) == sorted(p['id'] for p in harapan)
+    assert m.halaman_produk(6, 5, urut, turun)['isi'] == []
+
+
+def test_halaman_produk_dengan_filter(muat):
+    m = muat()
+    for i in range(10):
+        produk(m, f'P{i}', stok=i, harga=i * 100)
+    h = m.halaman_produk(1, 3, 'harga', True, min_harga=200, maks_stok=6)
+    assert [p['id'] for p in h['isi']] == ['P6', 'P5', 'P4'] and h['ada_berikutnya']
+    assert [p['id'] for p in m.halaman_produk(2, 3, 'harga', True, min_harga=200, maks_stok=6)['isi']] == \
+        ['P3', 'P2']
+
+
+def test_halaman_transaksi_batas_tanggal(muat):
+    m = muat()
+    m.ensure_csv(m.TRANSAKSI_FILE, m.TRANSAKSI_HEADER)
+    with open(m.TRANSAKSI_FILE, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([f'2025-01-{d:02d} 10:00:00', 'budi', 'P1', 'Produk P1', d, 1, d]
+                                for d in range(1, 11))
+    h = m.halaman_transaksi(1, 3, mulai='2025-01-03', akhir='2025-01-07')
+    assert [r['stok'] for r in h['isi']] == ['7', '6', '5'] and h['ada_berikutnya']
+    h = m.halaman_transaksi(2, 3, mulai='2025-01-03', akhir='2025-01-07')
+    assert [r['stok'] for r in h['isi']] == ['4', '3'] and not h['ada_berikutnya']
+    h = m.halaman_transaksi(1, 20, username='budi', terbaru_dulu=False)
+    assert len(h['isi']) == 10 and h['isi'][0]['stok'] == '1'
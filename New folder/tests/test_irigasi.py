@@ -0,0 +1,34 @@
+import pytest
+
+
+BACAAN = [
+    ('L1', '2025-01-01T08:00:00', 35, 0, 'padi'),
+    ('L1', '2025-01-01T07:00:00', 20, 0, ''),  # lebih lama, datang terlambat
+    ('L2', '2025-01-01T08:00:00', 30, 1, ''),
+    ('L3', '2025-01-01T08:00:00', 42, 0, 'cabai'),
+    ('L3', '2025-01-01T09:00:00', 44, 0, ''),
+    ('L4', 'bukan waktu', 10, 0, ''),
+]
+
+
+@pytest.mark.parametrize('tanpa_numpy', [False, True])
+def test_rekomendasi_batch(muat, monkeypatch, tanpa_numpy):
+    m = muat()
+    if tanpa_numpy:
+        monkeypatch.setattr(m, 'np', None)
+    hasil = {r['field_id']: r for r in m.rekomendasi_irigasi_batch(BACAAN, ambang={'padi': 40})}
+    assert list(hasil) == ['L1', 'L2', 'L3']
+    l1 = hasil['L1']
+    assert (l1['kelembaban'], l1['status'], l1['irigasi'], l1['batas']) == (35, 'kering', True, 40)
+    assert (l1['rata_kelembaban'], l1['min_kelembaban'], l1['pembacaan']) == (27.5, 20, 2)
+    assert (hasil['L2']['status'], hasil['L2']['irigasi']) == ('hujan', False)
+    # Cabai memakai ambang tanamannya (50), bukan BATAS_KERING.
+    assert (hasil['L3']['batas'], hasil['L3']['kelembaban'], hasil['L3']['irigasi']) == (50, 44, True)
+
+
+def test_rekomendasi_batch_sama_dengan_aturan_tunggal(muat):
+    m = muat()
+    for kel in (m.BATAS_KERING - 1, m.BATAS_KERING, m.BATAS_KERING + 1):
+        for hujan in (0, 1):
+            r = m.rekomendasi_irigasi_batch([('L', '2025-01-01T08:00:00', kel, hujan)])[0]
+            assert r['irigasi'] == m.rekomendasi_irigasi(kel, bool(hujan))['irigasi']
@@ -0,0 +1,46 @@
+from datetime import date
+
+MULAI = date(2025, 1, 1)
+
+
+def _lahan(n, kelembaban=45.0, laju=4.0):
+    return [{'field_id': f'L{i}', 'kelembaban': kelembaban - i, 'laju_susut': laju, 'tanaman': '',
+             'liter_per_persen': 100.0} for i in range(n)]
+
+
+def test_kapasitas_dan_anggaran_dipatuhi(muat):
+    m = muat()
+    hasil = m.jadwalkan_irigasi(_lahan(40), kapasitas_pompa=5000, anggaran_air=60000, hari=7, mulai=MULAI)
+    assert all(liter <= 5000 + 1e-6 for liter in hasil['pemakaian_harian'].values())
+    assert sum(j['liter'] for j in hasil['jadwal']) <= 60000 + 1
+    assert hasil['hari_lahan_kurang'] > 0  # kapasitas sengaja kurang
+
+
+def test_lahan_paling_kering_diairi_lebih_dulu(muat):
+    m = muat()
+    lahan = [{'field_id': 'basah', 'kelembaban': 39.0, 'laju_susut': 1.0, 'tanaman': '', 'liter_per_persen': 100.0},
+             {'field_id': 'kering', 'kelembaban': 20.0, 'laju_susut': 1.0, 'tanaman': '', 'liter_per_persen': 100.0}]
+    hasil = m.jadwalkan_irigasi(lahan, kapasitas_pompa=1000, hari=1, mulai=MULAI)
+    assert [j['field_id'] for j in hasil['jadwal']] == ['kering']
+
+
+def test_prakiraan_hujan_menunda_irigasi(muat):
+    m = muat()
+    lahan = _lahan(1, kelembaban=m.BATAS_KERING + 3, laju=4.0)
+    kering = m.jadwalkan_irigasi(lahan, hari=1, mulai=MULAI)
+    hujan = m.jadwalkan_irigasi(lahan, {(MULAI.isoformat(), ''): 20.0}, hari=1, mulai=MULAI)
+    assert kering['jadwal'] and not hujan['jadwal']
+
+
+def test_rencana_ulang_memakai_alokasi_lama(muat, tmp_path):
+    m = muat()
+    path = str(tmp_path / 'jadwal.json')
+    lahan = _lahan(20)
+    pertama = m.rencanakan_irigasi(lahan, kapasitas_pompa=8000, hari=7, mulai=MULAI, path=path)
+    kedua = m.rencanakan_irigasi(lahan, kapasitas_pompa=8000, hari=7, mulai=MULAI, path=path)
+    assert (kedua['dipakai_ulang'], kedua['dijadwalkan']) == (20, 0)
+    assert kedua['total_liter'] == pertama['total_liter']
+    lahan[3] = dict(lahan[3], kelembaban=10.0)
+    ketiga = m.rencanakan_irigasi(lahan, kapasitas_pompa=8000, hari=7, mulai=MULAI, path=path)
+    assert (ketiga['dipakai_ulang'], ketiga['dijadwalkan']) == (19, 1)
+    assert all(liter <= 8000 + 1e-6 for liter in ketiga['pemakaian_harian'].values())
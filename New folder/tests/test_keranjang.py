@@ -0,0 +1,39 @@
+from conftest import produk
+
+
+def test_checkout_stok_kurang_tidak_menulis_apa_pun(muat):
+    m = muat()
+    produk(m, 'P1', stok=5)
+    produk(m, 'P2', stok=1)
+    berhasil, pesan = m.checkout_keranjang('budi', [('P1', 2), ('P2', 1), ('P2', 1)])
+    assert not berhasil and 'Produk P2' in pesan
+    baru = muat()
+    assert (baru.katalog.cari('P1')['stok'], baru.katalog.cari('P2')['stok']) == (5, 1)
+    assert list(baru.baris_transaksi()) == []
+
+
+def test_checkout_produk_tidak_ada_ditolak(muat):
+    m = muat()
+    produk(m, 'P1', stok=5)
+    assert m.checkout_keranjang('budi', [('P1', 1), ('P9', 1)]) == (False, "Produk 'P9' tidak ditemukan.")
+    assert muat().katalog.cari('P1')['stok'] == 5
+
+
+def test_keranjang_produk_dihapus_sebelum_bayar(muat, monkeypatch, capsys):
+    m = muat()
+    produk(m, 'P1', stok=5)
+    produk(m, 'P2', stok=5)
+    jawaban = iter(['P1', '1', 'P2', '2', ''])
+
+    def masukan(prompt=''):
+        teks = next(jawaban, 'ya')
+        if teks == '':
+            # Terminal lain menghapus P2 setelah dimasukkan ke keranjang.
+            muat().hapus_produk_id('P2')
+        return teks
+    monkeypatch.setattr('builtins.input', masukan)
+    m.transaksi_keranjang()
+    keluaran = capsys.readouterr().out
+    assert "Produk 'P2' sudah tidak ada" in keluaran
+    assert "Transaksi berhasil." in keluaran
+    assert [r[2:5] for r in m.baris_transaksi()] == [['P1', 'Produk P1', '1']]
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from conftest import produk
+
+
+def test_dua_sesi_bersamaan_dalam_satu_proses(muat):
+    m = muat()
+    produk(m, 'P1', stok=10, harga=100)
+    for nama in ('budi', 'sari'):
+        assert m.layanan_daftar(nama, 'rahasia123')[0]
+    budi, _ = m.layanan_login('budi', 'rahasia123')
+    sari, _ = m.layanan_login('sari', 'rahasia123')
+    assert m.layanan_beli(budi, [('P1', 2)])[0]
+    assert m.layanan_beli(sari, [('P1', 3)])[0]
+    assert [r['stok'] for r in m.layanan_riwayat(budi)] == ['2']
+    assert [r['stok'] for r in m.layanan_riwayat(sari)] == ['3']
+    assert m.pengguna_sekarang is None
+    with pytest.raises(PermissionError):
+        m.layanan_riwayat(budi, username='sari')
+    with pytest.raises(PermissionError):
+        m.layanan_hapus_pengguna(budi, 'sari')
+
+
+def test_cli_daftar_beli_riwayat(muat, capsys):
+    m = muat()
+    produk(m, 'P1', stok=10, harga=100)
+
+    def jalan(*argv):
+        kode = m._main(list(argv))
+        return kode, json.loads(capsys.readouterr().out)
+
+    assert jalan('daftar', 'budi', 'rahasia123')[0] == 0
+    assert jalan('beli', '--user', 'budi', '--password', 'rahasia123', 'P1:4') == \
+        (0, {'berhasil': True, 'pesan': "Transaksi berhasil."})
+    kode, hasil = jalan('riwayat', '--user', 'budi', '--password', 'rahasia123')
+    assert kode == 0 and [(r['id'], r['stok']) for r in hasil] == [('P1', '4')]
+    kode, hasil = jalan('beli', '--user', 'budi', '--password', 'salah', 'P1:1')
+    assert kode == 1 and hasil['berhasil'] is False
+    kode, hasil = jalan('beli', '--user', 'budi', '--password', 'rahasia123', 'P1:99')
+    assert kode == 1 and hasil['berhasil'] is False
+    assert jalan('produk')[1][0]['stok'] == 6
@@ -0,0 +1,51 @@
+import json
+import random
+
+
+def test_jendela_sama_dengan_hitungan_langsung(muat):
+    m = muat()
+    acak = random.Random(7)
+    j = m.JendelaLahan()
+    semua = []
+    t = 0.0
+    for _ in range(500):
+        t += acak.choice([10, 60, 300])
+        v = acak.uniform(10, 70)
+        h = int(acak.random() < 0.05)
+        j.tambah(t, v, h, 1800, 50)
+        semua.append((t, v, h))
+        isi = [x for x in semua if x[0] >= t - 1800][-50:]
+        assert list(j.data) == isi
+        assert abs(j.rata() - sum(x[1] for x in isi) / len(isi)) < 1e-6
+        assert j.min() == min(x[1] for x in isi)
+        assert j.hujan == sum(x[2] for x in isi)
+
+
+def test_histeresis_hanya_mengirim_perubahan(muat):
+    m = muat()
+    p = m.PemantauIrigasi(jendela_detik=60, histeresis=5)
+    batas = m.BATAS_KERING
+    bacaan = [(batas - 5, 0), (batas - 6, 0), (batas + 2, 0), (batas + 4, 0),
+              (batas + 6, 0), (batas + 7, 0), (batas - 3, 0), (batas - 3, 1)]
+    aksi = []
+    for i, (v, h) in enumerate(bacaan):
+        e = p.proses('L1', 1_700_000_000 + i * 100, v, h)
+        aksi.append(e and e['aksi'])
+    # Masih di bawah batas + histeresis (batas+2, batas+4): irigasi tetap jalan.
+    assert aksi == ['mulai', None, None, None, 'berhenti', None, 'mulai', 'berhenti']
+    assert p.pembacaan == len(bacaan)
+
+
+def test_pantau_sensor_dari_file_dengan_antrian_kecil(muat, tmp_path):
+    m = muat()
+    path = tmp_path / 'sensor.txt'
+    baris = ['L1,1700000000,20,0', 'rusak', json.dumps({'field_id': 'L2', 'timestamp': 1700000000,
+                                                         'kelembaban': 60, 'hujan': 0})]
+    baris += [f'L1,{1700000000 + i * 60},{60 + i},0' for i in range(1, 200)]
+    path.write_text('\n'.join(baris) + '\n', encoding='utf-8')
+    event = []
+    hasil = m.pantau_sensor(str(path), m.PemantauIrigasi(jendela_detik=120), kirim=event.append,
+                            ukuran_antrian=4)
+    assert (hasil['pembacaan'], hasil['ditolak'], hasil['lahan']) == (201, 1, 2)
+    assert [json.loads(e)['aksi'] for e in event] == ['mulai', 'berhenti']
+    assert hasil['event'] == 2 and hasil['pembacaan_per_detik'] > 0
@@ -0,0 +1,56 @@
+import csv
+import io
+import random
+
+import pytest
+
+
+def _tulis(m, n=701):
+    """transaksi.csv dengan nama produk berisi koma, kutip dan baris baru; kembalikan offset awal baris."""
+    acak = random.Random(17)
+    buf = io.StringIO(newline='')
+    w = csv.writer(buf)
+    w.writerow(m.TRANSAKSI_HEADER)
+    awal_baris = []
+    for i in range(n):
+        pid = acak.randrange(40)
+        nama = [f'Produk {pid}', f'Pupuk, "{pid}"', f'Benih\n{pid}\nunggul', f'Padi\r\n"{pid}"'][pid % 4]
+        jumlah = acak.randint(1, 9)
+        awal_baris.append(len(buf.getvalue().encode('utf-8')))
+        w.writerow([f'2025-{1 + i * 3 // n:02d}-{1 + i % 28:02d} 10:00:00', f'u{acak.randrange(7)}',
+                    f'P{pid}', nama, jumlah, 150, jumlah * 150])
+    data = buf.getvalue().encode('utf-8')
+    awal_baris.append(len(data))
+    data += b'2025-04-01 10:00:00,u1,P1,terpot'  # ekor tanpa newline
+    with open(m.TRANSAKSI_FILE, 'wb') as f:
+        f.write(data)
+    return awal_baris, len(data)
+
+
+def test_rentang_hanya_berawal_di_awal_baris(muat):
+    m = muat()
+    awal_baris, ukuran = _tulis(m)
+    assert ukuran % 2 == 1
+    assert sum('\n' in r['nama'] for r in m.pindai_transaksi(pekerja=1)) > 100
+    awal = m._awal_data(m.TRANSAKSI_FILE)
+    for potong, blok in ((37, 16), (101, 7), (1000, 1 << 16)):
+        rentang = m._rentang_baris(m.TRANSAKSI_FILE, awal, ukuran, potong, blok)
+        assert len(rentang) > 10 and rentang[0][0] == awal and rentang[-1][1] == ukuran
+        assert all(a < b for a, b in rentang)
+        assert {a for a, _ in rentang} <= set(awal_baris)
+
+
+@pytest.mark.parametrize('saring', [
+    {}, {'username': 'u3'}, {'mulai': '2025-02-01', 'akhir': '2025-02-20'}, {'produk': 'P2'},
+])
+def test_pindai_paralel_sama_dengan_berurutan(muat, monkeypatch, saring):
+    m = muat()
+    _tulis(m)
+    berurutan = m.pindai_transaksi(**saring, pekerja=1)
+    agregat = m.laporan_penjualan(5, 7, None, **saring)
+    monkeypatch.setattr(m, 'BATAS_PARALEL', 0)
+    monkeypatch.setattr(m, 'UKURAN_RENTANG', 97)
+    assert m.pindai_transaksi(**saring, pekerja=1) == berurutan
+    assert m.pindai_transaksi(**saring, pekerja=2) == berurutan
+    monkeypatch.setattr(m, 'PEKERJA_PINDAI', 2)
+    assert m.laporan_penjualan(5, 7, None, **saring) == agregat
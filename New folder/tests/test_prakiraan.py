@@ -0,0 +1,48 @@
+import pytest
+
+from conftest import produk
+
+
+def _catat_laju(m, monkeypatch):
+    dihitung = []
+    asli = m.laju_permintaan
+
+    def laju_permintaan(seri, *args):
+        dihitung.append(set(seri))
+        return asli(seri, *args)
+    monkeypatch.setattr(m, 'laju_permintaan', laju_permintaan)
+    return dihitung
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_prakiraan_hanya_menghitung_produk_yang_terjual(muat, monkeypatch, backend):
+    env = {'SISTA_BACKEND': 'sqlite'} if backend == 'sqlite' else {}
+    m = muat(**env)
+    for pid in ('P1', 'P2', 'P3'):
+        produk(m, pid, stok=100)
+    assert m.beli('budi', 'P1', 3)[0] and m.beli('budi', 'P2', 1)[0]
+    dihitung = _catat_laju(m, monkeypatch)
+    m.prakiraan_stok()
+    assert dihitung == [{'P1', 'P2'}]
+    m.prakiraan_stok()
+    assert len(dihitung) == 1  # tidak ada penjualan baru
+    # Penjualan dari proses lain ikut terbaca, tetapi hanya P2 yang dihitung ulang.
+    assert muat(**env).beli('sari', 'P2', 4)[0]
+    hasil = m.prakiraan_stok()
+    assert dihitung[1:] == [{'P2'}]
+    monkeypatch.undo()
+    assert hasil == muat(**env).prakiraan_stok()
+
+
+def test_prakiraan_dihitung_penuh_setelah_kompaksi(muat, monkeypatch):
+    m = muat()
+    produk(m, 'P1', stok=1000)
+    monkeypatch.setattr(m, 'BATAS_KOMPAKSI', 3)
+    dihitung = _catat_laju(m, monkeypatch)
+    m.prakiraan_stok()
+    for _ in range(2):
+        assert m.beli('budi', 'P1', 1)[0]
+        m.prakiraan_stok()
+    assert dihitung == [set(), {'P1'}, {'P1'}]
+    assert m.beli('budi', 'P1', 1)[0]  # jurnal dikompaksi ke snapshot
+    assert m.prakiraan_stok()[0]['laju_harian'] == muat().prakiraan_stok()[0]['laju_harian']
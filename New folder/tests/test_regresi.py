@@ -0,0 +1,261 @@
+import pytest
+
+from conftest import produk
+
+
+def test_checkout_mengurangi_stok_dan_mencatat(muat):
+    m = muat()
+    produk(m, 'P1', stok=5)
+    assert m.beli('budi', 'P1', 2) == (True, "Transaksi berhasil.")
+    assert muat().katalog.cari('P1')['stok'] == 3
+    rows = list(m.baris_transaksi())
+    assert [r[1:5] for r in rows] == [['budi', 'P1', 'Produk P1', '2']]
+
+
+def test_jurnal_katalog_ekor_terpotong_tidak_dipotong_pembaca(muat):
+    m = muat(SISTA_JURNAL='1')
+    produk(m, 'P1', stok=5)
+    jurnal = m.katalog.jurnal_path
+    # Penulis lain baru menulis sebagian catatan saat pembaca memuat.
+    with open(jurnal, 'a', newline='') as f:
+        f.write('U,P1,Produk P1,1000,')
+    ukuran = m.os.path.getsize(jurnal)
+    assert muat(SISTA_JURNAL='1').katalog.cari('P1')['stok'] == 5
+    assert m.os.path.getsize(jurnal) == ukuran
+    with open(jurnal, 'a', newline='') as f:
+        f.write('7\r\n')
+    assert muat(SISTA_JURNAL='1').katalog.cari('P1')['stok'] == 7
+
+
+def test_jurnal_katalog_ekor_sisa_crash_dibuang_penulis(muat):
+    m = muat(SISTA_JURNAL='1')
+    produk(m, 'P1', stok=5)
+    with open(m.katalog.jurnal_path, 'a', newline='') as f:
+        f.write('U,P1,Produk P1,1000,9')
+    m2 = muat(SISTA_JURNAL='1')
+    assert m2.beli('budi', 'P1', 1)[0]
+    assert muat(SISTA_JURNAL='1').katalog.cari('P1')['stok'] == 4
+
+
+def _tulis_transaksi(m, n, mulai=0):
+    import csv
+    m.ensure_csv(m.TRANSAKSI_FILE, m.TRANSAKSI_HEADER)
+    with open(m.TRANSAKSI_FILE, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([f'2025-01-01 10:00:{i % 60:02d}', f'u{i % 3}', 'P1', 'Produk P1', 1, 100, 100]
+                                for i in range(mulai, mulai + n))
+
+
+def _entri_idx(m):
+    with open(m.TRANSAKSI_FILE + '.idx', newline='', encoding='utf-8') as f:
+        return list(m.csv.reader(f))
+
+
+def test_indeks_dipakai_bersama_tanpa_entri_ganda(muat):
+    m = muat()
+    # Dua objek indeks meniru dua proses yang berbagi transaksi.csv.idx.
+    a, b = m.IndeksTransaksi(m.TRANSAKSI_FILE), m.IndeksTransaksi(m.TRANSAKSI_FILE)
+    _tulis_transaksi(m, 30)
+    a.sinkron()
+    b.sinkron()
+    _tulis_transaksi(m, 30, 30)
+    b.sinkron()
+    a.sinkron()
+    assert len(_entri_idx(m)) == 60
+    for idx in (a, b, m.IndeksTransaksi(m.TRANSAKSI_FILE)):
+        assert len(idx.riwayat('u0')) == 20
+
+
+def test_indeks_sinkron_serentak(muat):
+    m = muat()
+    _tulis_transaksi(m, 600)
+    indeks = [m.IndeksTransaksi(m.TRANSAKSI_FILE) for _ in range(6)]
+    with m.ThreadPoolExecutor(6) as ex:
+        hasil = list(ex.map(lambda idx: len(idx.riwayat('u1')), indeks))
+    assert hasil == [200] * 6
+    assert len(_entri_idx(m)) == 600
+
+
+def test_indeks_tanpa_baris_tidak_menulis_idx(muat):
+    m = muat()
+    idx = m.IndeksTransaksi(m.TRANSAKSI_FILE)
+    idx.sinkron()
+    idx.sinkron()
+    assert not m.os.path.exists(idx.idx_path)
+    assert idx.riwayat('u0') == []
+
+
+def test_indeks_dibangun_ulang_saat_file_diganti(muat):
+    m = muat()
+    _tulis_transaksi(m, 9)
+    idx = m.IndeksTransaksi(m.TRANSAKSI_FILE)
+    assert len(idx.riwayat('u0')) == 3
+    # Ganti isi file (ukuran sama) di luar program: offset lama menunjuk user lain.
+    with open(m.TRANSAKSI_FILE, encoding='utf-8') as f:
+        isi = f.read()
+    with open(m.TRANSAKSI_FILE, 'w', encoding='utf-8', newline='') as f:
+        f.write(isi.replace(',u0,', ',ux,').replace(',u1,', ',u0,'))
+    assert len(idx.riwayat('u0')) == 3
+    assert len(list(idx.iter_riwayat('u0'))) == 3
+
+
+def test_checkout_gagal_mencatat_tidak_mengurangi_stok(muat, monkeypatch):
+    m = muat()
+    produk(m, 'P1', stok=18)
+
+    def gagal(rows, path=None):
+        raise OSError('disk penuh')
+    monkeypatch.setattr(m, 'catat_transaksi', gagal)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            m.beli('budi', 'P1', 1)
+    assert m.katalog.cari('P1')['stok'] == 18
+    assert muat().katalog.cari('P1')['stok'] == 18
+    assert list(m.baris_transaksi()) == []
+
+
+def test_checkout_gagal_menulis_katalog_memulihkan_stok_di_memori(muat, monkeypatch):
+    m = muat()
+    produk(m, 'P1', stok=18)
+    produk(m, 'P2', stok=4)
+
+    def gagal(prods):
+        raise OSError('disk penuh')
+    monkeypatch.setattr(m.katalog, 'catat_banyak', gagal)
+    with pytest.raises(OSError):
+        m.checkout_keranjang('budi', [('P1', 2), ('P2', 1)])
+    assert (m.katalog.cari('P1')['stok'], m.katalog.cari('P2')['stok']) == (18, 4)
+
+
+def test_impor_gagal_di_tengah_tidak_mengubah_katalog(muat, tmp_path):
+    m = muat()
+    produk(m, 'P1', stok=5)
+    sumber = tmp_path / 'impor.jsonl'
+    sumber.write_text('{"id": "P1", "harga": 1, "stok": 99}\n'
+                      '{"id": "P9", "nama_produk": "Baru", "harga": 1, "stok": 1}\n'
+                      '[1, 2]\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='Baris 3'):
+        m.impor_produk(str(sumber), ukuran_chunk=1)
+    assert m.katalog.cari('P9') is None
+    assert m.katalog.cari('P1')['stok'] == 5
+    # Pembelian berikutnya tidak ikut menulis sisa impor yang gagal.
+    assert m.beli('budi', 'P1', 1)[0]
+    m2 = muat()
+    assert m2.katalog.cari('P9') is None
+    assert m2.katalog.cari('P1')['stok'] == 4
+
+
+def test_impor_berhasil_mengganti_katalog(muat, tmp_path):
+    m = muat(SISTA_JURNAL='1')
+    produk(m, 'P1', stok=5)
+    sumber = tmp_path / 'impor.csv'
+    sumber.write_text('id,nama_produk,harga,stok\nP1,Padi,10,7\nP2,Jagung,20,3\nP3,,1,1\n', encoding='utf-8')
+    assert m.impor_produk(str(sumber)) == {'baru': 1, 'diperbarui': 1, 'duplikat': 0, 'ditolak': 1}
+    assert m.katalog.cari('padi')['stok'] == 7
+    m2 = muat(SISTA_JURNAL='1')
+    assert [(p['id'], p['nama'], p['stok']) for p in m2.katalog.segarkan()] == [('P1', 'Padi', 7), ('P2', 'Jagung', 3)]
+
+
+def _permintaan(server, metode, path, query=None, body=b'', token=None):
+    headers = {'authorization': f'Bearer {token}'} if token else {}
+    return server._m.asyncio.run(server.tangani(metode, path, query or {}, headers, body))
+
+
+def _server(m):
+    server = m.ServerSista()
+    server._m = m
+    assert m.daftarkan_pengguna('budi', 'rahasia123')[0]
+    return server
+
+
+def test_server_menolak_body_bukan_objek_dan_halaman_tidak_valid(muat):
+    m = muat()
+    server = _server(m)
+    for body in (b'[]', b'"x"', b'1'):
+        assert _permintaan(server, 'POST', '/login', body=body)[0] == 400
+    status, hasil = _permintaan(server, 'POST', '/login', body=b'{"username": "budi", "password": "rahasia123"}')
+    assert status == 200
+    token = hasil['token']
+    assert _permintaan(server, 'POST', '/beli', body=b'[]', token=token)[0] == 400
+    for q in ({'halaman': ['1'], 'per_halaman': ['0']}, {'halaman': ['0']},
+              {'halaman': ['1'], 'per_halaman': [str(m.MAKS_PER_HALAMAN + 1)]}):
+        assert _permintaan(server, 'GET', '/produk', q)[0] == 400
+        assert _permintaan(server, 'GET', '/riwayat', q, token=token)[0] == 400
+    assert _permintaan(server, 'GET', '/riwayat', {'per_halaman': ['5']}, token=token) == (200, [])
+
+
+def test_server_token_sesi_kedaluwarsa(muat, monkeypatch):
+    m = muat()
+    server = _server(m)
+    body = b'{"username": "budi", "password": "rahasia123"}'
+    token = _permintaan(server, 'POST', '/login', body=body)[1]['token']
+    assert _permintaan(server, 'GET', '/riwayat', token=token)[0] == 200
+    monkeypatch.setattr(m, 'SESI_TTL', 0)
+    token = _permintaan(server, 'POST', '/login', body=body)[1]['token']
+    assert _permintaan(server, 'GET', '/riwayat', token=token)[0] == 401
+    assert token not in server.sesi
+
+
+def test_migrasi_sqlite_tidak_menghidupkan_pengguna_terhapus(muat, tmp_path):
+    m = muat()
+    assert m.daftarkan_pengguna('budi', 'rahasia123')[0]
+    assert m.daftarkan_pengguna('sari', 'rahasia123')[0]
+    assert m.hapus_pengguna('sari')[0]
+    hidup = m.read_all_users()
+    hasil = m.migrasi_ke_sqlite(str(tmp_path / 'sista.db'))
+    assert 'sari' not in hidup
+    assert hasil['pengguna'] == len(hidup)
+    tujuan = m.PenyimpananSQLite(str(tmp_path / 'sista.db'))
+    assert tujuan.baca_pengguna() == dict(hidup)
+
+
+def test_jurnal_ringkasan_ekor_terpotong(muat):
+    m = muat()
+    produk(m, 'P1', stok=10, harga=100)
+    assert m.beli('budi', 'P1', 1)[0]
+    with open(m.ringkasan_penjualan.jurnal_path, 'a') as f:
+        f.write('["2025-01-01", "P1", 5')  # crash di tengah penulisan
+    m2 = muat()
+    assert m2.beli('budi', 'P1', 2)[0]
+    assert m2.beli('budi', 'P1', 3)[0]
+    assert muat().ringkasan_produk('P1') == {'stok': 6, 'total': 600, 'transaksi': 3}
+
+
+def test_jurnal_ringkasan_rusak_dihitung_ulang(muat):
+    m = muat()
+    produk(m, 'P1', stok=10, harga=100)
+    assert m.beli('budi', 'P1', 1)[0]
+    with open(m.ringkasan_penjualan.jurnal_path, 'a') as f:
+        f.write('["2025-01-01", "P1", 5["2025-01-01", "P1", 1, 100]\n')
+    m2 = muat()
+    assert m2.beli('budi', 'P1', 2)[0]
+    assert muat().ringkasan_produk('P1') == {'stok': 3, 'total': 300, 'transaksi': 2}
+
+
+def test_metrik_mencatat_byte_yang_ditulis(muat, tmp_path):
+    import atexit
+    m = muat(SISTA_JURNAL='1', SISTA_METRIK=str(tmp_path / 'metrik.prom'))
+    atexit.unregister(m.instrumen.tulis)
+    produk(m, 'P1', stok=10)
+    assert m.beli('budi', 'P1', 2)[0]
+    operasi = m.instrumen.operasi
+    ukuran = m.os.path.getsize
+    header = len(','.join(m.TRANSAKSI_HEADER)) + 2
+    assert operasi['transaksi.tulis'][2:4] == [ukuran(m.TRANSAKSI_FILE) - header, 1]
+    assert operasi['produk.jurnal'][2] == ukuran(m.katalog.jurnal_path)
+    assert operasi['ringkasan.tambah'][2] == ukuran(m.ringkasan_penjualan.jurnal_path)
+    assert operasi['transaksi.indeks'][2] > 0
+
+
+def test_snapshot_jurnal_hapus_produk_lalu_buka_ulang(muat):
+    m = muat()
+    for pid in ('P1', 'P2', 'P3'):
+        produk(m, pid)
+    mode = {'SISTA_SNAPSHOT': '1', 'SISTA_JURNAL': '1'}
+    m = muat(**mode)
+    assert m.hapus_produk_id('P2')['id'] == 'P2'
+    m2 = muat(**mode)
+    assert [p['id'] for p in m2.katalog.segarkan()] == ['P1', 'P3']
+    assert m2.katalog.cari('P2') is None
+    assert m2.katalog.cari('produk p2') is None
+    assert m2.beli('budi', 'P3', 1)[0]
+    assert [(p['id'], p['stok']) for p in muat(**mode).katalog.segarkan()] == [('P1', 10), ('P3', 9)]
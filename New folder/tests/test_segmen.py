@@ -0,0 +1,50 @@
+import csv
+import json
+
+from conftest import produk
+
+
+def _baris(waktu, user='budi', pid='P1', jumlah=1, harga=100):
+    return [waktu, user, pid, f'Produk {pid}', jumlah, harga, jumlah * harga]
+
+
+def test_manifest_dua_proses_tidak_saling_menimpa(muat):
+    m = muat(SISTA_SEGMEN='bulanan')
+    # Dua objek penyimpanan meniru dua terminal yang membuka folder segmen yang sama.
+    a = m.PenyimpananSegmen(m.SEGMEN_DIR)
+    b = m.PenyimpananSegmen(m.SEGMEN_DIR)
+    a.tambah([_baris('2025-01-05 10:00:00')])
+    b.tambah([_baris('2025-02-05 10:00:00')])
+    a.tambah([_baris('2025-03-05 10:00:00')])
+    with open(a.manifest_path, encoding='utf-8') as f:
+        assert sorted(json.load(f)) == ['2025-01', '2025-02', '2025-03']
+    assert [r['waktu'][:7] for r in b.baca()] == ['2025-01', '2025-02', '2025-03']
+    b.arsipkan()
+    assert a.manifest()['2025-02']['arsip'] and not a.manifest()['2025-03']['arsip']
+    assert len(list(a.baca())) == 3
+
+
+def test_transaksi_lama_tetap_dibaca_sebelum_diimpor(muat):
+    m = muat()
+    produk(m, 'P1', stok=10, harga=100)
+    assert m.beli('budi', 'P1', 2)[0]
+    m2 = muat(SISTA_SEGMEN='bulanan')
+    assert m2.beli('budi', 'P1', 3)[0]
+    assert [r['stok'] for r in m2.iter_transaksi(username='budi', terbaru_dulu=False)] == ['2', '3']
+    assert [r['stok'] for r in m2.iter_transaksi(username='budi', terbaru_dulu=True)] == ['3', '2']
+
+
+def test_cli_segmen_impor_dan_arsipkan(muat, capsys):
+    m = muat(SISTA_SEGMEN='bulanan')
+    m.append_user('admin', m.hash_password('rahasia123'), 'admin')
+    m.ensure_csv(m.TRANSAKSI_FILE, m.TRANSAKSI_HEADER)
+    with open(m.TRANSAKSI_FILE, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([_baris('2025-01-05 10:00:00'), _baris('2025-02-05 10:00:00')])
+    args = m.buat_parser().parse_args(['segmen', '--user', 'admin', '--password', 'rahasia123',
+                                       '--impor', '--arsipkan'])
+    assert m.jalankan_perintah(args) == {'diimpor': 2, 'diarsipkan': ['2025-01']}
+    assert not m.os.path.exists(m.TRANSAKSI_FILE)
+    assert m.os.path.exists(m.TRANSAKSI_FILE + '.diimpor')
+    # Tidak terbaca dua kali setelah diimpor.
+    assert [r['waktu'][:7] for r in m.iter_transaksi(terbaru_dulu=False)] == ['2025-01', '2025-02']
+    assert m.jalankan_perintah(args) == {'diimpor': 0, 'diarsipkan': []}
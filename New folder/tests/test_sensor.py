@@ -0,0 +1,71 @@
+import random
+from datetime import datetime
+
+T0 = 1_700_000_000 // 86400 * 86400
+
+
+def _bacaan(n, acak):
+    t = T0
+    hasil = []
+    for _ in range(n):
+        t += acak.choice([60, 600, 1800])
+        hasil.append(('L/1', float(t), acak.randint(20, 160) / 2, acak.random() < 0.1))
+    return hasil
+
+
+def _rollup_langsung(bacaan, detik):
+    bucket = {}
+    for _, t, v, h in bacaan:
+        b = bucket.setdefault(int(t // detik * detik), [])
+        b.append((v, h))
+    return [{'waktu': datetime.fromtimestamp(awal).strftime("%Y-%m-%d %H:%M:%S"), 'pembacaan': len(isi),
+             'rata_kelembaban': round(sum(v for v, _ in isi) / len(isi), 2),
+             'min_kelembaban': min(v for v, _ in isi), 'max_kelembaban': max(v for v, _ in isi),
+             'hujan': sum(h for _, h in isi)}
+            for awal, isi in sorted(bucket.items())]
+
+
+def test_rollup_sama_dengan_hitungan_langsung(muat, tmp_path):
+    m = muat()
+    bacaan = _bacaan(800, random.Random(3))
+    seri = m.SeriSensor(str(tmp_path / 'sensor'))
+    # Beberapa batch, sehingga bucket terakhir tiap batch harus digabung dengan batch berikutnya.
+    for i in range(0, len(bacaan), 97):
+        seri.tambah_banyak(bacaan[i:i + 97])
+    assert seri.tambah('L/1', T0, 50.0, False) == 0  # lebih lama dari data terakhir
+    baru = m.SeriSensor(str(tmp_path / 'sensor'))
+    assert baru.lahan() == ['L/1']
+    for res, detik in m.RESOLUSI_ROLLUP.items():
+        assert baru.rollup('L/1', res) == _rollup_langsung(bacaan, detik)
+    hari = _rollup_langsung(bacaan, 86400)
+    assert baru.rollup('L/1', 'hari', T0 + 86400, T0 + 3 * 86400) == hari[1:3]
+
+
+def test_rentang_zero_copy(muat, tmp_path):
+    m = muat()
+    bacaan = _bacaan(300, random.Random(5))
+    seri = m.SeriSensor(str(tmp_path / 'sensor'))
+    seri.tambah_banyak(bacaan)
+    awal, akhir = bacaan[50][1], bacaan[120][1]
+    r = seri.rentang('L/1', awal, akhir)
+    assert isinstance(r['waktu'], memoryview)
+    assert list(r['waktu']) == [b[1] for b in bacaan[50:120]]
+    assert list(r['kelembaban']) == [b[2] for b in bacaan[50:120]]
+    assert list(r['hujan']) == [int(b[3]) for b in bacaan[50:120]]
+
+
+def test_pulih_setelah_penulisan_terputus(muat, tmp_path):
+    m = muat()
+    bacaan = _bacaan(200, random.Random(9))
+    seri = m.SeriSensor(str(tmp_path / 'sensor'))
+    seri.tambah_banyak(bacaan)
+    # Crash: kolom waktu sudah ditulis satu record lagi, kolom lain dan rollup belum.
+    with open(seri._path('L/1', 'waktu'), 'ab') as f:
+        f.write(m.struct.pack('<d', bacaan[-1][1] + 60))
+    with open(seri._path('L/1', 'jam'), 'ab') as f:
+        f.write(b'\0' * 5)
+    baru = m.SeriSensor(str(tmp_path / 'sensor'))
+    tambahan = ('L/1', bacaan[-1][1] + 120, 40.0, False)
+    assert baru.tambah_banyak([tambahan]) == 1
+    assert len(baru.rentang('L/1')['waktu']) == 201
+    assert baru.rollup('L/1', 'jam') == _rollup_langsung(bacaan + [tambahan], 3600)
@@ -0,0 +1,67 @@
+import threading
+
+from conftest import produk
+
+
+def _jalankan(m, server, mentah):
+    """Kirim permintaan HTTP mentah ke server sungguhan; kembalikan baris status jawaban."""
+    async def uji():
+        s = await server.mulai()
+        try:
+            reader, writer = await m.asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(mentah)
+            await writer.drain()
+            status = await reader.readline()
+            writer.close()
+            return status.decode('latin-1').strip()
+        finally:
+            server._tugas_segarkan.cancel()
+            s.close()
+            await s.wait_closed()
+    return m.asyncio.run(uji())
+
+
+def test_content_length_tidak_valid_ditolak(muat):
+    m = muat()
+    for nilai, status in (('-5', '400'), ('abc', '400'), (str(m.MAKS_BODY + 1), '413')):
+        mentah = f'POST /login HTTP/1.1\r\nContent-Length: {nilai}\r\n\r\n{{}}'.encode()
+        assert _jalankan(m, m.ServerSista(port=0), mentah).split()[1] == status
+    mentah = b'POST /login HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}'
+    assert _jalankan(m, m.ServerSista(port=0), mentah).split()[1] == '401'
+
+
+def test_login_hash_di_luar_thread_penulis(muat, monkeypatch):
+    m = muat()
+    m.append_user('lama', 'teksbiasa', 'user')  # akun lama tanpa hash
+    server = m.ServerSista()
+    thread = []
+    asli = m.verifikasi_password
+
+    def verifikasi(password, tersimpan):
+        thread.append(threading.current_thread().name)
+        return asli(password, tersimpan)
+    monkeypatch.setattr(m, 'verifikasi_password', verifikasi)
+    body = b'{"username": "lama", "password": "teksbiasa"}'
+    assert m.asyncio.run(server.tangani('POST', '/login', {}, {}, body))[0] == 200
+    assert thread and all(t.startswith('sista-hash') for t in thread)
+    assert m.password_ter_hash(m.cari_pengguna('lama')['password'])
+    assert m.asyncio.run(server.tangani('POST', '/login', {}, {}, body))[0] == 200
+
+
+def test_produk_berhalaman_dan_cari_di_thread_penulis(muat, monkeypatch):
+    m = muat()
+    produk(m, 'P1')
+    server = m.ServerSista()
+    thread = []
+    for nama in ('layanan_produk', 'layanan_cari'):
+        asli = getattr(m, nama)
+
+        def bungkus(*args, _asli=asli, **kwargs):
+            thread.append(threading.current_thread().name)
+            return _asli(*args, **kwargs)
+        monkeypatch.setattr(m, nama, bungkus)
+    status, hasil = m.asyncio.run(server.tangani('GET', '/produk', {'halaman': ['1']}, {}, b''))
+    assert status == 200 and [p['id'] for p in hasil['isi']] == ['P1']
+    status, hasil = m.asyncio.run(server.tangani('GET', '/cari', {'q': ['prod']}, {}, b''))
+    assert status == 200 and [p['id'] for p in hasil] == ['P1']
+    assert len(thread) == 2 and all(t.startswith('sista-penulis') for t in thread)
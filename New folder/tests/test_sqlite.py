@@ -0,0 +1,47 @@
+from conftest import produk
+
+
+def _skenario(m):
+    """Urutan operasi yang sama untuk kedua backend; kembalikan semua hasil yang terlihat."""
+    for pid, stok, harga in (('P1', 5, 100), ('P2', 3, 250), ('P3', 8, 40)):
+        produk(m, pid, stok=stok, harga=harga)
+    for nama in ('budi', 'sari'):
+        assert m.daftarkan_pengguna(nama, 'rahasia123')[0]
+    hasil = {'daftar_ganda': m.daftarkan_pengguna('budi', 'lain')}
+    budi, _ = m.cek_login('budi', 'rahasia123')
+    sari, _ = m.cek_login('sari', 'rahasia123')
+    hasil['beli'] = [
+        m.layanan_beli(budi, [('P1', 2), ('P2', 1)]),
+        m.layanan_beli(sari, [('P2', 5)]),
+        m.layanan_beli(sari, [('P3', 4), ('P1', 1)]),
+        m.layanan_beli(budi, [('P9', 1)]),
+    ]
+    hasil['stok'] = {p['id']: p['stok'] for p in m.katalog.segarkan()}
+    kolom = ('username', 'id', 'stok', 'harga', 'total')
+    hasil['riwayat'] = {s.username: [tuple(str(r[k]) for k in kolom) for r in m.layanan_riwayat(s, 1, 10)]
+                        for s in (budi, sari)}
+    hasil['pengguna'] = sorted(m.read_all_users())
+    hasil['ringkasan'] = {pid: m.ringkasan_produk(pid) for pid in ('P1', 'P2', 'P3')}
+    return hasil
+
+
+def test_sqlite_sama_dengan_csv(muat, tmp_path):
+    csv_ = _skenario(muat())
+    (tmp_path / 'sql').mkdir()
+    sql = _skenario(muat(SISTA_DATA_DIR=str(tmp_path / 'sql'), SISTA_BACKEND='sqlite',
+                         SISTA_DB=str(tmp_path / 'sql' / 'sista.db')))
+    assert sql == csv_
+    assert csv_['stok'] == {'P1': 2, 'P2': 2, 'P3': 4}
+
+
+def test_migrasi_lalu_baca_sama(muat, tmp_path):
+    m = muat()
+    awal = _skenario(m)
+    db = str(tmp_path / 'sista.db')
+    assert m.migrasi_ke_sqlite(db) == {'pengguna': 2, 'produk': 3, 'transaksi': 4}
+    s = muat(SISTA_BACKEND='sqlite', SISTA_DB=db)
+    assert {p['id']: p['stok'] for p in s.katalog.segarkan()} == awal['stok']
+    assert {pid: s.ringkasan_produk(pid) for pid in ('P1', 'P2', 'P3')} == awal['ringkasan']
+    assert s.cek_login('budi', 'rahasia123')[0] is not None
+    assert [r['id'] for r in s.iter_transaksi(terbaru_dulu=False)] == \
+        [r['id'] for r in m.iter_transaksi(terbaru_dulu=False)]
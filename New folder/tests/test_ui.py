@@ -0,0 +1,53 @@
+import os
+
+
+def _tanpa_shell(m, monkeypatch):
+    def system(cmd):
+        raise AssertionError(f"os.system({cmd!r}) dipanggil dalam mode UI cepat")
+    monkeypatch.setattr(m.os, 'system', system)
+
+
+def test_bersihkan_layar_dengan_ansi(muat, monkeypatch, capsys):
+    m = muat(SISTA_UI_CEPAT='1')
+    _tanpa_shell(m, monkeypatch)
+    m.clear_screen()
+    assert capsys.readouterr().out == m.ANSI_BERSIH
+
+
+def test_bingkai_dirender_sekali(muat, monkeypatch, capsys):
+    m = muat(SISTA_UI_CEPAT='1')
+    _tanpa_shell(m, monkeypatch)
+    dibuat = []
+
+    def buat():
+        dibuat.append(1)
+        return 'MENU\n'
+    for _ in range(3):
+        m.tampilkan_bingkai('uji', buat)
+    assert len(dibuat) == 1
+    assert capsys.readouterr().out == (m.ANSI_BERSIH + 'MENU\n') * 3
+
+
+def test_menu_utama_tanpa_shell_dan_tanpa_memuat_data(muat, monkeypatch, tmp_path, capsys):
+    data = tmp_path / 'belum_ada'
+    m = muat(SISTA_UI_CEPAT='1', SISTA_DATA_DIR=str(data))
+    _tanpa_shell(m, monkeypatch)
+    dibuat = []
+    asli = m.bingkai_utama
+    monkeypatch.setattr(m, 'bingkai_utama', lambda: dibuat.append(1) or asli())
+    jawaban = iter(['9', '', '9', '', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(jawaban))
+    m.halaman_utama()
+    assert len(dibuat) == 1
+    assert capsys.readouterr().out.count(m.ANSI_BERSIH) == 3
+    # Menu utama tidak butuh data: folder data tidak dibuat sama sekali.
+    assert not os.path.exists(data)
+
+
+def test_bingkai_user_per_pengguna(muat, monkeypatch, capsys):
+    m = muat(SISTA_UI_CEPAT='1')
+    for nama in ('budi', 'sari'):
+        monkeypatch.setattr(m, 'pengguna_sekarang', nama)
+        m.tampilkan_bingkai(('user', nama), m.bingkai_user)
+    keluaran = capsys.readouterr().out
+    assert 'User Menu - budi' in keluaran and 'User Menu - sari' in keluaran